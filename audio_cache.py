@@ -0,0 +1,155 @@
+"""Pre-rendered audio for fixed phrases (tool-call fillers and the like).
+
+Speaking a canned phrase through TTSSpeakFrame costs a live Cartesia round trip every
+time. Instead, each phrase is synthesized once per voice, model and sample rate and
+stored as raw 16-bit mono PCM in a content-addressed file: the file name is a hash of
+everything that affects the audio. Changing the voice or a phrase produces a new key,
+so stale audio is never served and new audio is rendered on the next warm-up. Files are
+memory-mapped, so every call in the worker (and every worker on the host) shares the
+page cache instead of holding its own copy.
+"""
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, Iterable
+
+from loguru import logger
+from pipecat.frames.frames import Frame, TTSAudioRawFrame, TTSStartedFrame, TTSStoppedFrame
+
+import clients
+
+AUDIO_CACHE_DIR = os.getenv(
+    "AUDIO_CACHE_DIR", os.path.join(tempfile.gettempdir(), "festival-coordinator", "audio")
+)
+# Sample rates rendered at worker start; 8000 is Twilio, 24000 the WebRTC/Daily default.
+AUDIO_CACHE_SAMPLE_RATES = [
+    int(rate) for rate in os.getenv("AUDIO_CACHE_SAMPLE_RATES", "8000,24000").split(",") if rate
+]
+
+CARTESIA_TTS_URL = "https://api.cartesia.ai/tts/bytes"
+CARTESIA_VERSION = "2025-04-16"
+CHUNK_SECS = 0.1
+
+_mapped: dict[str, mmap.mmap] = {}
+_warming: dict[tuple, asyncio.Task] = {}
+
+
+def cache_key(phrase: str, voice_id: str, sample_rate: int, model: str) -> str:
+    """Content address of a phrase's audio: changes whenever anything that affects it does."""
+    spec = json.dumps([model, voice_id, sample_rate, "pcm_s16le", phrase])
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(AUDIO_CACHE_DIR, f"{key}.pcm")
+
+
+def get(phrase: str, voice_id: str, sample_rate: int, model: str) -> mmap.mmap | None:
+    """The phrase's PCM audio if it has been rendered, else None. Never blocks on the network."""
+    key = cache_key(phrase, voice_id, sample_rate, model)
+    audio = _mapped.get(key)
+    if audio is None:
+        try:
+            with open(_path(key), "rb") as f:
+                audio = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+        _mapped[key] = audio
+    return audio
+
+
+def frames(audio: mmap.mmap, sample_rate: int) -> list[Frame]:
+    """Frames that play cached audio exactly like a TTS response would."""
+    chunk = int(sample_rate * CHUNK_SECS) * 2
+    return [
+        TTSStartedFrame(),
+        *(
+            TTSAudioRawFrame(audio=audio[i : i + chunk], sample_rate=sample_rate, num_channels=1)
+            for i in range(0, len(audio), chunk)
+        ),
+        TTSStoppedFrame(),
+    ]
+
+
+async def _synthesize(phrase: str, voice_id: str, sample_rate: int, model: str) -> bytes:
+    session = clients.get_http_session()
+    async with session.post(
+        CARTESIA_TTS_URL,
+        json={
+            "model_id": model,
+            "transcript": phrase,
+            "voice": {"mode": "id", "id": voice_id},
+            "output_format": {
+                "container": "raw",
+                "encoding": "pcm_s16le",
+                "sample_rate": sample_rate,
+            },
+        },
+        headers={
+            "Cartesia-Version": CARTESIA_VERSION,
+            "X-API-Key": os.environ["CARTESIA_API_KEY"],
+        },
+    ) as resp:
+        if resp.status != 200:
+            raise RuntimeError(f"Cartesia returned {resp.status}: {await resp.text()}")
+        return await resp.read()
+
+
+def _store(key: str, audio: bytes) -> None:
+    os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+    # Write then rename, so a concurrent reader never maps a half-written file.
+    fd, tmp = tempfile.mkstemp(dir=AUDIO_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(audio)
+    os.replace(tmp, _path(key))
+
+
+async def warm(phrases: Iterable[str], voice_id: str, sample_rate: int, model: str) -> int:
+    """Render any phrases missing from the cache. Returns how many were synthesized."""
+    missing = [p for p in phrases if get(p, voice_id, sample_rate, model) is None]
+
+    async def render(phrase: str) -> None:
+        audio = await _synthesize(phrase, voice_id, sample_rate, model)
+        await asyncio.to_thread(_store, cache_key(phrase, voice_id, sample_rate, model), audio)
+
+    results = await asyncio.gather(*(render(p) for p in missing), return_exceptions=True)
+    for phrase, result in zip(missing, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not pre-render {phrase!r} at {sample_rate}Hz: {result}")
+    rendered = sum(not isinstance(r, Exception) for r in results)
+    if rendered:
+        logger.info(f"Pre-rendered {rendered} phrases for voice {voice_id} at {sample_rate}Hz")
+    return rendered
+
+
+def ensure_warm(phrases: Iterable[str], voice_id: str, sample_rate: int, model: str) -> None:
+    """Start rendering missing phrases in the background, once per phrase set and format."""
+    phrases = tuple(phrases)
+    spec = (phrases, voice_id, sample_rate, model)
+    task = _warming.get(spec)
+    if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+        _warming[spec] = asyncio.create_task(warm(phrases, voice_id, sample_rate, model))
+
+
+def lifespan(
+    phrases: Iterable[str],
+    voice_id: str,
+    model: str,
+    sample_rates: Iterable[int] = AUDIO_CACHE_SAMPLE_RATES,
+):
+    """FastAPI-style lifespan that renders the phrases with the TTS service's voice and
+    model at each of sample_rates in the background at worker start, so the first call's
+    fillers already come from the cache."""
+
+    @asynccontextmanager
+    async def _lifespan(app: Any = None):
+        for sample_rate in sample_rates:
+            ensure_warm(phrases, voice_id, sample_rate, model)
+        yield
+
+    return _lifespan
@@ -0,0 +1,139 @@
+"""Per-process registry of the VAD and smart-turn models shared by every call.
+
+Loading Silero VAD and smart-turn-v3 means reading the ONNX files and building
+inference sessions, which is slow and costs tens of MB per copy. The sessions (and the
+Whisper feature extractor) are read-only and thread-safe, so they are loaded once per
+worker and shared; each call's analyzer only carries its own small streaming state
+(Silero's recurrent state, the smart-turn audio buffer).
+
+The shared analyzers take their sessions as constructor arguments and skip pipecat's
+constructors, so every one built is checked against the preloaded pipecat analyzer and
+a RuntimeError names whatever a pipecat upgrade moved or added.
+"""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any
+
+from loguru import logger
+from pipecat.audio.turn.smart_turn.base_smart_turn import BaseSmartTurn
+from pipecat.audio.turn.smart_turn.local_smart_turn_v3 import LocalSmartTurnAnalyzerV3
+from pipecat.audio.vad.silero import SileroOnnxModel, SileroVADAnalyzer
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+from pipecat.utils.env import env_truthy
+
+_lock = threading.Lock()
+_silero: SileroVADAnalyzer | None = None
+_smart_turn: LocalSmartTurnAnalyzerV3 | None = None
+
+
+def preload() -> None:
+    """Load both models if they aren't loaded yet. Call once at worker start."""
+    global _silero, _smart_turn
+    with _lock:
+        if _silero is not None and _smart_turn is not None:
+            return
+        if _silero is None:
+            _silero = SileroVADAnalyzer()
+        if _smart_turn is None:
+            _smart_turn = LocalSmartTurnAnalyzerV3()
+    logger.info("Preloaded VAD and smart-turn models")
+
+
+def _attr(analyzer: Any, path: str) -> Any:
+    """A private attribute of a preloaded pipecat analyzer, or a RuntimeError naming it:
+    pipecat has no public way to hand an analyzer an existing session."""
+    value = analyzer
+    for name in path.split("."):
+        if not hasattr(value, name):
+            raise RuntimeError(
+                f"{type(analyzer).__name__} has no {path} in this pipecat version; "
+                "update audio_models.py"
+            )
+        value = getattr(value, name)
+    return value
+
+
+def _check_state(shared: Any, loaded: Any) -> None:
+    """Fail loudly if pipecat's analyzer sets up state the shared one lacks, which means
+    its constructor changed since the shared one was written."""
+    missing = sorted(set(vars(loaded)) - set(vars(shared)))
+    if missing:
+        raise RuntimeError(
+            f"{type(shared).__name__} is missing {', '.join(missing)} that "
+            f"{type(loaded).__name__} sets; update audio_models.py"
+        )
+
+
+def shared_sessions() -> dict[str, Any]:
+    """The shared inference sessions, loading them first if needed: "silero_session",
+    "smart_turn_session" and "feature_extractor"."""
+    if _silero is None or _smart_turn is None:
+        preload()
+    return {
+        "silero_session": _attr(_silero, "_model.session"),
+        "smart_turn_session": _attr(_smart_turn, "_session"),
+        "feature_extractor": _attr(_smart_turn, "_feature_extractor"),
+    }
+
+
+class _SharedSileroModel(SileroOnnxModel):
+    """Silero model state for one audio stream, running on a shared session."""
+
+    def __init__(self, session):
+        self.session = session
+        self.reset_states()
+        self.sample_rates = [8000, 16000]
+
+
+class SharedSileroVADAnalyzer(SileroVADAnalyzer):
+    """SileroVADAnalyzer that runs on the given session instead of loading its own."""
+
+    def __init__(
+        self, *, session, sample_rate: int | None = None, params: VADParams | None = None
+    ):
+        VADAnalyzer.__init__(self, sample_rate=sample_rate, params=params)
+        self._model = _SharedSileroModel(session)
+        self._last_reset_time = 0
+
+
+class SharedSmartTurnAnalyzer(LocalSmartTurnAnalyzerV3):
+    """LocalSmartTurnAnalyzerV3 that runs on the given session and feature extractor
+    instead of loading its own."""
+
+    def __init__(self, *, session, feature_extractor, **kwargs: Any):
+        BaseSmartTurn.__init__(self, **kwargs)
+        self._log_data = env_truthy("PIPECAT_SMART_TURN_LOG_DATA", default=False)
+        self._feature_extractor = feature_extractor
+        self._session = session
+
+
+def vad_analyzer(params: VADParams | None = None) -> SileroVADAnalyzer:
+    """A Silero VAD analyzer for one call, backed by the shared session."""
+    analyzer = SharedSileroVADAnalyzer(session=shared_sessions()["silero_session"], params=params)
+    _check_state(analyzer, _silero)
+    _check_state(analyzer._model, _silero._model)  # type: ignore[union-attr]
+    return analyzer
+
+
+def smart_turn_analyzer(**kwargs: Any) -> LocalSmartTurnAnalyzerV3:
+    """A smart-turn-v3 analyzer for one call, backed by the shared session."""
+    sessions = shared_sessions()
+    analyzer = SharedSmartTurnAnalyzer(
+        session=sessions["smart_turn_session"],
+        feature_extractor=sessions["feature_extractor"],
+        **kwargs,
+    )
+    _check_state(analyzer, _smart_turn)
+    return analyzer
+
+
+@asynccontextmanager
+async def lifespan(app: Any = None):
+    """FastAPI-style lifespan that loads the models before the first call arrives, and
+    builds one analyzer of each kind so a pipecat change breaks worker start, not a call."""
+    await asyncio.to_thread(preload)
+    vad_analyzer()
+    smart_turn_analyzer()
+    yield
@@ -0,0 +1,157 @@
+"""In-process response cache and conditional GET for read-heavy endpoints.
+
+The festival catalog and each group's members and festivals are read on every
+frontend page load and rarely change. Their rendered JSON is cached per route, group
+and validated query parameters for BACKEND_CACHE_TTL seconds, with an ETag, and a
+request whose If-None-Match still matches gets a bodyless 304. At most
+BACKEND_CACHE_MAX_ENTRIES responses are kept, least recently used dropped first, and
+expired entries are dropped as they are found.
+
+The handlers in main.py that write the underlying rows invalidate exactly the
+affected route and group, as does POST /cache/invalidate, which the bot calls after
+its write buffer inserts rows. Writes made elsewhere (the SQL editor) show up when
+the entry expires. Hits, misses, 304s and invalidations per route are served
+at GET /cache/stats.
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Hashable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+BACKEND_CACHE_TTL = float(os.getenv("BACKEND_CACHE_TTL", "30"))
+BACKEND_CACHE_MAX_ENTRIES = int(os.getenv("BACKEND_CACHE_MAX_ENTRIES", "1024"))
+
+# Headers a handler sets that belong to the cached response (e.g. X-Next-Cursor).
+_SKIP_HEADERS = {"content-length", "content-type"}
+
+Loader = Callable[[Response], Awaitable[Any]]
+
+
+class _Entry:
+    __slots__ = ("expires", "body", "etag", "headers")
+
+    def __init__(self, expires: float, body: bytes, etag: str, headers: dict[str, str]):
+        self.expires = expires
+        self.body = body
+        self.etag = etag
+        self.headers = headers
+
+
+class ResponseCache:
+    def __init__(
+        self, ttl: float = BACKEND_CACHE_TTL, max_entries: int = BACKEND_CACHE_MAX_ENTRIES
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # (route, group id or None, variant) -> entry, least recently used first
+        self._entries: OrderedDict[tuple[str, str | None, Hashable], _Entry] = OrderedDict()
+        # Scopes with a load in flight, and those of them invalidated since it started,
+        # so a load that began before a write isn't stored.
+        self._loading: dict[tuple[str, str | None], int] = {}
+        self._stale: set[tuple[str, str | None]] = set()
+        self._next_sweep = 0.0
+        self._counters: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def get(self, route: str, key: str | None, variant: Hashable, load: Loader) -> _Entry:
+        now = time.monotonic()
+        entry = self._entries.get((route, key, variant))
+        if entry is not None and entry.expires <= now:
+            del self._entries[(route, key, variant)]
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end((route, key, variant))
+            self._counters[route]["hits"] += 1
+            return entry
+        self._counters[route]["misses"] += 1
+        scope = (route, key)
+        self._loading[scope] = self._loading.get(scope, 0) + 1
+        try:
+            scratch = Response()
+            data = await load(scratch)
+            stale = scope in self._stale
+        finally:
+            self._loading[scope] -= 1
+            if not self._loading[scope]:
+                del self._loading[scope]
+                self._stale.discard(scope)
+        body = bytes(JSONResponse(jsonable_encoder(data)).body)
+        entry = _Entry(
+            time.monotonic() + self.ttl,
+            body,
+            '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+            {k: v for k, v in scratch.headers.items() if k not in _SKIP_HEADERS},
+        )
+        if not stale:
+            self._put((route, key, variant), entry)
+        return entry
+
+    def _put(self, full_key: tuple[str, str | None, Hashable], entry: _Entry) -> None:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            for k in [k for k, e in self._entries.items() if e.expires <= now]:
+                del self._entries[k]
+            self._next_sweep = now + self.ttl
+        self._entries[full_key] = entry
+        self._entries.move_to_end(full_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters[full_key[0]]["evictions"] += 1
+
+    def invalidate(self, route: str, key: str | None = None) -> None:
+        """Drop every cached page of route for key (a group id, or None)."""
+        if (route, key) in self._loading:
+            self._stale.add((route, key))
+        dropped = [k for k in self._entries if k[0] == route and k[1] == key]
+        for k in dropped:
+            del self._entries[k]
+        if dropped:
+            self._counters[route]["invalidations"] += 1
+
+    def count_not_modified(self, route: str) -> None:
+        self._counters[route]["not_modified"] += 1
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        out = {}
+        for route, counters in sorted(self._counters.items()):
+            hits, misses = counters["hits"], counters["misses"]
+            out[route] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                "not_modified": counters["not_modified"],
+                "invalidations": counters["invalidations"],
+                "evictions": counters["evictions"],
+                "entries": sum(1 for r, _, _ in self._entries if r == route),
+            }
+        return out
+
+
+cache = ResponseCache()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def cached_response(
+    request: Request, route: str, key: str | None, variant: Hashable, load: Loader
+) -> Response:
+    """The JSON response for this route and key, from cache when fresh, or a 304 when
+    the client's If-None-Match already has it. variant holds the request's parsed
+    parameters, so spelling or unknown parameters don't make new entries.
+    load(response) returns the data and may set headers on response."""
+    entry = await cache.get(route, key, variant, load)
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, entry.etag):
+        cache.count_not_modified(route)
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
@@ -1,6 +1,12 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
-from supabase import create_client, Client
+import aiohttp
+import httpx
+from supabase import AsyncClient
+from supabase.lib.client_options import AsyncClientOptions
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -8,11 +14,112 @@ load_dotenv(override=True)
 SUPABASE_URL = os.environ["SUPABASE_URL"]
 SUPABASE_KEY = os.environ["SUPABASE_API_KEY"]
 
-_client: Client | None = None
+# One pooled keep-alive client shared by every request handler. Handlers await
+# PostgREST on the event loop instead of each holding a threadpool thread.
+BACKEND_DB_MAX_CONNECTIONS = int(os.getenv("BACKEND_DB_MAX_CONNECTIONS", "100"))
+DB_KEEPALIVE_EXPIRY = float(os.getenv("DB_KEEPALIVE_EXPIRY", "60"))
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
 
+_client: AsyncClient | None = None
 
-def get_client() -> Client:
+
+class _AiohttpStream(httpx.AsyncByteStream):
+    """An aiohttp response body read as httpx reads it; closing releases the connection."""
+
+    def __init__(self, response: aiohttp.ClientResponse, request: httpx.Request):
+        self._response = response
+        self._request = request
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._response.content.iter_any():
+                yield chunk
+        except asyncio.TimeoutError as e:
+            raise httpx.ReadTimeout(str(e), request=self._request) from e
+        except aiohttp.ClientError as e:
+            raise httpx.ReadError(str(e), request=self._request) from e
+
+    async def aclose(self) -> None:
+        self._response.release()
+
+
+class _AiohttpTransport(httpx.AsyncBaseTransport):
+    """Sends the Supabase client's httpx requests over a pooled aiohttp connector.
+
+    The supabase client only speaks httpx, but a tuned httpx.AsyncClient isn't enough:
+    its pool rescans every connection on each request state change, so under concurrent
+    load it spends several times the CPU per request that aiohttp does, and its
+    throughput falls as the pool grows (compare with benchmarks/backend_load.py).
+    Errors are raised as the httpx exceptions httpx's own transport would raise.
+    """
+
+    def __init__(self, max_connections: int, keepalive_expiry: float, timeout: float):
+        self._max_connections = max_connections
+        self._keepalive_expiry = keepalive_expiry
+        self._timeout = timeout
+        self._session: aiohttp.ClientSession | None = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._max_connections, keepalive_timeout=self._keepalive_expiry
+                ),
+                timeout=aiohttp.ClientTimeout(total=self._timeout),
+                # httpx.Response decodes the body from its Content-Encoding.
+                auto_decompress=False,
+            )
+        try:
+            response = await self._session.request(
+                request.method,
+                str(request.url),
+                headers=request.headers.multi_items(),
+                data=await request.aread(),
+            )
+        except asyncio.TimeoutError as e:
+            raise httpx.TimeoutException(str(e), request=request) from e
+        except aiohttp.ClientConnectorError as e:
+            raise httpx.ConnectError(str(e), request=request) from e
+        except aiohttp.ClientError as e:
+            raise httpx.TransportError(str(e), request=request) from e
+        return httpx.Response(
+            response.status,
+            headers=list(response.raw_headers),
+            stream=_AiohttpStream(response, request),
+        )
+
+    async def aclose(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def get_client() -> AsyncClient:
     global _client
     if _client is None:
-        _client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        transport = _AiohttpTransport(
+            BACKEND_DB_MAX_CONNECTIONS, DB_KEEPALIVE_EXPIRY, DB_TIMEOUT
+        )
+        http_client = httpx.AsyncClient(transport=transport, timeout=DB_TIMEOUT)
+        # The service key is the whole auth; there is no user session to load, so the
+        # constructor is enough (acreate_client would only look one up).
+        _client = AsyncClient(
+            SUPABASE_URL, SUPABASE_KEY, AsyncClientOptions(httpx_client=http_client)
+        )
     return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.options.httpx_client.aclose()  # type: ignore[union-attr]
+        _client = None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Close the connection pool when the server shuts down."""
+    try:
+        yield
+    finally:
+        await close_client()
@@ -1,18 +1,55 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
+import hmac
+import os
+from typing import Any
 
-from backend.database import get_client
+import httpx
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from loguru import logger
+
+from backend.cache import cache, cached_response
+from backend.database import get_client, lifespan
+from backend.filters import (
+    FilterParam,
+    apply_filters,
+    cache_variant,
+    filter_key,
+    keyset,
+    order_by,
+)
 from backend.models import (
+    Artist,
     ArtistCreate,
+    CacheInvalidation,
+    Call,
     CallCreate,
+    Festival,
+    FestivalCatalog,
     FestivalCatalogCreate,
     FestivalCreate,
     GroupCreate,
+    Member,
     MemberCreate,
     MemberUpdate,
 )
+from backend.pagination import (
+    API_MAX_PAGE_SIZE,
+    API_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    Keyset,
+    columns,
+    fetch_page,
+)
 
-app = FastAPI(title="Festival Coordinator API")
+# Bot (or supervisor.py) base URL, told when members change so callers are identified
+# from fresh phone data, and after every write so query_database stops serving results
+# cached before it. Unset: the bot's caches expire on their own TTLs.
+BOT_URL = os.getenv("BOT_URL")
+# Shared with the bot, which only takes invalidations that carry it, and which sends
+# it with its own on POST /cache/invalidate.
+PHONE_INDEX_SECRET = os.getenv("PHONE_INDEX_SECRET", "")
+
+app = FastAPI(title="Festival Coordinator API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,118 +57,281 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# List endpoints return one page of `limit` rows; pass the X-Next-Cursor response
+# header back as `cursor` for the next one. `fields` picks columns (comma-separated),
+# `sort` one of the list's sort fields and `filter` conditions (backend/filters.py).
+PageLimit = Query(API_PAGE_SIZE, ge=1, le=API_MAX_PAGE_SIZE)
+
+MEMBER_SORTS = {"name": Keyset("name")}
+CALL_SORTS = {"started_at": Keyset("started_at")}
+FESTIVAL_SORTS = {
+    "dates_start": Keyset("dates_start", nullable=True),
+    "ticket_price": Keyset("ticket_price", nullable=True),
+    "on_sale_date": Keyset("on_sale_date", nullable=True),
+    "name": Keyset("name"),
+}
+ARTIST_SORTS = {"name": Keyset("name")}
+
+MEMBER_FILTERS = ("group_id", "name", "city", "status")
+CALL_FILTERS = ("group_id", "started_at", "ended_at")
+CATALOG_FILTERS = ("name", "location", "dates_start", "dates_end", "ticket_price", "on_sale_date")
+FESTIVAL_FILTERS = ("group_id", *CATALOG_FILTERS, "status")
+ARTIST_FILTERS = ("festival_id", "name", "priority")
+
+# The group lists aren't paginated, so they sort by any number of fields. Member status
+# sorts active, pending, inactive, by the status_rank column (migration 008).
+GROUP_MEMBER_SORTS = {"status": "status_rank", "name": "name", "city": "city"}
+GROUP_FESTIVAL_SORTS = {
+    f: f for f in ("dates_start", "dates_end", "ticket_price", "on_sale_date", "name", "status")
+}
+
 
 # ── Groups ───────────────────────────────────────────────────────────────────
 
 
 @app.get("/groups")
-def list_groups():
-    result = get_client().table("groups").select("*").order("created_at", desc=True).execute()
+async def list_groups():
+    result = await get_client().table("groups").select("*").order("created_at", desc=True).execute()
     return result.data
 
 
 @app.get("/groups/{group_id}")
-def get_group(group_id: str):
-    result = get_client().table("groups").select("*").eq("id", group_id).execute()
+async def get_group(group_id: str):
+    result = await get_client().table("groups").select("*").eq("id", group_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Group not found")
     return result.data[0]
 
 
 @app.post("/groups", status_code=201)
-def create_group(body: GroupCreate):
+async def create_group(body: GroupCreate, background_tasks: BackgroundTasks):
     data = body.model_dump(exclude_none=True)
-    result = get_client().table("groups").insert(data).execute()
+    result = await get_client().table("groups").insert(data).execute()
+    _tables_changed(background_tasks, "groups")
     return result.data[0]
 
 
-_STATUS_ORDER = {"active": 0, "pending": 1, "inactive": 2}
+@app.get("/groups/{group_id}/members")
+async def list_group_members(
+    group_id: str,
+    request: Request,
+    sort: str = "status,name",
+    filters: list[str] | None = FilterParam,
+):
+    query = get_client().table("members").select("*").eq("group_id", group_id)
+    query = apply_filters(query, Member, filters, MEMBER_FILTERS)
+    query = order_by(query, sort, GROUP_MEMBER_SORTS)
 
+    async def load(response: Response):
+        result = await query.execute()
+        return result.data
 
-@app.get("/groups/{group_id}/members")
-def list_group_members(group_id: str):
-    result = get_client().table("members").select("*").eq("group_id", group_id).order("name").execute()
-    return sorted(result.data, key=lambda m: (_STATUS_ORDER.get(m.get("status", ""), 9), m.get("name", "")))
+    variant = cache_variant(Member, sort, filters, GROUP_MEMBER_SORTS, MEMBER_FILTERS)
+    return await cached_response(request, "group-members", group_id, variant, load)
 
 
 @app.get("/groups/{group_id}/festivals")
-def list_group_festivals(group_id: str):
-    result = (
-        get_client()
-        .table("festivals")
-        .select("*, artists(*)")
-        .eq("group_id", group_id)
-        .order("dates_start")
-        .execute()
-    )
-    return result.data
+async def list_group_festivals(
+    group_id: str,
+    request: Request,
+    sort: str = "dates_start",
+    filters: list[str] | None = FilterParam,
+):
+    query = get_client().table("festivals").select("*, artists(*)").eq("group_id", group_id)
+    query = apply_filters(query, Festival, filters, FESTIVAL_FILTERS)
+    query = order_by(query, sort, GROUP_FESTIVAL_SORTS)
+
+    async def load(response: Response):
+        result = await query.execute()
+        return result.data
+
+    variant = cache_variant(Festival, sort, filters, GROUP_FESTIVAL_SORTS, FESTIVAL_FILTERS)
+    return await cached_response(request, "group-festivals", group_id, variant, load)
+
+
+@app.get("/groups/{group_id}/overview")
+async def get_group_overview(group_id: str, request: Request, calls: int = Query(5, ge=0, le=50)):
+    """Everything the group page shows, from one get_group_snapshot call (migration 004):
+    the group, its members, festivals with artists, and the latest calls without
+    transcripts."""
+
+    async def load(response: Response):
+        result = await (
+            get_client()
+            .rpc("get_group_snapshot", {"target_group_id": group_id, "calls_limit": calls})
+            .execute()
+        )
+        snapshot = result.data
+        if not isinstance(snapshot, dict) or not snapshot.get("group"):
+            raise HTTPException(status_code=404, detail="Group not found")
+        return snapshot
+
+    return await cached_response(request, "group-overview", group_id, calls, load)
+
+
+async def _notify_bot(path: str, payload: dict | None = None) -> None:
+    """POST an invalidation to the bot; the supervisor fans it out to every worker."""
+    if not BOT_URL:
+        return
+    try:
+        async with httpx.AsyncClient(timeout=5) as client:
+            response = await client.post(
+                f"{BOT_URL.rstrip('/')}{path}",
+                json=payload,
+                headers={"X-Phone-Index-Secret": PHONE_INDEX_SECRET},
+            )
+            response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not POST {path} to the bot: {e}")
+
+
+def _tables_changed(background_tasks: BackgroundTasks, *tables: str) -> None:
+    """Drop the bot's cached query_database results that read these tables."""
+    background_tasks.add_task(_notify_bot, "/query-cache/invalidate", {"tables": list(tables)})
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Response cache hits, misses, 304s and invalidations per route."""
+    return cache.stats()
+
+
+@app.post("/cache/invalidate", include_in_schema=False)
+async def invalidate_cache(
+    body: CacheInvalidation, secret: str = Header("", alias="X-Phone-Index-Secret")
+):
+    """Called by the bot after its write buffer inserts rows, which bypass this API."""
+    if not PHONE_INDEX_SECRET or not hmac.compare_digest(
+        secret.encode(), PHONE_INDEX_SECRET.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    parent_ids = [str(i) for i in body.parent_ids]
+    if body.table == "artists":
+        await _artists_changed([{"festival_id": i} for i in parent_ids])
+    else:
+        changed = _member_lists_changed if body.table == "members" else _festivals_changed
+        changed([{"group_id": i} for i in parent_ids])
+    return {"invalidated": True}
 
 
 # ── Members ──────────────────────────────────────────────────────────────────
 
 
+def _member_lists_changed(rows: list[Any]) -> None:
+    """Drop the cached member lists and overviews of the groups these rows belong to."""
+    for group_id in {row.get("group_id") for row in rows}:
+        cache.invalidate("group-members", group_id)
+        cache.invalidate("group-overview", group_id)
+
+
+def _members_changed(rows: list[Any], background_tasks: BackgroundTasks) -> None:
+    _member_lists_changed(rows)
+    background_tasks.add_task(_notify_bot, "/phone-index/invalidate")
+    _tables_changed(background_tasks, "members")
+
+
 @app.get("/members")
-def list_members():
-    result = get_client().table("members").select("*").execute()
-    return result.data
+async def list_members(
+    response: Response,
+    limit: int = PageLimit,
+    cursor: str | None = None,
+    fields: str | None = None,
+    sort: str = "name",
+    filters: list[str] | None = FilterParam,
+):
+    order = keyset(sort, MEMBER_SORTS)
+    query = get_client().table("members").select(columns(Member, fields, order))
+    query = apply_filters(query, Member, filters, MEMBER_FILTERS)
+    return await fetch_page(query, order, response, limit, cursor)
 
 
 @app.get("/members/{member_id}")
-def get_member(member_id: str):
-    result = get_client().table("members").select("*").eq("id", member_id).execute()
+async def get_member(member_id: str):
+    result = await get_client().table("members").select("*").eq("id", member_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Member not found")
     return result.data[0]
 
 
-@app.post("/members", status_code=201)
-def create_member(body: MemberCreate):
+def _member_data(body: MemberCreate) -> dict:
     data = body.model_dump(exclude_none=True)
     data["group_id"] = str(data["group_id"])
-    result = get_client().table("members").insert(data).execute()
+    return data
+
+
+@app.post("/members", status_code=201)
+async def create_member(body: MemberCreate, background_tasks: BackgroundTasks):
+    result = await get_client().table("members").insert(_member_data(body)).execute()
+    _members_changed(result.data, background_tasks)
     return result.data[0]
 
 
+@app.post("/members/bulk", status_code=201)
+async def create_members(body: list[MemberCreate], background_tasks: BackgroundTasks):
+    if not body:
+        return []
+    rows = [_member_data(m) for m in body]
+    result = await get_client().table("members").insert(rows, default_to_null=False).execute()
+    _members_changed(result.data, background_tasks)
+    return result.data
+
+
 @app.patch("/members/{member_id}")
-def update_member(member_id: str, body: MemberUpdate):
+async def update_member(member_id: str, body: MemberUpdate, background_tasks: BackgroundTasks):
     data = body.model_dump(exclude_none=True)
     if not data:
         raise HTTPException(status_code=400, detail="No fields to update")
-    result = get_client().table("members").update(data).eq("id", member_id).execute()
+    result = await get_client().table("members").update(data).eq("id", member_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Member not found")
+    _members_changed(result.data, background_tasks)
     return result.data[0]
 
 
 @app.delete("/members/{member_id}", status_code=204)
-def delete_member(member_id: str):
-    get_client().table("members").delete().eq("id", member_id).execute()
+async def delete_member(member_id: str, background_tasks: BackgroundTasks):
+    result = await get_client().table("members").delete().eq("id", member_id).execute()
+    _members_changed(result.data, background_tasks)
 
 
 # ── Calls ────────────────────────────────────────────────────────────────────
 
 
 @app.get("/calls")
-def list_calls():
-    result = get_client().table("calls").select("*").order("started_at", desc=True).execute()
-    return result.data
+async def list_calls(
+    response: Response,
+    limit: int = PageLimit,
+    cursor: str | None = None,
+    fields: str | None = None,
+    sort: str = "-started_at",
+    filters: list[str] | None = FilterParam,
+):
+    """Transcripts are left out unless asked for with fields=."""
+    order = keyset(sort, CALL_SORTS)
+    select = columns(Call, fields, order, exclude=("transcript",))
+    query = get_client().table("calls").select(select)
+    query = apply_filters(query, Call, filters, CALL_FILTERS)
+    return await fetch_page(query, order, response, limit, cursor)
 
 
 @app.get("/calls/{call_id}")
-def get_call(call_id: str):
-    result = get_client().table("calls").select("*").eq("id", call_id).execute()
+async def get_call(call_id: str):
+    result = await get_client().table("calls").select("*").eq("id", call_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Call not found")
     return result.data[0]
 
 
 @app.post("/calls", status_code=201)
-def create_call(body: CallCreate):
+async def create_call(body: CallCreate, background_tasks: BackgroundTasks):
     data = body.model_dump(exclude_none=True)
     data["group_id"] = str(data["group_id"])
-    result = get_client().table("calls").insert(data).execute()
+    result = await get_client().table("calls").insert(data).execute()
+    cache.invalidate("group-overview", data["group_id"])
+    _tables_changed(background_tasks, "calls")
     return result.data[0]
 
 
@@ -139,85 +339,166 @@ def create_call(body: CallCreate):
 
 
 @app.get("/festivals")
-def list_festivals():
-    result = get_client().table("festivals").select("*").order("dates_start").execute()
-    return result.data
+async def list_festivals(
+    response: Response,
+    limit: int = PageLimit,
+    cursor: str | None = None,
+    fields: str | None = None,
+    sort: str = "dates_start",
+    filters: list[str] | None = FilterParam,
+):
+    order = keyset(sort, FESTIVAL_SORTS)
+    query = get_client().table("festivals").select(columns(Festival, fields, order))
+    query = apply_filters(query, Festival, filters, FESTIVAL_FILTERS)
+    return await fetch_page(query, order, response, limit, cursor)
 
 
 @app.get("/festivals/{festival_id}")
-def get_festival(festival_id: str):
-    result = get_client().table("festivals").select("*").eq("id", festival_id).execute()
+async def get_festival(festival_id: str):
+    result = await get_client().table("festivals").select("*").eq("id", festival_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Festival not found")
     return result.data[0]
 
 
-@app.post("/festivals", status_code=201)
-def create_festival(body: FestivalCreate):
+def _festival_data(body: FestivalCreate | FestivalCatalogCreate) -> dict:
     data = body.model_dump(exclude_none=True)
-    data["group_id"] = str(data["group_id"])
-    if "ticket_price" in data:
-        data["ticket_price"] = str(data["ticket_price"])
-    if "dates_start" in data:
-        data["dates_start"] = str(data["dates_start"])
-    if "dates_end" in data:
-        data["dates_end"] = str(data["dates_end"])
-    if "on_sale_date" in data:
-        data["on_sale_date"] = str(data["on_sale_date"])
-    result = get_client().table("festivals").insert(data).execute()
+    for key in ("group_id", "ticket_price", "dates_start", "dates_end", "on_sale_date"):
+        if key in data:
+            data[key] = str(data[key])
+    return data
+
+
+def _festivals_changed(rows: list[Any]) -> None:
+    """Drop the cached festival lists and overviews of the groups these rows belong to."""
+    for group_id in {row.get("group_id") for row in rows}:
+        cache.invalidate("group-festivals", group_id)
+        cache.invalidate("group-overview", group_id)
+
+
+@app.post("/festivals", status_code=201)
+async def create_festival(body: FestivalCreate, background_tasks: BackgroundTasks):
+    result = await get_client().table("festivals").insert(_festival_data(body)).execute()
+    _festivals_changed(result.data)
+    _tables_changed(background_tasks, "festivals")
     return result.data[0]
 
 
+@app.post("/festivals/bulk", status_code=201)
+async def create_festivals(body: list[FestivalCreate], background_tasks: BackgroundTasks):
+    if not body:
+        return []
+    rows = [_festival_data(f) for f in body]
+    result = await get_client().table("festivals").insert(rows, default_to_null=False).execute()
+    _festivals_changed(result.data)
+    _tables_changed(background_tasks, "festivals")
+    return result.data
+
+
 # ── Artists ───────────────────────────────────────────────────────────────────
 
 
 @app.get("/artists")
-def list_artists():
-    result = get_client().table("artists").select("*").execute()
-    return result.data
+async def list_artists(
+    response: Response,
+    limit: int = PageLimit,
+    cursor: str | None = None,
+    fields: str | None = None,
+    sort: str = "name",
+    filters: list[str] | None = FilterParam,
+):
+    order = keyset(sort, ARTIST_SORTS)
+    query = get_client().table("artists").select(columns(Artist, fields, order))
+    query = apply_filters(query, Artist, filters, ARTIST_FILTERS)
+    return await fetch_page(query, order, response, limit, cursor)
 
 
 @app.get("/artists/{artist_id}")
-def get_artist(artist_id: str):
-    result = get_client().table("artists").select("*").eq("id", artist_id).execute()
+async def get_artist(artist_id: str):
+    result = await get_client().table("artists").select("*").eq("id", artist_id).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Artist not found")
     return result.data[0]
 
 
-@app.post("/artists", status_code=201)
-def create_artist(body: ArtistCreate):
+def _artist_data(body: ArtistCreate) -> dict:
     data = body.model_dump(exclude_none=True)
     data["festival_id"] = str(data["festival_id"])
-    result = get_client().table("artists").insert(data).execute()
+    return data
+
+
+async def _artists_changed(rows: list[Any]) -> None:
+    """Group festival lists and overviews embed artists, so drop those of the groups
+    these artists' festivals belong to."""
+    festival_ids = list({row["festival_id"] for row in rows})
+    festivals = await (
+        get_client().table("festivals").select("group_id").in_("id", festival_ids).execute()
+    )
+    _festivals_changed(festivals.data)
+
+
+@app.post("/artists", status_code=201)
+async def create_artist(body: ArtistCreate, background_tasks: BackgroundTasks):
+    result = await get_client().table("artists").insert(_artist_data(body)).execute()
+    await _artists_changed(result.data)
+    _tables_changed(background_tasks, "artists")
     return result.data[0]
 
 
+@app.post("/artists/bulk", status_code=201)
+async def create_artists(body: list[ArtistCreate], background_tasks: BackgroundTasks):
+    if not body:
+        return []
+    rows = [_artist_data(a) for a in body]
+    result = await get_client().table("artists").insert(rows, default_to_null=False).execute()
+    await _artists_changed(result.data)
+    _tables_changed(background_tasks, "artists")
+    return result.data
+
+
 # ── Festival Catalog ─────────────────────────────────────────────────────────
 
 
 @app.get("/festival-catalog")
-def list_festival_catalog():
-    result = (
-        get_client()
-        .table("festival_catalog")
-        .select("*")
-        .order("dates_start")
-        .execute()
-    )
-    return result.data
+async def list_festival_catalog(
+    request: Request,
+    limit: int = PageLimit,
+    cursor: str | None = None,
+    fields: str | None = None,
+    sort: str = "dates_start",
+    filters: list[str] | None = FilterParam,
+):
+    order = keyset(sort, FESTIVAL_SORTS)
+    query = get_client().table("festival_catalog").select(columns(FestivalCatalog, fields, order))
+    query = apply_filters(query, FestivalCatalog, filters, CATALOG_FILTERS)
+
+    async def load(response: Response):
+        return await fetch_page(query, order, response, limit, cursor)
+
+    variant = (order, limit, cursor, fields, filter_key(FestivalCatalog, filters, CATALOG_FILTERS))
+    return await cached_response(request, "festival-catalog", None, variant, load)
 
 
 @app.post("/festival-catalog", status_code=201)
-def create_festival_catalog_entry(body: FestivalCatalogCreate):
-    data = body.model_dump(exclude_none=True)
-    if "ticket_price" in data:
-        data["ticket_price"] = str(data["ticket_price"])
-    if "dates_start" in data:
-        data["dates_start"] = str(data["dates_start"])
-    if "dates_end" in data:
-        data["dates_end"] = str(data["dates_end"])
-    if "on_sale_date" in data:
-        data["on_sale_date"] = str(data["on_sale_date"])
-    result = get_client().table("festival_catalog").insert(data).execute()
+async def create_festival_catalog_entry(
+    body: FestivalCatalogCreate, background_tasks: BackgroundTasks
+):
+    result = await get_client().table("festival_catalog").insert(_festival_data(body)).execute()
+    cache.invalidate("festival-catalog")
+    _tables_changed(background_tasks, "festival_catalog")
     return result.data[0]
+
+
+@app.post("/festival-catalog/bulk", status_code=201)
+async def create_festival_catalog_entries(
+    body: list[FestivalCatalogCreate], background_tasks: BackgroundTasks
+):
+    if not body:
+        return []
+    rows = [_festival_data(f) for f in body]
+    result = await (
+        get_client().table("festival_catalog").insert(rows, default_to_null=False).execute()
+    )
+    cache.invalidate("festival-catalog")
+    _tables_changed(background_tasks, "festival_catalog")
+    return result.data
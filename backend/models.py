@@ -1,4 +1,5 @@
 from datetime import date, datetime
+from typing import Literal
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -56,6 +57,7 @@ class Call(BaseModel):
     ended_at: datetime | None = None
     summary: str | None = None
     transcript: list | dict | None = None
+    latency: dict | None = None
 
 
 # --- Festivals ---
@@ -117,3 +119,11 @@ class FestivalCatalog(BaseModel):
     dates_end: date | None = None
     ticket_price: float | None = None
     on_sale_date: date | None = None
+
+
+# --- Cache ---
+
+class CacheInvalidation(BaseModel):
+    # members and festivals: their group ids; artists: their festival ids
+    table: Literal["members", "festivals", "artists"]
+    parent_ids: list[UUID]
@@ -0,0 +1,115 @@
+"""Keyset pagination and column projection for the list endpoints.
+
+A page is ordered by a sort column plus id, and the cursor for the next page is the
+(sort value, id) of its last row, so every page is an index range scan (migration
+007) however deep the client pages. The cursor is returned in the X-Next-Cursor
+header, so the body stays a plain list; no header means this was the last page. A
+cursor only continues a list in the sort order it came from.
+"""
+
+import base64
+import json
+import os
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "500"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass(frozen=True)
+class Keyset:
+    """A list's sort order: column, then id, both in the same direction. Nulls in a
+    nullable column sort last."""
+
+    column: str
+    desc: bool = False
+    nullable: bool = False
+
+
+def columns(model: type[BaseModel], fields: str | None, keyset: Keyset, exclude=()) -> str:
+    """The select list for fields= (comma-separated), or every column of the model but
+    exclude. The id and sort column are always selected, for the cursor."""
+    allowed = list(model.model_fields)
+    if fields:
+        wanted = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in wanted if f not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}",
+            )
+    else:
+        wanted = [f for f in allowed if f not in exclude]
+    for key in (keyset.column, "id"):
+        if key not in wanted:
+            wanted.append(key)
+    return ",".join(wanted)
+
+
+def _sort_key(keyset: Keyset) -> str:
+    return ("-" if keyset.desc else "") + keyset.column
+
+
+def _encode(row: dict, keyset: Keyset) -> str:
+    raw = json.dumps([_sort_key(keyset), row.get(keyset.column), row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor: str, keyset: Keyset) -> tuple[Any, str]:
+    try:
+        sort, value, row_id = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+        if not isinstance(row_id, str):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if sort != _sort_key(keyset):
+        raise HTTPException(status_code=400, detail="Cursor is from a list with another sort")
+    return value, row_id
+
+
+def _quote(value: Any) -> str:
+    """A value inside a PostgREST or=() filter, where , ( ) are reserved."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _after(query, keyset: Keyset, cursor: str):
+    value, row_id = _decode(cursor, keyset)
+    op = "lt" if keyset.desc else "gt"
+    col, last_id = keyset.column, _quote(row_id)
+    if value is None:
+        # Already among the trailing nulls.
+        return query.is_(col, "null").filter("id", op, row_id)
+    v = _quote(value)
+    after = [f"{col}.{op}.{v}", f"and({col}.eq.{v},id.{op}.{last_id})"]
+    if keyset.nullable:
+        after.append(f"{col}.is.null")
+    else:
+        # Redundant with the or=(), but lets Postgres start the index scan at the cursor.
+        query = query.filter(col, "lte" if keyset.desc else "gte", value)
+    return query.or_(",".join(after))
+
+
+async def fetch_page(query, keyset: Keyset, response: Response, limit: int, cursor: str | None):
+    """Run a select query for one page, setting X-Next-Cursor when there are more rows."""
+    if cursor:
+        query = _after(query, keyset, cursor)
+    nullsfirst = False if keyset.nullable else None
+    result = await (
+        query.order(keyset.column, desc=keyset.desc, nullsfirst=nullsfirst)
+        .order("id", desc=keyset.desc)
+        .limit(limit + 1)
+        .execute()
+    )
+    rows = result.data
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = _encode(rows[-1], keyset)
+    return rows
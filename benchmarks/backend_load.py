@@ -0,0 +1,189 @@
+"""REST API throughput: requests/sec and latency under concurrent load.
+
+Serves backend/ with uvicorn (one worker, like `fastapi run`) in a subprocess, pointed
+at a local PostgREST stand-in, and drives its main dashboard endpoints with a fixed
+number of concurrent clients. With --baseline, the backend/ of another git revision
+is served the same way first, for a before/after comparison:
+
+    uv run python -m benchmarks.backend_load --baseline HEAD~1 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import uuid
+
+import aiohttp
+
+from benchmarks.fake_postgrest import FakePostgrest
+
+GROUP_ID = "aaaaaaaa-0001-4000-a000-000000000001"
+
+ENDPOINTS = [
+    "/groups",
+    f"/groups/{GROUP_ID}",
+    f"/groups/{GROUP_ID}/members",
+    f"/groups/{GROUP_ID}/festivals",
+    "/festival-catalog",
+    "/calls",
+]
+
+
+def _seed() -> dict[str, list[dict]]:
+    tables: dict[str, list[dict]] = {
+        "groups": [{"id": GROUP_ID, "name": "Bay Area Bassheads"}]
+        + [{"id": str(uuid.uuid4()), "name": f"Group {i}"} for i in range(20)],
+        "members": [
+            {"id": str(uuid.uuid4()), "group_id": GROUP_ID, "name": f"Member {i}", "city": "SF"}
+            for i in range(12)
+        ],
+        "festivals": [
+            {"id": str(uuid.uuid4()), "group_id": GROUP_ID, "name": f"Fest {i}"}
+            for i in range(5)
+        ],
+        "festival_catalog": [
+            {"id": str(uuid.uuid4()), "name": f"Catalog Fest {i}", "location": "Somewhere"}
+            for i in range(40)
+        ],
+        "calls": [
+            {
+                "id": str(uuid.uuid4()),
+                "group_id": GROUP_ID,
+                "started_at": f"2026-01-{i % 28 + 1:02d}T00:00:00Z",
+                "summary": f"Call {i}",
+                "transcript": [{"role": "user", "content": "x" * 200}] * 10,
+            }
+            for i in range(20)
+        ],
+    }
+    return tables
+
+
+def _backend_copy(revision: str | None) -> str:
+    """A copy of backend/ (from the working tree, or a git revision) in a temp dir, so
+    the server can't pick up a real .env from the repo."""
+    root = tempfile.mkdtemp(prefix="backend-load-")
+    if revision is None:
+        shutil.copytree("backend", os.path.join(root, "backend"))
+    else:
+        archive = subprocess.run(
+            ["git", "archive", "--format=tar", revision, "backend"],
+            check=True,
+            capture_output=True,
+        ).stdout
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(root, filter="data")
+    return root
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _start_server(root: str, supabase_url: str) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "SUPABASE_URL": supabase_url,
+        "SUPABASE_API_KEY": "benchmark",
+        "BOT_URL": "",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port)]
+        + ["--log-level", "warning", "--no-access-log"],
+        cwd=root,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    async with aiohttp.ClientSession() as session:
+        for _ in range(200):
+            try:
+                async with session.get(f"{base_url}/groups") as response:
+                    await response.read()
+                return server, base_url
+            except aiohttp.ClientConnectionError:
+                await asyncio.sleep(0.05)
+    server.kill()
+    raise RuntimeError("backend did not start")
+
+
+async def _load(
+    session: aiohttp.ClientSession, url: str, concurrency: int, seconds: float
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker() -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    q = statistics.quantiles(latencies, n=100)
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": q[49] * 1000,
+        "p99_ms": q[98] * 1000,
+        "errors": errors,
+    }
+
+
+async def _run(label: str, root: str, fake: FakePostgrest, concurrency: int, seconds: float):
+    server, base_url = await _start_server(root, fake.url)
+    try:
+        print(f"\n{label}:")
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            for endpoint in ENDPOINTS:
+                r = await _load(session, base_url + endpoint, concurrency, seconds)
+                print(
+                    f"  {endpoint:<50} {r['rps']:7.0f} req/s  p50={r['p50_ms']:7.1f}ms"
+                    f"  p99={r['p99_ms']:7.1f}ms  errors={r['errors']}"
+                )
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+async def main(delay: float, concurrency: int, seconds: float, baseline: str | None) -> None:
+    with FakePostgrest(delay=delay, tables=_seed()) as fake:
+        print(
+            f"PostgREST stand-in, {delay * 1000:.0f}ms per request; {concurrency} concurrent "
+            f"clients, {seconds:.0f}s per endpoint"
+        )
+        if baseline:
+            await _run(f"backend @ {baseline}", _backend_copy(baseline), fake, concurrency, seconds)
+        await _run("backend (working tree)", _backend_copy(None), fake, concurrency, seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument("--delay", type=float, default=0.02, help="seconds per PostgREST request")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5, help="load time per endpoint")
+    parser.add_argument("--baseline", help="git revision whose backend/ to measure first")
+    args = parser.parse_args()
+    asyncio.run(main(args.delay, args.concurrency, args.seconds, args.baseline))
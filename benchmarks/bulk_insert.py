@@ -0,0 +1,99 @@
+"""Inserting N rows: one request per row vs one bulk statement.
+
+Runs db.add_member / add_festival / add_artist once per row (sequentially, as a bot
+tool or script would, and concurrently on the db_async pool, as the old group wizard
+did with Promise.all) against db.add_members / add_festivals / add_artists, using a
+local PostgREST stand-in.
+
+    uv run python -m benchmarks.bulk_insert --delay 0.02 --rows 10 100 1000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_API_KEY", "benchmark")
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+
+import db  # noqa: E402
+import db_async  # noqa: E402
+from benchmarks.fake_postgrest import FakePostgrest  # noqa: E402
+
+GROUP_ID = "aaaaaaaa-0001-4000-a000-000000000001"
+FESTIVAL_ID = "bbbbbbbb-0001-4000-a000-000000000001"
+
+
+def _rows(table: str, n: int) -> list[dict]:
+    if table == "members":
+        return [{"name": f"Member {i}", "city": "Oakland, CA"} for i in range(n)]
+    if table == "festivals":
+        return [{"name": f"Fest {i}", "location": "Golden Gate Park"} for i in range(n)]
+    return [{"name": f"Artist {i}", "priority": "want_to_see"} for i in range(n)]
+
+
+def _one(table: str, row: dict):
+    if table == "members":
+        return db.add_member(GROUP_ID, **row)
+    if table == "festivals":
+        return db.add_festival(GROUP_ID, **row)
+    return db.add_artist(FESTIVAL_ID, **row)
+
+
+def _bulk(table: str, rows: list[dict]):
+    if table == "members":
+        return db.add_members(GROUP_ID, rows)
+    if table == "festivals":
+        return db.add_festivals(GROUP_ID, rows)
+    return db.add_artists(FESTIVAL_ID, rows)
+
+
+async def _sequential(table: str, rows: list[dict]) -> None:
+    for row in rows:
+        await db_async.run(_one, table, row)
+
+
+async def _concurrent(table: str, rows: list[dict]) -> None:
+    await asyncio.gather(*(db_async.run(_one, table, row) for row in rows))
+
+
+async def _bulk_async(table: str, rows: list[dict]) -> None:
+    await db_async.run(_bulk, table, rows)
+
+
+async def main(delay: float, sizes: list[int], tables: list[str]) -> None:
+    strategies = {"1-by-1": _sequential, "concurrent": _concurrent, "bulk": _bulk_async}
+    with FakePostgrest(delay=delay) as server:
+        db.SUPABASE_URL = server.url
+        print(
+            f"PostgREST stand-in, {delay * 1000:.0f}ms per request, "
+            f"{db.DB_MAX_CONNECTIONS} pooled connections"
+        )
+        for table in tables:
+            print(f"\n{table}:")
+            for n in sizes:
+                rows = _rows(table, n)
+                line = f"  {n:>5} rows"
+                for label, strategy in strategies.items():
+                    before = server.requests
+                    start = time.perf_counter()
+                    await strategy(table, rows)
+                    ms = (time.perf_counter() - start) * 1000
+                    line += f"  {label}={ms:8.1f}ms ({server.requests - before} req)"
+                print(line)
+    db_async.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument("--delay", type=float, default=0.02, help="seconds per PostgREST request")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument(
+        "--tables",
+        nargs="+",
+        default=["members", "festivals", "artists"],
+        choices=["members", "festivals", "artists"],
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.delay, args.rows, args.tables))
@@ -0,0 +1,94 @@
+"""Per-call model setup time and RSS per concurrent call, fresh vs shared models.
+
+Each mode runs in its own subprocess, which builds the analyzers one call needs (the
+turn-detection VAD, the smart-turn analyzer and the Twilio transport VAD) for N
+simultaneous calls and reports setup time per call and resident memory growth.
+
+    uv run python -m benchmarks.call_setup --calls 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _run_mode(mode: str, calls: int) -> dict:
+    from pipecat.audio.turn.smart_turn.local_smart_turn_v3 import LocalSmartTurnAnalyzerV3
+    from pipecat.audio.vad.silero import SileroVADAnalyzer
+    from pipecat.audio.vad.vad_analyzer import VADParams
+
+    import audio_models
+
+    if mode == "shared":
+        start = time.perf_counter()
+        audio_models.preload()
+        preload_ms = (time.perf_counter() - start) * 1000
+
+        def build():
+            return (
+                audio_models.vad_analyzer(VADParams(stop_secs=0.2)),
+                audio_models.smart_turn_analyzer(),
+                audio_models.vad_analyzer(),
+            )
+    else:
+        preload_ms = 0.0
+
+        def build():
+            return (
+                SileroVADAnalyzer(params=VADParams(stop_secs=0.2)),
+                LocalSmartTurnAnalyzerV3(),
+                SileroVADAnalyzer(),
+            )
+
+    baseline = _rss_mb()
+    held, setup_ms = [], []
+    for _ in range(calls):
+        start = time.perf_counter()
+        held.append(build())
+        setup_ms.append((time.perf_counter() - start) * 1000)
+    return {
+        "preload_ms": preload_ms,
+        "setup_ms_p50": statistics.median(setup_ms),
+        "setup_ms_max": max(setup_ms),
+        "rss_mb_per_call": (_rss_mb() - baseline) / calls,
+        "rss_mb_total": _rss_mb(),
+    }
+
+
+def main(calls: int) -> None:
+    print(f"{calls} concurrent calls")
+    for mode in ("fresh", "shared"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.call_setup", "--mode", mode, "--calls", str(calls)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"  {mode:<7} preload={r['preload_ms']:7.1f}ms  setup/call p50={r['setup_ms_p50']:7.1f}ms"
+            f"  max={r['setup_ms_max']:7.1f}ms  RSS/call={r['rss_mb_per_call']:6.1f}MB"
+            f"  RSS total={r['rss_mb_total']:6.0f}MB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--mode", choices=["fresh", "shared"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        print(json.dumps(_run_mode(args.mode, args.calls)))
+    else:
+        main(args.calls)
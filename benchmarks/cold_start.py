@@ -0,0 +1,101 @@
+"""Cold-start cost of bot.py: import time per module and time-to-ready per transport.
+
+Every measurement runs in a fresh interpreter, like a scale-to-zero worker. "Ready"
+means bot.py is imported, the modules the selected transport branch needs are
+imported, and the shared VAD/smart-turn models are loaded, i.e. the worker can take
+its first call.
+
+    uv run python -m benchmarks.cold_start --runs 3 --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# The modules each transport branch in bot.bot() / create_transport() pulls in.
+TRANSPORT_MODULES = {
+    "twilio": ["pipecat.serializers.twilio", "pipecat.transports.websocket.fastapi"],
+    "daily": ["pipecat.transports.daily.transport"],
+    "webrtc": ["pipecat.transports.smallwebrtc.transport"],
+}
+
+_READY_SCRIPT = """
+import importlib, sys, time
+start = time.perf_counter()
+import bot
+imported = time.perf_counter()
+loaded = len(sys.modules)
+for name in {modules!r}:
+    importlib.import_module(name)
+import audio_models
+audio_models.preload()
+ready = time.perf_counter()
+print((imported - start) * 1000, (ready - start) * 1000, loaded)
+"""
+
+_ENV_DEFAULTS = {
+    "SUPABASE_URL": "http://127.0.0.1",
+    "SUPABASE_API_KEY": "benchmark",
+    "ANTHROPIC_API_KEY": "benchmark",
+    "CARTESIA_API_KEY": "benchmark",
+    "ENABLE_TRACING": "",
+}
+
+
+def _env() -> dict[str, str]:
+    return {**_ENV_DEFAULTS, **os.environ}
+
+
+def import_times(top: int) -> list[tuple[str, float]]:
+    """Cumulative import time of each module bot.py imports directly (plus bot itself)."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import bot"],
+        capture_output=True,
+        text=True,
+        env=_env(),
+    )
+    totals: dict[str, float] = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, column = line.partition(":")[2].split("|")
+        # The module column is indented two spaces per nesting level under its importer.
+        depth = (len(column) - len(column.lstrip()) - 1) // 2
+        name = column.strip()
+        if depth == 1 or name == "bot":
+            totals[name] = int(cumulative_us) / 1000
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]
+
+
+def time_to_ready(transport: str) -> tuple[float, float, int]:
+    script = _READY_SCRIPT.format(modules=TRANSPORT_MODULES[transport])
+    out = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, env=_env(), check=True
+    )
+    imported, ready, loaded = out.stdout.strip().splitlines()[-1].split()
+    return float(imported), float(ready), int(loaded)
+
+
+def main(runs: int, top: int) -> None:
+    print(f"Top {top} modules by cumulative import time (import bot):")
+    for name, ms in import_times(top):
+        print(f"  {ms:8.1f}ms  {name}")
+    print(f"\nTime to ready per transport (median of {runs} cold starts):")
+    for transport in TRANSPORT_MODULES:
+        samples = [time_to_ready(transport) for _ in range(runs)]
+        imported = statistics.median(s[0] for s in samples)
+        ready = statistics.median(s[1] for s in samples)
+        print(
+            f"  {transport:<7} import bot={imported:7.0f}ms  ready={ready:7.0f}ms"
+            f"  modules after import bot={samples[0][2]}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    main(args.runs, args.top)
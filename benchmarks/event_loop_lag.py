@@ -0,0 +1,85 @@
+"""Event-loop lag under N concurrent tool invocations, blocking db vs db_async.
+
+Each simulated tool invocation does the three reads behind get_group_info against a
+local PostgREST stand-in. A ticker coroutine measures how late the loop wakes it up,
+which is the jitter a concurrent call's audio pipeline would see.
+
+    uv run python -m benchmarks.event_loop_lag --calls 1 4 16 --delay 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_API_KEY", "benchmark")
+
+import db  # noqa: E402
+import db_async  # noqa: E402
+from benchmarks.fake_postgrest import FakePostgrest  # noqa: E402
+
+GROUP_ID = "aaaaaaaa-0001-4000-a000-000000000001"
+TICK = 0.005
+
+
+async def _tool_blocking() -> None:
+    db.list_members(GROUP_ID)
+    db.list_festivals(GROUP_ID)
+    db.get_recent_calls(GROUP_ID, limit=3)
+
+
+async def _tool_async() -> None:
+    await db_async.list_members(GROUP_ID)
+    await db_async.list_festivals(GROUP_ID)
+    await db_async.get_recent_calls(GROUP_ID, limit=3)
+
+
+async def _measure(tool, calls: int) -> tuple[list[float], float]:
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    await asyncio.gather(*(tool() for _ in range(calls)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker_task
+    return lags, elapsed
+
+
+def _report(label: str, lags: list[float], elapsed: float) -> None:
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p95 = lags_ms[int(len(lags_ms) * 0.95) - 1] if len(lags_ms) > 1 else lags_ms[0]
+    print(
+        f"  {label:<9} wall={elapsed * 1000:8.1f}ms  lag p50={statistics.median(lags_ms):7.1f}ms"
+        f"  p95={p95:7.1f}ms  max={lags_ms[-1]:7.1f}ms"
+    )
+
+
+async def main(calls: list[int], delay: float) -> None:
+    with FakePostgrest(delay=delay) as server:
+        db.SUPABASE_URL = server.url
+        db.get_client()
+        print(f"PostgREST stand-in at {server.url}, {delay * 1000:.0f}ms per request")
+        for n in calls:
+            print(f"{n} concurrent tool invocations:")
+            _report("blocking", *await _measure(_tool_blocking, n))
+            _report("db_async", *await _measure(_tool_async, n))
+    db_async.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument("--calls", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds per PostgREST request")
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.delay))
@@ -0,0 +1,218 @@
+"""In-memory stand-in for Supabase's PostgREST API, for local benchmarks.
+
+Serves /rest/v1/<table> and /rest/v1/rpc/<fn> from a dict of tables (and optional
+Python stand-ins for Postgres functions) on a background thread, adding a fixed delay
+to every request to mimic a network round trip. Only the subset of PostgREST used by
+db.py and backend/ is supported: eq/gt/gte/lt/lte/in/is.null filters (plain, or in
+or=(...) with nested and()), order, limit, column lists and one-level embeds in
+select, insert (single or bulk), update and delete.
+"""
+
+import asyncio
+import re
+import threading
+import uuid
+from typing import Any, Callable
+
+from aiohttp import web
+
+
+class FakePostgrest:
+    def __init__(
+        self,
+        delay: float = 0.02,
+        tables: dict[str, list[dict]] | None = None,
+        rpcs: dict[str, Callable[[dict, dict[str, list[dict]]], Any]] | None = None,
+    ):
+        self.delay = delay
+        self.tables: dict[str, list[dict]] = tables or {}
+        # rpc name -> handler(args, tables) returning the JSON response body
+        self.rpcs = rpcs or {}
+        self.requests = 0
+        self.port = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._runner: web.AppRunner | None = None
+        self._thread: threading.Thread | None = None
+        self._started = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "FakePostgrest":
+        self._thread = threading.Thread(target=self._serve, name="fake-postgrest", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()  # type: ignore[union-attr]
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()  # type: ignore[union-attr]
+
+    def __enter__(self) -> "FakePostgrest":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    # --- Server ---
+
+    def _serve(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        app.router.add_route("*", "/rest/v1/rpc/{fn}", self._rpc)
+        app.router.add_route("*", "/rest/v1/{table}", self._table)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        self._started.set()
+        self._loop.run_forever()
+
+    def _filter(self, rows: list[dict], query: Any) -> list[dict]:
+        for key, value in query.items():
+            if key in ("select", "order", "limit", "offset", "columns", "on_conflict"):
+                continue
+            if key == "or":
+                rows = [r for r in rows if any(_match(r, c) for c in _split(value[1:-1]))]
+            else:
+                rows = [r for r in rows if _match(r, f"{key}.{value}")]
+        for term in reversed(query.get("order", "").split(",") if "order" in query else []):
+            column, _, direction = term.partition(".")
+            desc = direction.startswith("desc")
+            nulls_first = "nullsfirst" in direction or (desc and "nullslast" not in direction)
+            present = [r for r in rows if r.get(column) is not None]
+            present.sort(key=lambda r: r[column], reverse=desc)
+            nulls = [r for r in rows if r.get(column) is None]
+            rows = nulls + present if nulls_first else present + nulls
+        if "limit" in query:
+            rows = rows[: int(query["limit"])]
+        return rows
+
+    def _project(self, table: str, rows: list[dict], select: str | None) -> list[dict]:
+        """Apply a select list: plain columns, "*", and one-level embeds like artists(*),
+        joined on <table without the s>_id."""
+        items = _split(select) if select else ["*"]
+        names = [i for i in items if "(" not in i]
+        embeds = [i.partition("(")[0] for i in items if "(" in i]
+        foreign_key = table.removesuffix("s") + "_id"
+        out = []
+        for r in rows:
+            row = dict(r) if "*" in names else {k: r.get(k) for k in names}
+            for child in embeds:
+                row[child] = [c for c in self.tables.get(child, []) if c.get(foreign_key) == r["id"]]
+            out.append(row)
+        return out
+
+    async def _table(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        table = request.match_info["table"]
+        rows = self.tables.setdefault(table, [])
+        if request.method == "GET":
+            rows = self._filter(rows, request.query)
+            return web.json_response(self._project(table, rows, request.query.get("select")))
+        if request.method == "POST":
+            body = await request.json()
+            new_rows = [{"id": str(uuid.uuid4()), **r} for r in (body if isinstance(body, list) else [body])]
+            rows.extend(new_rows)
+            return web.json_response(new_rows, status=201)
+        matched = self._filter(rows, request.query)
+        if request.method == "PATCH":
+            body = await request.json()
+            for r in matched:
+                r.update(body)
+        elif request.method == "DELETE":
+            for r in matched:
+                rows.remove(r)
+        return web.json_response(matched)
+
+    async def _rpc(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        handler = self.rpcs.get(request.match_info["fn"])
+        if handler is None:
+            return web.json_response([])
+        args = await request.json() if request.can_read_body else {}
+        return web.json_response(handler(args, self.tables))
+
+
+def group_snapshot(args: dict, tables: dict[str, list[dict]]) -> dict:
+    """Stand-in for the get_group_snapshot Postgres function (migration 004)."""
+    group_id = args["target_group_id"]
+    calls = sorted(
+        (c for c in tables.get("calls", []) if c["group_id"] == group_id),
+        key=lambda c: c.get("started_at") or "",
+        reverse=True,
+    )[: args.get("calls_limit", 3)]
+    return {
+        "group": next((g for g in tables["groups"] if g["id"] == group_id), None),
+        "members": [m for m in tables.get("members", []) if m["group_id"] == group_id],
+        "festivals": [
+            {**f, "artists": [a for a in tables.get("artists", []) if a["festival_id"] == f["id"]]}
+            for f in tables.get("festivals", [])
+            if f["group_id"] == group_id
+        ],
+        "recent_calls": [{k: v for k, v in c.items() if k != "transcript"} for c in calls],
+    }
+
+
+# --- Filter expressions ---
+
+
+def _split(expr: str) -> list[str]:
+    """Split a PostgREST logic expression at top-level commas."""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(expr):
+        if ch == '"' and expr[i - 1 : i] != "\\":
+            quoted = not quoted
+        elif not quoted and ch in "()":
+            depth += 1 if ch == "(" else -1
+        elif not quoted and ch == "," and depth == 0:
+            parts.append(expr[start:i])
+            start = i + 1
+    parts.append(expr[start:])
+    return parts
+
+
+def _operand(raw: str) -> str:
+    if raw.startswith('"') and raw.endswith('"'):
+        return re.sub(r"\\(.)", r"\1", raw[1:-1])
+    return raw
+
+
+def _match(row: dict, condition: str) -> bool:
+    """Whether row satisfies one condition: "col.op.value", "not.…", "and(…)" or "or(…)"."""
+    if condition.startswith(("and(", "or(")):
+        logic, _, rest = condition.partition("(")
+        parts = [_match(row, c) for c in _split(rest[:-1])]
+        return all(parts) if logic == "and" else any(parts)
+    column, _, rest = condition.partition(".")
+    negate = rest.startswith("not.")
+    op, _, raw = rest.removeprefix("not.").partition(".")
+    value, operand = row.get(column), _operand(raw)
+    if op == "is":
+        result = value is None if operand == "null" else str(value).lower() == operand
+    elif value is None:
+        result = False
+    elif op == "in":
+        result = str(value) in [_operand(v) for v in _split(raw[1:-1])]
+    else:
+        # Numbers compare as numbers, anything else as text.
+        numeric = isinstance(value, (int, float))
+        left: Any = value if numeric else str(value)
+        right: Any = float(operand) if numeric else operand
+        result = {
+            "eq": left == right,
+            "neq": left != right,
+            "gt": left > right,
+            "gte": left >= right,
+            "lt": left < right,
+            "lte": left <= right,
+        }.get(op, True)
+    return result != negate
@@ -0,0 +1,106 @@
+"""Group page load: the frontend's three-request fan-out vs GET /groups/{id}/overview.
+
+Serves backend/ with uvicorn against a local PostgREST stand-in, as backend_load does,
+and has a number of concurrent "browsers" load the group page over and over: either
+/groups/{id}, /groups/{id}/members and /groups/{id}/festivals in parallel (the page
+before the overview endpoint), or the one overview request. The response cache is off
+by default (--cache-ttl 0), so every page load reaches PostgREST.
+
+    uv run python -m benchmarks.group_overview --delay 0.02 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import time
+import uuid
+
+import aiohttp
+
+from benchmarks.backend_load import GROUP_ID, _backend_copy, _seed, _start_server
+from benchmarks.fake_postgrest import FakePostgrest, group_snapshot
+
+FAN_OUT = [f"/groups/{GROUP_ID}", f"/groups/{GROUP_ID}/members", f"/groups/{GROUP_ID}/festivals"]
+OVERVIEW = [f"/groups/{GROUP_ID}/overview"]
+
+
+def _tables() -> dict[str, list[dict]]:
+    tables = _seed()
+    tables["artists"] = [
+        {"id": str(uuid.uuid4()), "festival_id": f["id"], "name": f"Artist {j}"}
+        for f in tables["festivals"]
+        for j in range(20)
+    ]
+    return tables
+
+
+async def _page_loads(
+    session: aiohttp.ClientSession, base_url: str, paths: list[str], concurrency: int, seconds: float
+) -> tuple[list[float], int, int]:
+    latencies: list[float] = []
+    size = errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def fetch(path: str) -> int:
+        nonlocal errors
+        async with session.get(base_url + path) as response:
+            body = await response.read()
+            if response.status != 200:
+                errors += 1
+            return len(body)
+
+    async def browser() -> None:
+        nonlocal size
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            sizes = await asyncio.gather(*(fetch(p) for p in paths))
+            latencies.append(time.perf_counter() - start)
+            size = sum(sizes)
+
+    await asyncio.gather(*(browser() for _ in range(concurrency)))
+    return latencies, size, errors
+
+
+async def main(delay: float, concurrency: int, seconds: float, cache_ttl: float) -> None:
+    os.environ["BACKEND_CACHE_TTL"] = str(cache_ttl)
+    rpcs = {"get_group_snapshot": group_snapshot}
+    with FakePostgrest(delay=delay, tables=_tables(), rpcs=rpcs) as fake:
+        root = _backend_copy(None)
+        server, base_url = await _start_server(root, fake.url)
+        print(
+            f"PostgREST stand-in, {delay * 1000:.0f}ms per request; {concurrency} concurrent "
+            f"browsers, {seconds:.0f}s each; response cache TTL {cache_ttl:g}s"
+        )
+        try:
+            connector = aiohttp.TCPConnector(limit=concurrency * len(FAN_OUT))
+            async with aiohttp.ClientSession(connector=connector) as session:
+                for label, paths in (("fan-out (3 requests)", FAN_OUT), ("overview", OVERVIEW)):
+                    before = fake.requests
+                    start = time.perf_counter()
+                    latencies, size, errors = await _page_loads(
+                        session, base_url, paths, concurrency, seconds
+                    )
+                    elapsed = time.perf_counter() - start
+                    q = statistics.quantiles(latencies, n=100)
+                    print(
+                        f"  {label:<22} {len(latencies) / elapsed:6.0f} pages/s"
+                        f"  p50={q[49] * 1000:6.1f}ms  p99={q[98] * 1000:6.1f}ms"
+                        f"  PostgREST requests/page={(fake.requests - before) / len(latencies):.2f}"
+                        f"  bytes/page={size}  errors={errors}"
+                    )
+        finally:
+            server.terminate()
+            server.wait()
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument("--delay", type=float, default=0.02, help="seconds per PostgREST request")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5, help="load time per variant")
+    parser.add_argument("--cache-ttl", type=float, default=0, help="BACKEND_CACHE_TTL for the server")
+    args = parser.parse_args()
+    asyncio.run(main(args.delay, args.concurrency, args.seconds, args.cache_ttl))
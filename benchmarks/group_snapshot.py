@@ -0,0 +1,124 @@
+"""get_group_info latency: three sequential PostgREST reads vs the get_group_snapshot RPC.
+
+Runs the real get_group_info tool (snapshot path) and the previous three-call path
+against a local PostgREST stand-in seeded with one group.
+
+    uv run python -m benchmarks.group_snapshot --delay 0.03 --iterations 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_API_KEY", "benchmark")
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+
+import db  # noqa: E402
+import db_async  # noqa: E402
+from benchmarks.fake_postgrest import FakePostgrest, group_snapshot  # noqa: E402
+from tools import create_tools  # noqa: E402
+
+GROUP_ID = "aaaaaaaa-0001-4000-a000-000000000001"
+
+
+def _seed(members: int, festivals: int, artists: int) -> dict[str, list[dict]]:
+    tables: dict[str, list[dict]] = {
+        "groups": [{"id": GROUP_ID, "name": "Bay Area Bassheads"}],
+        "members": [
+            {"id": str(uuid.uuid4()), "group_id": GROUP_ID, "name": f"Member {i}", "city": "SF"}
+            for i in range(members)
+        ],
+        "festivals": [],
+        "artists": [],
+        "calls": [
+            {
+                "id": str(uuid.uuid4()),
+                "group_id": GROUP_ID,
+                "started_at": f"2026-01-{i + 1:02d}T00:00:00Z",
+                "summary": f"Call {i}",
+                "transcript": [{"role": "user", "content": "x" * 200}] * 50,
+            }
+            for i in range(10)
+        ],
+    }
+    for i in range(festivals):
+        festival_id = str(uuid.uuid4())
+        tables["festivals"].append({"id": festival_id, "group_id": GROUP_ID, "name": f"Fest {i}"})
+        tables["artists"].extend(
+            {"id": str(uuid.uuid4()), "festival_id": festival_id, "name": f"Artist {j}"}
+            for j in range(artists)
+        )
+    return tables
+
+
+class _ToolRegistry:
+    """Collects the tool functions create_tools registers with the LLM service."""
+
+    def __init__(self):
+        self.functions = {}
+
+    def register_direct_function(self, fn) -> None:
+        self.functions[fn.__name__] = fn
+
+
+class _Params:
+    async def result_callback(self, result) -> None:
+        self.result = result
+
+
+async def _three_calls() -> None:
+    await db_async.list_members(GROUP_ID)
+    await db_async.list_festivals(GROUP_ID)
+    await db_async.get_recent_calls(GROUP_ID, limit=3)
+
+
+async def _time(fn, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float], requests: int) -> None:
+    samples.sort()
+    print(
+        f"  {label:<12} p50={statistics.median(samples):7.1f}ms"
+        f"  p95={samples[int(len(samples) * 0.95) - 1]:7.1f}ms  round trips/call={requests}"
+    )
+
+
+async def main(delay: float, iterations: int) -> None:
+    tables = _seed(members=8, festivals=5, artists=20)
+    with FakePostgrest(delay=delay, tables=tables, rpcs={"get_group_snapshot": group_snapshot}) as server:
+        db.SUPABASE_URL = server.url
+        session_state = {"group_id": GROUP_ID, "call_id": None}
+        registry = _ToolRegistry()
+        create_tools(session_state, llm=registry)
+        get_group_info = registry.functions["get_group_info"]
+
+        async def snapshot_tool() -> None:
+            session_state.pop("group_info", None)
+            await get_group_info(_Params())
+
+        print(f"PostgREST stand-in, {delay * 1000:.0f}ms per request, {iterations} iterations")
+        before = server.requests
+        three = await _time(_three_calls, iterations)
+        _report("three calls", three, (server.requests - before) // iterations)
+        before = server.requests
+        snap = await _time(snapshot_tool, iterations)
+        _report("snapshot", snap, (server.requests - before) // iterations)
+    db_async.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument("--delay", type=float, default=0.03, help="seconds per PostgREST request")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.delay, args.iterations))
@@ -0,0 +1,463 @@
+"""Offline end-to-end turn latency: the real bot pipeline with local stand-ins.
+
+Builds the same pipeline as bot.run_bot (bot.create_call_task: context aggregators,
+tools, filler handling, transcript writer, observers) around local stand-ins:
+
+- scripted STT that emits each recorded user utterance as a finished user turn,
+- a scripted LLM that replays the recorded responses and tool calls after a
+  configurable delay (0 by default, so only our own code is measured),
+- a null TTS that turns text into silence,
+- an in-memory PostgREST stand-in (benchmarks/fake_postgrest.py), so tools run the
+  real db.py / db_async code paths against in-memory tables.
+
+Per transcript it reports:
+
+- first audio: user stops speaking -> first audio reaches the transport (often a filler)
+- response: user stops speaking -> first audio of the turn's final answer
+- tool round trip: LLM emits tool calls -> next LLM request, and time inside each tool
+- frames pushed and event-loop CPU time per turn
+
+Transcripts are scripted JSON (benchmarks/transcripts/*.json, with tool calls) or
+JSONL files written by transcript.py (text only). With --max-response-p95-ms the exit
+status is non-zero when the response p95 exceeds the budget, for use in CI.
+
+    uv run python -m benchmarks.turn_latency
+    uv run python -m benchmarks.turn_latency --llm-delay 0.3 --repeat 5 --max-response-p95-ms 150
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+
+_tmp = tempfile.mkdtemp(prefix="turn-latency-")
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_API_KEY", "benchmark")
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+os.environ.setdefault("CARTESIA_API_KEY", "benchmark")
+os.environ["JOBS_DB_PATH"] = os.path.join(_tmp, "jobs.sqlite3")
+os.environ["TRANSCRIPT_DIR"] = _tmp
+os.environ["AUDIO_CACHE_DIR"] = _tmp
+# Summaries need the live LLM; keep the rolling summarizer from calling it mid-call.
+os.environ["SUMMARY_EVERY_TURNS"] = "1000000"
+
+from loguru import logger  # noqa: E402
+from pipecat.frames.frames import (  # noqa: E402
+    BotStartedSpeakingFrame,
+    BotStoppedSpeakingFrame,
+    Frame,
+    FunctionCallFromLLM,
+    LLMContextFrame,
+    LLMFullResponseEndFrame,
+    LLMFullResponseStartFrame,
+    LLMTextFrame,
+    OutputAudioRawFrame,
+    StartFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.observers.base_observer import BaseObserver, FramePushed  # noqa: E402
+from pipecat.pipeline.runner import PipelineRunner  # noqa: E402
+from pipecat.processors.aggregators.llm_response_universal import (  # noqa: E402
+    LLMUserAggregatorParams,
+)
+from pipecat.processors.frame_processor import FrameDirection  # noqa: E402
+from pipecat.services.llm_service import LLMService  # noqa: E402
+from pipecat.services.stt_service import STTService  # noqa: E402
+from pipecat.services.tts_service import TTSService  # noqa: E402
+from pipecat.transports.base_input import BaseInputTransport  # noqa: E402
+from pipecat.transports.base_output import BaseOutputTransport  # noqa: E402
+from pipecat.transports.base_transport import BaseTransport, TransportParams  # noqa: E402
+from pipecat.turns.user_turn_strategies import ExternalUserTurnStrategies  # noqa: E402
+from pipecat.utils.time import time_now_iso8601  # noqa: E402
+
+import audio_cache  # noqa: E402
+import bot  # noqa: E402
+import clients  # noqa: E402
+import db  # noqa: E402
+import db_async  # noqa: E402
+import jobs  # noqa: E402
+import latency  # noqa: E402
+from benchmarks.fake_postgrest import FakePostgrest, group_snapshot  # noqa: E402
+
+TRANSCRIPTS_DIR = Path(__file__).parent / "transcripts"
+SAMPLE_RATE = 16000
+TURN_TIMEOUT = 30.0
+# Lets the user aggregator take in the transcription before the user "stops speaking".
+TRANSCRIPT_SETTLE_SECS = 0.005
+
+GROUP_ID = "aaaaaaaa-0001-4000-a000-000000000001"
+CALLER_PHONE = "+15551234567"
+
+
+def _seed() -> dict[str, list[dict]]:
+    """One group with a known caller, a few members, festivals and past calls."""
+    festivals = [
+        {"id": str(uuid.uuid4()), "group_id": GROUP_ID, "name": name, "status": "considering"}
+        for name in ("Outside Lands 2026", "Portola 2026")
+    ]
+    return {
+        "groups": [{"id": GROUP_ID, "name": "Bay Area Bassheads"}],
+        "members": [
+            {
+                "id": str(uuid.uuid4()),
+                "group_id": GROUP_ID,
+                "name": name,
+                "city": city,
+                "phone": phone,
+                "groups": {"id": GROUP_ID, "name": "Bay Area Bassheads"},
+            }
+            for name, city, phone in (
+                ("Sam", "Oakland, CA", CALLER_PHONE),
+                ("Priya", "San Jose, CA", None),
+                ("Marcus", "Berkeley, CA", None),
+            )
+        ],
+        "festivals": festivals,
+        "artists": [
+            {"id": str(uuid.uuid4()), "festival_id": f["id"], "name": f"Artist {i}"}
+            for f in festivals
+            for i in range(10)
+        ],
+        "calls": [
+            {
+                "id": str(uuid.uuid4()),
+                "group_id": GROUP_ID,
+                "started_at": f"2026-0{i + 1}-01T00:00:00Z",
+                "summary": f"Call {i}: compared Outside Lands and Portola.",
+            }
+            for i in range(3)
+        ],
+    }
+
+
+def load_script(path: str) -> dict:
+    """A scripted .json transcript as-is, or a recorded .jsonl transcript as text-only turns."""
+    if path.endswith(".json"):
+        with open(path) as f:
+            return json.load(f)
+    from transcript import read_transcript
+
+    script: dict = {"description": os.path.basename(path), "caller": None, "turns": []}
+    greeting: list[dict] = []
+    for entry in read_transcript(path):
+        if entry["role"] == "user":
+            script["turns"].append({"user": entry["content"], "llm": []})
+        elif script["turns"]:
+            script["turns"][-1]["llm"].append({"text": entry["content"]})
+        else:
+            greeting.append({"text": entry["content"]})
+    script["greeting"] = greeting
+    script["turns"] = [t for t in script["turns"] if t["llm"]]
+    return script
+
+
+# --- Stand-in services ---
+
+
+class ScriptedSTT(STTService):
+    """Emits recorded user utterances as complete user turns."""
+
+    # pipecat declares run_stt/run_tts as coroutines returning generators; its own
+    # services, like these, implement them as async generators.
+    async def run_stt(self, audio: bytes):  # type: ignore[override]
+        return
+        yield
+
+    async def say(self, text: str) -> float:
+        """Speak one utterance. Returns the moment the user "stopped speaking"."""
+        await self.push_frame(UserStartedSpeakingFrame())
+        await self.push_frame(TranscriptionFrame(text, "caller", time_now_iso8601(), finalized=True))
+        await asyncio.sleep(TRANSCRIPT_SETTLE_SECS)
+        start = time.perf_counter()
+        await self.push_frame(UserStoppedSpeakingFrame())
+        return start
+
+
+class ScriptedLLM(LLMService):
+    """Replays scripted responses: one step ({"text"} and/or {"tools"}) per LLM request."""
+
+    def __init__(self, delay: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.idle = asyncio.Event()
+        self.final_text_at = 0.0
+        self.tool_round_trips: list[float] = []
+        self._steps: deque[dict] = deque()
+        self._tools_started_at: float | None = None
+
+    def script(self, steps: list[dict]) -> None:
+        self._steps.extend(steps)
+        self.idle.clear()
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, LLMContextFrame):
+            await self._respond(frame.context)
+        else:
+            await self.push_frame(frame, direction)
+
+    async def _respond(self, context) -> None:
+        if self._tools_started_at is not None:
+            self.tool_round_trips.append((time.perf_counter() - self._tools_started_at) * 1000)
+            self._tools_started_at = None
+        if not self._steps:
+            logger.debug("Scripted LLM has no step for this request")
+            return
+        step = self._steps.popleft()
+        await self.push_frame(LLMFullResponseStartFrame())
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if step.get("text"):
+            if not self._steps:
+                self.final_text_at = time.perf_counter()
+            for word in re.findall(r"\S+\s*", step["text"]):
+                await self.push_frame(LLMTextFrame(word))
+        calls = [
+            FunctionCallFromLLM(
+                function_name=call["name"],
+                tool_call_id=str(uuid.uuid4()),
+                arguments=call.get("arguments", {}),
+                context=context,
+            )
+            for call in step.get("tools", [])
+        ]
+        if calls:
+            self._tools_started_at = time.perf_counter()
+            await self.run_function_calls(calls)
+        await self.push_frame(LLMFullResponseEndFrame())
+        if not self._steps:
+            self.idle.set()
+
+
+class NullTTS(TTSService):
+    """Turns text into silence (SECS_PER_WORD per word) with no synthesis cost."""
+
+    SECS_PER_WORD = 0.3
+
+    def __init__(self, **kwargs):
+        super().__init__(sample_rate=SAMPLE_RATE, **kwargs)
+
+    def can_generate_metrics(self) -> bool:
+        return True
+
+    async def run_tts(self, text: str):  # type: ignore[override]
+        samples = int(SAMPLE_RATE * self.SECS_PER_WORD * max(len(text.split()), 1))
+        yield TTSStartedFrame()
+        yield TTSAudioRawFrame(audio=b"\x00" * samples * 2, sample_rate=SAMPLE_RATE, num_channels=1)
+        yield TTSStoppedFrame()
+
+
+class _Input(BaseInputTransport):
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        await self.set_transport_ready(frame)
+
+
+class _Output(BaseOutputTransport):
+    """Plays audio instantly and records when each chunk would have been heard."""
+
+    def __init__(self, params: TransportParams):
+        super().__init__(params)
+        self.audio_times: list[float] = []
+        self.speaking = False
+        self.ready = asyncio.Event()
+
+    async def start(self, frame: StartFrame):
+        await super().start(frame)
+        await self.set_transport_ready(frame)
+        self.ready.set()
+
+    async def write_audio_frame(self, frame: OutputAudioRawFrame) -> bool:
+        self.audio_times.append(time.perf_counter())
+        return True
+
+    async def push_frame(self, frame: Frame, direction: FrameDirection = FrameDirection.DOWNSTREAM):
+        if isinstance(frame, BotStartedSpeakingFrame):
+            self.speaking = True
+        elif isinstance(frame, BotStoppedSpeakingFrame):
+            self.speaking = False
+        await super().push_frame(frame, direction)
+
+    def first_audio_after(self, t: float) -> float | None:
+        return next((a for a in self.audio_times if a >= t), None)
+
+
+class LocalTransport(BaseTransport):
+    def __init__(self):
+        super().__init__()
+        params = TransportParams(audio_out_enabled=True, audio_out_sample_rate=SAMPLE_RATE)
+        self._input = _Input(params)
+        self._output = _Output(params)
+        self._register_event_handler("on_client_connected")
+        self._register_event_handler("on_client_disconnected")
+
+    def input(self) -> _Input:
+        return self._input
+
+    def output(self) -> _Output:
+        return self._output
+
+    async def connect(self) -> None:
+        await self._call_event_handler("on_client_connected", None)
+
+    async def disconnect(self) -> None:
+        await self._call_event_handler("on_client_disconnected", None)
+
+
+class FrameCounter(BaseObserver):
+    def __init__(self):
+        super().__init__()
+        self.frames = 0
+
+    async def on_push_frame(self, data: FramePushed):
+        self.frames += 1
+
+
+# --- Replay ---
+
+
+async def _discard_finish_call(payload: dict) -> None:
+    """Post-call summarization needs the live LLM; the benchmark only measures the call."""
+
+
+async def replay(script: dict, llm_delay: float) -> dict:
+    transport = LocalTransport()
+    stt, llm, tts = ScriptedSTT(), ScriptedLLM(delay=llm_delay), NullTTS()
+    counter = FrameCounter()
+    task = bot.create_call_task(
+        transport,
+        stt,
+        llm,
+        tts,
+        caller_info=script.get("caller"),
+        user_params=LLMUserAggregatorParams(user_turn_strategies=ExternalUserTurnStrategies()),
+        observers=[counter],
+    )
+    call_latency = latency.current_call.get()
+    runner = PipelineRunner(handle_sigint=False)
+    run = asyncio.create_task(runner.run(task))
+    await asyncio.wait_for(transport.output().ready.wait(), TURN_TIMEOUT)
+
+    output = transport.output()
+    turns = []
+    exchanges = [(None, script.get("greeting") or [])]
+    exchanges += [(t["user"], t["llm"]) for t in script["turns"]]
+    for user, steps in exchanges:
+        if not steps:
+            continue
+        llm.script(steps)
+        frames, cpu = counter.frames, time.thread_time()
+        if user is None:
+            start = time.perf_counter()
+            await transport.connect()
+        else:
+            start = await stt.say(user)
+        await asyncio.wait_for(llm.idle.wait(), TURN_TIMEOUT)
+        has_answer = bool(steps[-1].get("text"))
+        deadline = time.perf_counter() + TURN_TIMEOUT
+        while has_answer and time.perf_counter() < deadline:
+            if output.first_audio_after(llm.final_text_at) is not None and not output.speaking:
+                break
+            await asyncio.sleep(0.005)
+        first_audio = output.first_audio_after(start)
+        answer_audio = output.first_audio_after(llm.final_text_at) if has_answer else None
+        turns.append(
+            {
+                "first_audio_ms": (first_audio - start) * 1000 if first_audio else None,
+                "response_ms": (answer_audio - start) * 1000 if answer_audio else None,
+                "frames": counter.frames - frames,
+                "cpu_ms": (time.thread_time() - cpu) * 1000,
+            }
+        )
+
+    await transport.disconnect()
+    await asyncio.wait_for(run, TURN_TIMEOUT)
+    return {
+        "turns": turns,
+        "tool_round_trips": llm.tool_round_trips,
+        "operations": call_latency.report() if call_latency else {},
+    }
+
+
+def _p(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def _line(label: str, values: list[float], unit: str = "ms") -> str:
+    if not values:
+        return f"    {label:<16} -"
+    return (
+        f"    {label:<16} p50={_p(values, 0.5):7.1f}{unit}  p95={_p(values, 0.95):7.1f}{unit}"
+        f"  n={len(values)}"
+    )
+
+
+async def main(paths: list[str], llm_delay: float, db_delay: float, repeat: int) -> float:
+    """Replay every transcript and print its report. Returns the worst response p95."""
+    jobs.handler("finish_call")(_discard_finish_call)
+    # Filler audio would be rendered by Cartesia; the null TTS speaks fillers instead.
+    audio_cache.ensure_warm = lambda *args, **kwargs: None
+
+    worst = 0.0
+    with FakePostgrest(delay=db_delay, tables=_seed(), rpcs={"get_group_snapshot": group_snapshot}) as server:
+        db.SUPABASE_URL = server.url
+        print(f"LLM delay {llm_delay * 1000:.0f}ms, DB delay {db_delay * 1000:.0f}ms, x{repeat}\n")
+        for path in paths:
+            script = load_script(path)
+            results = [await replay(script, llm_delay) for _ in range(repeat)]
+            turns = [t for r in results for t in r["turns"]]
+            response = [t["response_ms"] for t in turns if t["response_ms"] is not None]
+            print(f"{os.path.basename(path)}: {script.get('description', '')}")
+            print(_line("first audio", [t["first_audio_ms"] for t in turns if t["first_audio_ms"]]))
+            print(_line("response", response))
+            print(_line("tool round trip", [ms for r in results for ms in r["tool_round_trips"]]))
+            print(_line("frames/turn", [t["frames"] for t in turns], unit=""))
+            print(_line("loop CPU/turn", [t["cpu_ms"] for t in turns]))
+            for name, stats in results[-1]["operations"].items():
+                print(f"      {name:<28} p50={stats['p50_ms']:7.1f}ms  n={stats['count']}")
+            print()
+            if response:
+                worst = max(worst, _p(response, 0.95))
+    await jobs.get_queue().stop()
+    await clients.aclose()
+    db_async.shutdown()
+    return worst
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument(
+        "transcripts",
+        nargs="*",
+        help="scripted .json or recorded .jsonl transcripts (default: benchmarks/transcripts/)",
+    )
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="seconds per LLM request")
+    parser.add_argument("--db-delay", type=float, default=0.0, help="seconds per DB request")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-response-p95-ms", type=float, help="fail if exceeded (CI)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show pipeline logs")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+    paths = args.transcripts or sorted(glob.glob(str(TRANSCRIPTS_DIR / "*.json")))
+    worst = asyncio.run(main(paths, args.llm_delay, args.db_delay, args.repeat))
+    if args.max_response_p95_ms is not None and worst > args.max_response_p95_ms:
+        print(f"FAIL: response p95 {worst:.1f}ms exceeds {args.max_response_p95_ms:.1f}ms")
+        sys.exit(1)
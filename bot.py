@@ -1,16 +1,23 @@
-import json
+import asyncio
+import contextvars
+import functools
 import os
-import tempfile
-from datetime import datetime
-from pathlib import Path
+import random
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import cast
 from dotenv import load_dotenv
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import JSONResponse
 from pipecat.transports.base_transport import BaseTransport, TransportParams
-from pipecat.transports.daily.transport import DailyParams
 from pipecat.runner.types import RunnerArguments
 from pipecat.runner.utils import create_transport, parse_telephony_websocket
+from pipecat.observers.base_observer import BaseObserver
 from pipecat.services.anthropic.llm import AnthropicLLMService
 from pipecat.services.cartesia.stt import CartesiaSTTService
 from pipecat.services.cartesia.tts import CartesiaTTSService
+from pipecat.services.llm_service import LLMService
+from pipecat.services.stt_service import STTService
+from pipecat.services.tts_service import TTSService
 from pipecat.utils.text.markdown_text_filter import MarkdownTextFilter
 
 from pipecat.processors.aggregators.llm_context import LLMContext
@@ -25,8 +32,6 @@ from pipecat.turns.user_stop.turn_analyzer_user_turn_stop_strategy import (
 )
 from pipecat.turns.user_turn_strategies import UserTurnStrategies
 
-from pipecat.audio.turn.smart_turn.local_smart_turn_v3 import LocalSmartTurnAnalyzerV3
-from pipecat.audio.vad.silero import SileroVADAnalyzer
 from pipecat.audio.vad.vad_analyzer import VADParams
 
 from pipecat.pipeline.pipeline import Pipeline
@@ -37,26 +42,53 @@ from pipecat.frames.frames import LLMRunFrame, TTSSpeakFrame
 
 from loguru import logger
 
-from tools import create_tools, get_call_info, summarize_transcript
-import db
-
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from pipecat.utils.tracing.setup import setup_tracing
-from pipecat.serializers.twilio import TwilioFrameSerializer
-from pipecat.transports.websocket.fastapi import (
-    FastAPIWebsocketParams,
-    FastAPIWebsocketTransport,
-)
+from tools import create_tools, get_call_info, prefetch_caller_context, schema_sql
+from write_buffer import WriteBuffer
+import audio_cache
+from call_summary import RollingSummarizer
+import audio_models
+import clients
+import jobs
+import latency
+import metrics
+import phone_index
+import post_call
+import query_cache
+from context_compaction import ContextCompactor
+from transcript import TranscriptWriter
+from llm_usage import CallUsage, UsageObserver, cached_text_block
 
 load_dotenv(override=True)
 
 ANTHROPIC_API_KEY = os.environ["ANTHROPIC_API_KEY"]
 CARTESIA_API_KEY = os.environ["CARTESIA_API_KEY"]
-IS_TRACING_ENABLED = bool(os.environ["ENABLE_TRACING"])
-SCHEMA_SQL = (Path(__file__).parent / "schema.sql").read_text()
 
-# Initialize tracing if enabled
-if IS_TRACING_ENABLED:
+# VOICE_ID = "6ccbfb76-1fc6-48f7-b71d-91ac6298247b"  # Tessa, kind and compassionate
+VOICE_ID = "2ba1dbaa-d52b-4984-8bc5-f877e9b03a02"  # Yichi
+TTS_MODEL = "sonic-3"
+
+# Spoken while tools run; pre-rendered by audio_cache so they play without a TTS round trip.
+FILLER_PHRASES = [
+    "Hold on a sec.",
+    "Let me check on that.",
+    "One moment.",
+    "Looking that up.",
+    "On it.",
+]
+
+
+# Transport- and tracing-specific modules are imported on first use, so a worker only
+# pays for the transport it actually serves (see benchmarks/cold_start.py).
+
+
+@functools.cache
+def init_tracing() -> None:
+    """Initialize OpenTelemetry tracing once per process, if enabled."""
+    if not latency.tracing_enabled():
+        return
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from pipecat.utils.tracing.setup import setup_tracing
+
     # Create the exporter
     otlp_exporter = OTLPSpanExporter()
 
@@ -68,32 +100,94 @@ if IS_TRACING_ENABLED:
     logger.info("OpenTelemetry tracing initialized")
 
 
-async def run_bot(transport: BaseTransport, runner_args: RunnerArguments, caller_info: dict | None = None):
-    logger.info("Starting bot")
+def _daily_params() -> TransportParams:
+    from pipecat.transports.daily.transport import DailyParams
+
+    return DailyParams(
+        audio_in_enabled=True,
+        audio_out_enabled=True,
+    )
+
+
+def _webrtc_params() -> TransportParams:
+    return TransportParams(
+        audio_in_enabled=True,
+        audio_out_enabled=True,
+    )
 
+
+def _twilio_transport(websocket, call_data: dict) -> BaseTransport:
+    from pipecat.serializers.twilio import TwilioFrameSerializer
+    from pipecat.transports.websocket.fastapi import (
+        FastAPIWebsocketParams,
+        FastAPIWebsocketTransport,
+    )
+
+    serializer = TwilioFrameSerializer(
+        stream_sid=call_data["stream_id"],
+        call_sid=call_data["call_id"],
+        account_sid=os.getenv("TWILIO_ACCOUNT_SID", ""),
+        auth_token=os.getenv("TWILIO_AUTH_TOKEN", ""),
+    )
+
+    return FastAPIWebsocketTransport(
+        websocket=websocket,
+        params=FastAPIWebsocketParams(
+            audio_in_enabled=True,
+            audio_out_enabled=True,
+            add_wav_header=False,
+            vad_analyzer=audio_models.vad_analyzer(),
+            serializer=serializer,
+        ),
+    )
+
+
+def create_services() -> tuple[STTService, LLMService, TTSService]:
+    """The speech-to-text, LLM and text-to-speech services for one call."""
     stt = CartesiaSTTService(api_key=CARTESIA_API_KEY)
 
     tts = CartesiaTTSService(
         api_key=CARTESIA_API_KEY,
-        # voice_id="6ccbfb76-1fc6-48f7-b71d-91ac6298247b",  # Tessa, kind and compassionate
-        voice_id="2ba1dbaa-d52b-4984-8bc5-f877e9b03a02", # Yichi
+        voice_id=VOICE_ID,
+        model=TTS_MODEL,
         text_filter=MarkdownTextFilter(),
     )
 
     llm = AnthropicLLMService(
         api_key=ANTHROPIC_API_KEY,
         model="claude-haiku-4-5-20251001",
+        params=AnthropicLLMService.InputParams(enable_prompt_caching=True),
     )
+    return stt, llm, tts
 
-    import random
 
-    _filler_phrases = [
-        "Hold on a sec.",
-        "Let me check on that.",
-        "One moment.",
-        "Looking that up.",
-        "On it.",
-    ]
+def default_user_params() -> LLMUserAggregatorParams:
+    """Turn taking for live audio: Silero VAD plus smart-turn end-of-turn detection."""
+    return LLMUserAggregatorParams(
+        user_turn_strategies=UserTurnStrategies(
+            stop=[TurnAnalyzerUserTurnStopStrategy(turn_analyzer=audio_models.smart_turn_analyzer())]
+        ),
+        vad_analyzer=audio_models.vad_analyzer(VADParams(stop_secs=0.2)),
+    )
+
+
+# Hang-up work of calls whose pipeline has already ended.
+_finishing: set[asyncio.Task] = set()
+
+
+def create_call_task(
+    transport: BaseTransport,
+    stt: STTService,
+    llm: LLMService,
+    tts: TTSService,
+    caller_info: dict | None = None,
+    user_params: LLMUserAggregatorParams | None = None,
+    observers: list[BaseObserver] | None = None,
+) -> PipelineTask:
+    """Build the conversation pipeline for one call and wire up its event handlers.
+
+    run_bot uses the live services; benchmarks/turn_latency.py passes local stand-ins.
+    """
     _user_spoke = False
 
     @llm.event_handler("on_function_calls_started")
@@ -101,22 +195,40 @@ async def run_bot(transport: BaseTransport, runner_args: RunnerArguments, caller
         nonlocal _user_spoke
         if _user_spoke and not any(fc.function_name == "end_call" for fc in function_calls):
             _user_spoke = False
-            await tts.queue_frame(TTSSpeakFrame(random.choice(_filler_phrases)))
+            phrase = random.choice(FILLER_PHRASES)
+            audio = audio_cache.get(phrase, VOICE_ID, tts.sample_rate, tts.model_name)
+            if audio is None:
+                await tts.queue_frame(TTSSpeakFrame(phrase))
+                return
+            for frame in audio_cache.frames(audio, tts.sample_rate):
+                await tts.queue_frame(frame)
 
     # --- Session state & tools ---
-    session_state: dict = {"group_id": None, "call_id": None}
+    session_state: dict = {
+        "group_id": None,
+        "call_id": None,
+        "usage": CallUsage(),
+        "writes": WriteBuffer(),
+    }
+    # Tools, db calls and SQL generation for this call record into its CallLatency; the
+    # pipeline's tasks are created below, so they inherit the contextvar.
+    call_latency = latency.CallLatency()
+    latency.current_call.set(call_latency)
     if caller_info:
         session_state["from_number"] = caller_info.get("from_number")
         session_state["to_number"] = caller_info.get("to_number")
-    transcript_log: list[dict] = []
+    transcript = TranscriptWriter()
+    summarizer = RollingSummarizer()
     tools = create_tools(session_state, llm=llm)
 
     # Context. Should have the phone and the group, for the context.
 
+    # The system prompt is the stable prefix of every request, so it carries a
+    # cache_control breakpoint; enable_prompt_caching marks the growing conversation.
     messages = [
         {
             "role": "system",
-            "content": f"""You are Alex. You're on a voice call helping a group of friends figure out which festivals to go to, buy tickets, and how to get everyone there without it being a logistical nightmare.
+            "content": [cached_text_block(f"""You are Alex. You're on a voice call helping a group of friends figure out which festivals to go to, buy tickets, and how to get everyone there without it being a logistical nightmare.
 
 Talk like an excited friend who loves festivals. Keep it short and hype — you're on a call, not writing an email. Ask one or two things at a time.
 
@@ -124,25 +236,16 @@ Early on, suggest a fun group name and ask if they're into it. Once they confirm
 
 You have access to a query_database tool that can answer any question about the data. Here is the database schema for reference:
 
-{SCHEMA_SQL}""",
-    
+{schema_sql()}""")],
         }
     ]
 
     context = LLMContext(messages, tools=tools)  # type: ignore[arg-type]
+    compactor = ContextCompactor(context, usage=session_state["usage"])
 
     user_aggregator, assistant_aggregator = LLMContextAggregatorPair(
         context,
-        user_params=LLMUserAggregatorParams(
-            user_turn_strategies=UserTurnStrategies(
-                stop=[
-                    TurnAnalyzerUserTurnStopStrategy(
-                        turn_analyzer=LocalSmartTurnAnalyzerV3()
-                    )
-                ]
-            ),
-            vad_analyzer=SileroVADAnalyzer(params=VADParams(stop_secs=0.2)),
-        ),
+        user_params=user_params or default_user_params(),
     )
 
     pipeline = Pipeline(
@@ -151,6 +254,7 @@ You have access to a query_database tool that can answer any question about the
             stt,
             user_aggregator,
             llm,
+            compactor,
             tts,
             transport.output(),
             assistant_aggregator,
@@ -163,7 +267,8 @@ You have access to a query_database tool that can answer any question about the
             enable_metrics=True,
             enable_usage_metrics=True,
         ),
-        enable_tracing=IS_TRACING_ENABLED,
+        enable_tracing=latency.tracing_enabled(),
+        observers=[UsageObserver(llm, session_state["usage"]), *(observers or [])],
     )
 
     # --- Transcript collection via turn events ---
@@ -172,23 +277,23 @@ You have access to a query_database tool that can answer any question about the
     async def on_user_turn_stopped(aggregator, strategy, message: UserTurnStoppedMessage):
         nonlocal _user_spoke
         _user_spoke = True
-        transcript_log.append({
-            "role": "user",
-            "content": message.content,
-            "timestamp": message.timestamp,
-        })
+        turn = {"role": "user", "content": message.content, "timestamp": message.timestamp}
+        transcript.append(turn)
+        summarizer.append(turn)
 
     @assistant_aggregator.event_handler("on_assistant_turn_stopped")
     async def on_assistant_turn_stopped(aggregator, message: AssistantTurnStoppedMessage):
-        transcript_log.append({
-            "role": "assistant",
-            "content": message.content,
-            "timestamp": message.timestamp,
-        })
+        turn = {"role": "assistant", "content": message.content, "timestamp": message.timestamp}
+        transcript.append(turn)
+        summarizer.append(turn)
 
     @transport.event_handler("on_client_connected")
     async def on_client_connected(transport, client):
         logger.info("Client connected")
+        # Before anything can create the call record, so its id always reaches the job.
+        session_state["finish_job"] = await post_call.register_call(transcript.path)
+        prefetch_caller_context(session_state)
+        audio_cache.ensure_warm(FILLER_PHRASES, VOICE_ID, tts.sample_rate, tts.model_name)
 
         if session_state.get("from_number"):
             messages.append(
@@ -203,31 +308,62 @@ You have access to a query_database tool that can answer any question about the
             )
         await task.queue_frames([LLMRunFrame()])
 
+    async def finish_session():
+        """Hang-up work: flush the transcript and the caller's saves, then hand the call
+        to its finish_call job."""
+        transcript_path = await transcript.close()
+        # Everything the caller saved is written before the call is summarized.
+        writes = session_state["writes"]
+        await writes.close()
+        for failure in writes.take_failures():
+            logger.error(f"Unsaved {failure['table']} at hang-up: {failure}")
+
+        rolling_summary = await summarizer.close()
+
+        # Post-call: finish the summary and save transcript + summary to DB in the background
+        await post_call.finish(
+            session_state.get("finish_job"),
+            {
+                "call_id": session_state.get("call_id"),
+                "transcript_path": transcript_path,
+                "latency": call_latency.report(),
+                **rolling_summary,
+            },
+        )
+
+        logger.info(f"Connection stats: {clients.connection_stats()}")
+        logger.info(f"Query cache stats: {query_cache.stats()}")
+        logger.info(f"LLM prompt cache usage: {session_state['usage'].report()}")
+        logger.info(f"Context compaction: {compactor.report()}")
+        logger.info(f"Write buffer: {writes.stats()}")
+        logger.info(
+            f"Rolling summary: {rolling_summary['summarized_turns']} of {transcript.turns} "
+            f"turns summarized during the call, tokens {rolling_summary['summary_tokens']}"
+        )
+        logger.info(f"Post-call queue: {await jobs.get_queue().stats()}")
+        logger.info(f"Call latency: {call_latency.report()}")
+        logger.info(f"Worker latency: {latency.process_report()}")
+
     @transport.event_handler("on_client_disconnected")
     async def on_client_disconnected(transport, client):
         logger.info("Client disconnected")
+        # The pipeline, the transport and the worker's call slot are released first: a
+        # slow write or summary update at hang-up mustn't hold them for a caller who has
+        # gone. The transport waits on this handler before it closes, so the rest runs
+        # in a task of its own; stop_worker waits for it.
+        await task.cancel()
+        finishing = asyncio.create_task(finish_session(), name="finish_session")
+        _finishing.add(finishing)
+        finishing.add_done_callback(_finishing.discard)
 
-        # Save full transcript to temp folder for debugging
-        if transcript_log:
-            tmp_dir = os.path.join(tempfile.gettempdir(), "festival-coordinator")
-            os.makedirs(tmp_dir, exist_ok=True)
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            transcript_path = os.path.join(tmp_dir, f"transcript_{ts}.json")
-            with open(transcript_path, "w") as f:
-                json.dump(transcript_log, f, indent=2, default=str)
-            logger.info(f"Saved transcript to {transcript_path}")
-
-        # Post-call: summarize and save transcript + summary to DB
-        call_id = session_state.get("call_id")
-        if call_id:
-            try:
-                summary = await summarize_transcript(transcript_log)
-                db.end_call_record(call_id, summary, transcript=transcript_log)
-                logger.info(f"Saved call summary for call {call_id}")
-            except Exception as e:
-                logger.error(f"Failed to save call summary: {e}")
+    return task
 
-        await task.cancel()
+
+async def run_bot(transport: BaseTransport, runner_args: RunnerArguments, caller_info: dict | None = None):
+    logger.info("Starting bot")
+
+    stt, llm, tts = create_services()
+    task = create_call_task(transport, stt, llm, tts, caller_info=caller_info)
 
     runner = PipelineRunner(handle_sigint=runner_args.handle_sigint)
 
@@ -238,7 +374,17 @@ async def bot(runner_args: RunnerArguments):
     """Main bot entry point for the bot starter."""
 
     logger.info(f"Runner arguments: {runner_args}")
+    await start_worker()
 
+    # Reported on /worker/load so the supervisor can route calls to the least-loaded worker.
+    metrics.incr("calls.active")
+    try:
+        await _bot(runner_args)
+    finally:
+        metrics.incr("calls.active", -1)
+
+
+async def _bot(runner_args: RunnerArguments):
     caller_info: dict = {}
 
     # For Twilio telephony: parse websocket to extract call data for caller identification
@@ -254,35 +400,12 @@ async def bot(runner_args: RunnerArguments):
                 f"Call from: {caller_info.get('from_number')} to: {caller_info.get('to_number')}"
             )
 
-        serializer = TwilioFrameSerializer(
-            stream_sid=call_data["stream_id"],
-            call_sid=call_data["call_id"],
-            account_sid=os.getenv("TWILIO_ACCOUNT_SID", ""),
-            auth_token=os.getenv("TWILIO_AUTH_TOKEN", ""),
-        )
-
-
-        transport = FastAPIWebsocketTransport(
-            websocket=websocket,
-            params=FastAPIWebsocketParams(
-                audio_in_enabled=True,
-                audio_out_enabled=True,
-                add_wav_header=False,
-                vad_analyzer=SileroVADAnalyzer(),
-                serializer=serializer,
-            ),
-        )
+        transport = _twilio_transport(websocket, call_data)
     else:
         # Non-telephony transports (Daily, WebRTC)
         transport_params = {
-            "daily": lambda: DailyParams(
-                audio_in_enabled=True,
-                audio_out_enabled=True,
-            ),
-            "webrtc": lambda: TransportParams(
-                audio_in_enabled=True,
-                audio_out_enabled=True,
-            ),
+            "daily": _daily_params,
+            "webrtc": _webrtc_params,
         }
 
         transport = await create_transport(runner_args, transport_params)
@@ -290,7 +413,126 @@ async def bot(runner_args: RunnerArguments):
     await run_bot(transport, runner_args, caller_info=caller_info)
 
 
-if __name__ == "__main__":
-    from pipecat.runner.run import main
+# --- Worker startup ---
+
+_worker: AsyncExitStack | None = None
+_worker_lock = asyncio.Lock()
+
+
+async def _start_worker(stack: AsyncExitStack) -> None:
+    init_tracing()
+    await stack.enter_async_context(clients.lifespan())
+    await stack.enter_async_context(jobs.lifespan())
+    await stack.enter_async_context(audio_models.lifespan())
+    await stack.enter_async_context(audio_cache.lifespan(FILLER_PHRASES, VOICE_ID, TTS_MODEL)())
+    await stack.enter_async_context(phone_index.lifespan())
+
+
+async def start_worker() -> None:
+    """Start what every call in this process shares: tracing, pooled clients, the
+    post-call queue, preloaded models, pre-rendered filler audio and the caller phone
+    index. Idempotent. The local runner's server runs it at startup; bot() also calls
+    it, so it happens under any runner (e.g. Pipecat Cloud) before the first call."""
+    global _worker
+    async with _worker_lock:
+        if _worker is not None:
+            return
+        stack = AsyncExitStack()
+        # In an empty context, so the job workers and warm-up tasks started here never
+        # inherit the latency contextvar of the call that happened to start the worker.
+        await asyncio.create_task(_start_worker(stack), context=contextvars.Context())
+        _worker = stack
+
+
+async def stop_worker() -> None:
+    """Finish hang-up work still running, then stop the job workers and close the shared
+    clients."""
+    global _worker
+    if _finishing:
+        # A call cut off here is still saved by its finish_call job at the orphan deadline.
+        await asyncio.wait(_finishing, timeout=30)
+    async with _worker_lock:
+        stack, _worker = _worker, None
+    if stack is not None:
+        await stack.aclose()
+
+
+@asynccontextmanager
+async def worker_lifespan(app=None):
+    """FastAPI-style lifespan around start_worker and stop_worker."""
+    await start_worker()
+    try:
+        yield
+    finally:
+        await stop_worker()
+
+
+# Routes the supervisor calls on every worker, added to the runner's app by main().
+worker_routes = APIRouter(include_in_schema=False)
+
+
+@worker_routes.get("/worker/load")
+async def worker_load():
+    """Active calls and pid of this worker, polled by supervisor.py."""
+    return {"active_calls": int(metrics.get("calls.active")), "pid": os.getpid()}
+
+
+@worker_routes.post("/phone-index/invalidate")
+async def invalidate_phone_index(request: Request):
+    """Called by the backend after it changes a member."""
+    if not phone_index.secret_matches(request.headers.get(phone_index.SECRET_HEADER)):
+        return JSONResponse({"error": "Forbidden"}, status_code=403)
+    phone_index.invalidate()
+    return {"invalidated": True}
+
+
+@worker_routes.post("/query-cache/invalidate")
+async def invalidate_query_cache(request: Request):
+    """Called by the backend after it writes, with {"tables": [...]} it wrote to."""
+    if not phone_index.secret_matches(request.headers.get(phone_index.SECRET_HEADER)):
+        return JSONResponse({"error": "Forbidden"}, status_code=403)
+    try:
+        tables = (await request.json())["tables"]
+    except (ValueError, KeyError, TypeError):
+        tables = None
+    if not isinstance(tables, list) or not all(isinstance(t, str) for t in tables):
+        return JSONResponse({"error": 'Expected {"tables": [<table>, ...]}'}, status_code=400)
+    return {"invalidated": sum(query_cache.invalidate_table(t) for t in tables)}
+
+
+def main() -> None:
+    """Serve calls with pipecat's development runner, starting the worker with its server
+    and adding worker_routes.
+
+    The runner has no public hook for either, so its private app factory is wrapped.
+    pyproject.toml pins pipecat-ai to the version this was checked against, and a
+    runner without the factory stops the worker here instead of serving one the
+    supervisor can't poll.
+    """
+    from pipecat.runner import run
+
+    create_runner_app = getattr(run, "_create_server_app", None)
+    if not callable(create_runner_app):
+        raise RuntimeError(
+            "pipecat.runner.run._create_server_app is gone; update bot.main for this pipecat"
+        )
+
+    def create_app(args) -> FastAPI:
+        app = cast(FastAPI, create_runner_app(args))
+        runner_lifespan = app.router.lifespan_context
+
+        @asynccontextmanager
+        async def lifespan(app):
+            async with runner_lifespan(app), worker_lifespan(app):
+                yield
+
+        app.router.lifespan_context = lifespan
+        app.include_router(worker_routes)
+        return app
 
+    run._create_server_app = create_app
+    run.main()
+
+
+if __name__ == "__main__":
     main()
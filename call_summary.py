@@ -0,0 +1,127 @@
+"""Rolling call summary, kept up to date while the call is still going.
+
+Summarizing the whole transcript after hang-up made cost and latency grow with call
+length, and a long call could run into max_tokens. Instead, RollingSummarizer updates
+the summary in the background every SUMMARY_EVERY_TURNS transcript turns, sending
+Haiku only the turns since the last update together with the previous summary. At
+disconnect the few turns left over go to the finish_call job with the summary so far,
+so the final update is one small request (or none at all).
+
+Input and output tokens of every update, during the call and in the job, are added up
+in one per-call total that finish_call logs.
+"""
+
+import asyncio
+import os
+
+from loguru import logger
+
+import clients
+
+SUMMARY_MODEL = "claude-haiku-4-5-20251001"
+SUMMARY_EVERY_TURNS = int(os.getenv("SUMMARY_EVERY_TURNS", "6"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "1024"))
+
+SUMMARY_PROMPT = """Summarize this voice conversation between a festival planning assistant (Sophie) and the user. Focus on:
+
+- Who is in the group and where they're based
+- Which festivals or artists were discussed
+- Any decisions made (committed, passed, considering)
+- Ticket timing, budget, or logistics discussed
+- Open questions or next steps
+
+Keep it concise (3-8 bullet points). This summary will be used to bring Sophie up to speed on the next call."""
+
+UPDATE_PROMPT = """Below is the summary so far and the next part of the transcript. Reply with the updated summary only, in the same format. Keep everything from the summary so far that still holds, and correct anything the new part changes."""
+
+
+def _render(turns: list[dict]) -> str:
+    lines = []
+    for turn in turns:
+        role = turn.get("role", "unknown")
+        content = turn.get("content", "")
+        if role == "system" or not content:
+            continue
+        speaker = "Sophie" if role == "assistant" else "User"
+        lines.append(f"{speaker}: {content}")
+    return "\n".join(lines)
+
+
+def new_token_count() -> dict[str, int]:
+    return {"requests": 0, "input_tokens": 0, "output_tokens": 0}
+
+
+async def summarize_transcript(
+    turns: list[dict], previous: str | None = None, tokens: dict[str, int] | None = None
+) -> str:
+    """Summarize transcript turns, or fold them into a previous summary.
+
+    Token usage is added to tokens, if given.
+    """
+    transcript = _render(turns)
+    if not transcript.strip():
+        return previous or "No conversation content to summarize."
+
+    if previous:
+        content = (
+            f"{SUMMARY_PROMPT}\n\n{UPDATE_PROMPT}\n\n---\n\nSummary so far:\n{previous}"
+            f"\n\n---\n\nNext part of the transcript:\n{transcript}"
+        )
+    else:
+        content = f"{SUMMARY_PROMPT}\n\n---\n\nTranscript:\n{transcript}"
+
+    client = clients.get_anthropic()
+    response = await client.messages.create(
+        model=SUMMARY_MODEL,
+        max_tokens=SUMMARY_MAX_TOKENS,
+        messages=[{"role": "user", "content": content}],
+    )
+    if tokens is not None:
+        tokens["requests"] += 1
+        tokens["input_tokens"] += response.usage.input_tokens
+        tokens["output_tokens"] += response.usage.output_tokens
+    if response.stop_reason == "max_tokens":
+        logger.warning(f"Call summary hit max_tokens ({SUMMARY_MAX_TOKENS}) and was cut off")
+    return response.content[0].text  # type: ignore[union-attr]
+
+
+class RollingSummarizer:
+    """Folds transcript turns into a running summary as the call goes."""
+
+    def __init__(self, every_turns: int = SUMMARY_EVERY_TURNS):
+        self._every_turns = max(every_turns, 1)
+        self.summary: str | None = None
+        # Turns not yet folded into the summary; dropped once they are.
+        self._pending: list[dict] = []
+        self.summarized_turns = 0
+        self.tokens = new_token_count()
+        self._task: asyncio.Task | None = None
+
+    def append(self, turn: dict) -> None:
+        """Add a transcript turn, starting an update once enough have built up."""
+        self._pending.append(turn)
+        if len(self._pending) >= self._every_turns and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._update())
+
+    async def _update(self) -> None:
+        turns = list(self._pending)
+        try:
+            summary = await summarize_transcript(turns, self.summary, self.tokens)
+        except Exception as e:
+            # The turns stay pending and go into the next update or the final one.
+            logger.warning(f"Rolling summary update failed: {e}")
+            return
+        self.summary = summary
+        del self._pending[: len(turns)]
+        self.summarized_turns += len(turns)
+
+    async def close(self) -> dict:
+        """Let a running update finish, then return what the finish_call job needs:
+        the summary so far, how many transcript turns it covers, and tokens spent."""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+        return {
+            "summary_so_far": self.summary,
+            "summarized_turns": self.summarized_turns,
+            "summary_tokens": self.tokens,
+        }
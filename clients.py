@@ -0,0 +1,186 @@
+"""Process-wide pooled HTTP and LLM clients for tools and post-call work.
+
+Clients are built lazily on first use, once per worker process, and reused by every
+call so SQL generation, summaries and Twilio lookups ride warm keep-alive connections.
+Call aclose() (or use lifespan()) at shutdown. connection_stats() reports how many
+requests reused a pooled connection versus opening a new one.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any
+
+import aiohttp
+import anthropic
+import httpx
+from loguru import logger
+
+import metrics
+
+
+def _setting(name: str, default: str) -> float:
+    """A pool size or timeout from the environment, read when the pool is built: this
+    module is imported before the entry points load .env."""
+    return float(os.getenv(name, default))
+
+
+_anthropic: anthropic.AsyncAnthropic | None = None
+_http_session: aiohttp.ClientSession | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+
+_CLIENT_NAMES = ("anthropic", "http", "supabase")
+
+
+# --- Connection metrics ---
+
+
+def httpx_event_hooks(name: str) -> dict[str, list]:
+    """Event hooks for a sync httpx.Client that count new vs reused connections."""
+
+    def trace(event: str, info: dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            metrics.incr(f"http.{name}.connections_new")
+
+    def on_request(request: httpx.Request) -> None:
+        metrics.incr(f"http.{name}.requests")
+        request.extensions["trace"] = trace
+
+    return {"request": [on_request]}
+
+
+def async_httpx_event_hooks(name: str) -> dict[str, list]:
+    """Event hooks for an httpx.AsyncClient that count new vs reused connections."""
+
+    async def trace(event: str, info: dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            metrics.incr(f"http.{name}.connections_new")
+
+    async def on_request(request: httpx.Request) -> None:
+        metrics.incr(f"http.{name}.requests")
+        request.extensions["trace"] = trace
+
+    return {"request": [on_request]}
+
+
+def _aiohttp_trace_config(name: str) -> aiohttp.TraceConfig:
+    async def on_request_start(session, ctx, params) -> None:
+        metrics.incr(f"http.{name}.requests")
+
+    async def on_connection_create_end(session, ctx, params) -> None:
+        metrics.incr(f"http.{name}.connections_new")
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    return trace_config
+
+
+def connection_stats() -> dict[str, dict[str, float]]:
+    """Requests, new connections and reused connections per pooled client."""
+    stats = {}
+    for name in _CLIENT_NAMES:
+        requests = metrics.get(f"http.{name}.requests")
+        new = metrics.get(f"http.{name}.connections_new")
+        if requests:
+            stats[name] = {
+                "requests": requests,
+                "connections_new": new,
+                "connections_reused": max(requests - new, 0),
+            }
+    return stats
+
+
+# --- Clients ---
+
+
+_closing: set[asyncio.Task] = set()
+
+
+async def _close(anthropic_client: anthropic.AsyncAnthropic | None, session) -> None:
+    for close in (
+        anthropic_client.close if anthropic_client is not None else None,
+        session.close if session is not None else None,
+    ):
+        if close is None:
+            continue
+        try:
+            await close()
+        except Exception as e:
+            # Their loop may already be closed, and its sockets with it.
+            logger.debug(f"Closing clients from a previous event loop: {e}")
+
+
+def _check_loop() -> None:
+    # Pooled connections belong to the loop they were opened on; a new loop (e.g. a
+    # benchmark calling asyncio.run twice) gets fresh clients, and the old ones are
+    # closed: on their own loop if it still runs, else on this one.
+    global _loop, _anthropic, _http_session
+    loop = asyncio.get_running_loop()
+    if _loop is loop:
+        return
+    old_loop, old_anthropic, old_session = _loop, _anthropic, _http_session
+    _loop, _anthropic, _http_session = loop, None, None
+    if old_anthropic is None and old_session is None:
+        return
+    if old_loop is not None and old_loop.is_running():
+        asyncio.run_coroutine_threadsafe(_close(old_anthropic, old_session), old_loop)
+    else:
+        task = loop.create_task(_close(old_anthropic, old_session))
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+
+
+def get_anthropic() -> anthropic.AsyncAnthropic:
+    global _anthropic
+    _check_loop()
+    if _anthropic is None:
+        _anthropic = anthropic.AsyncAnthropic(
+            api_key=os.environ["ANTHROPIC_API_KEY"],
+            http_client=anthropic.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=int(_setting("ANTHROPIC_MAX_CONNECTIONS", "20")),
+                    max_keepalive_connections=int(_setting("ANTHROPIC_MAX_CONNECTIONS", "20")),
+                    keepalive_expiry=_setting("HTTP_KEEPALIVE_EXPIRY", "60"),
+                ),
+                timeout=_setting("ANTHROPIC_TIMEOUT", "30"),
+                event_hooks=async_httpx_event_hooks("anthropic"),
+            ),
+        )
+    return _anthropic
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    global _http_session
+    _check_loop()
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=int(_setting("HTTP_MAX_CONNECTIONS", "20")),
+                keepalive_timeout=_setting("HTTP_KEEPALIVE_EXPIRY", "60"),
+            ),
+            timeout=aiohttp.ClientTimeout(total=_setting("HTTP_TIMEOUT", "10")),
+            trace_configs=[_aiohttp_trace_config("http")],
+        )
+    return _http_session
+
+
+async def aclose() -> None:
+    """Close the pooled clients. Safe to call more than once."""
+    global _anthropic, _http_session
+    if _anthropic is not None:
+        await _anthropic.close()
+        _anthropic = None
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+    logger.info(f"Closed shared clients: {connection_stats()}")
+
+
+@asynccontextmanager
+async def lifespan(app: Any = None):
+    """FastAPI-style lifespan that closes the pooled clients on shutdown."""
+    try:
+        yield
+    finally:
+        await aclose()
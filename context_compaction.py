@@ -0,0 +1,316 @@
+"""Keeps the conversation LLM's context bounded over long calls.
+
+Without this, every tool result stays in the LLMContext verbatim (full row sets with
+nested artists) and is re-sent with every later request, so TTFB keeps rising as the
+call goes on. ContextCompactor sits right after the LLM in the pipeline, where it sees
+tool results on their way to the assistant aggregator and the context frames the
+aggregator sends back up for tool follow-ups, and:
+
+- caps each new tool result at CONTEXT_TOOL_RESULT_MAX_CHARS, trimming the longest
+  lists first and saying how many rows were left out,
+- replaces tool results older than the last CONTEXT_DIGEST_AFTER_TURNS user turns with
+  a one-line digest of their shape (the LLM can call the tool again for details), all
+  at once when that saves at least CONTEXT_DIGEST_MIN_TOKENS,
+- once the estimated prompt exceeds CONTEXT_TOKEN_BUDGET tokens, rolls everything but
+  the system prompt and the last CONTEXT_KEEP_TURNS user turns into a running summary,
+  written by Haiku in the background after a response so no turn waits on it.
+
+Any edit to an earlier message invalidates the prompt cache from that message on, so
+the request after it pays a cache write for the rest of the conversation. Compaction
+therefore works in large, infrequent steps rather than a little every turn. The
+system prompt and tools are never touched, so their cache entry survives every step:
+the summary goes right after the system prompt.
+
+Token counts are estimates (characters / 4). Every step (digests and summaries) is
+recorded with the estimated prompt size before and after it, and with the conversation
+LLM's cache-read ratio over the requests before and after it; report() is logged at
+the end of the call.
+"""
+
+import json
+import os
+from typing import Any, TypeGuard
+
+from loguru import logger
+from pipecat.frames.frames import (
+    Frame,
+    FunctionCallResultFrame,
+    LLMContextFrame,
+    LLMFullResponseEndFrame,
+)
+from pipecat.processors.aggregators.llm_context import LLMContext
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+
+import clients
+from llm_usage import CallUsage
+
+CONTEXT_TOOL_RESULT_MAX_CHARS = int(os.getenv("CONTEXT_TOOL_RESULT_MAX_CHARS", "4000"))
+CONTEXT_DIGEST_AFTER_TURNS = int(os.getenv("CONTEXT_DIGEST_AFTER_TURNS", "1"))
+CONTEXT_DIGEST_MIN_TOKENS = int(os.getenv("CONTEXT_DIGEST_MIN_TOKENS", "2000"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))
+CONTEXT_KEEP_TURNS = int(os.getenv("CONTEXT_KEEP_TURNS", "4"))
+
+SUMMARY_MODEL = "claude-haiku-4-5-20251001"
+SUMMARY_PREFIX = "Summary of the call so far:\n"
+
+ROLLING_SUMMARY_PROMPT = """You are keeping notes on a voice call between a festival planning assistant and a caller. Update the running summary with the new part of the conversation below.
+
+Keep every fact the assistant may need later: names, cities, the group, festivals and artists discussed, decisions made, what was saved with tools (with any ids), and open questions. Drop small talk. Reply with the updated summary only, as short bullet points."""
+
+
+def estimate_tokens(messages: list) -> int:
+    return len(json.dumps(messages, default=str)) // 4
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+
+def fits(result: Any, max_chars: int = CONTEXT_TOOL_RESULT_MAX_CHARS) -> bool:
+    """Whether cap_result would pass result through untouched."""
+    return _size(result) <= max_chars
+
+
+def cap_result(result: Any, max_chars: int = CONTEXT_TOOL_RESULT_MAX_CHARS) -> Any:
+    """The result as-is if it fits in max_chars of JSON, else a trimmed copy that says
+    what was left out."""
+    if _size(result) <= max_chars:
+        return result
+    if isinstance(result, list):
+        rows = len(result)
+        while rows > 1 and _size(result[:rows]) > max_chars:
+            rows //= 2
+        result = {"rows": result[:rows], "truncated": f"showing {rows} of {len(result)} rows"}
+    elif isinstance(result, dict):
+        result = dict(result)
+        truncated = {}
+        for key in sorted(
+            (k for k, v in result.items() if isinstance(v, list)),
+            key=lambda k: _size(result[k]),
+            reverse=True,
+        ):
+            total = len(result[key])
+            while len(result[key]) > 1 and _size(result) > max_chars:
+                result[key] = result[key][: len(result[key]) // 2]
+            if len(result[key]) < total:
+                truncated[key] = f"showing {len(result[key])} of {total}"
+        if truncated:
+            result["truncated"] = truncated
+    if _size(result) <= max_chars:
+        return result
+    return {"truncated": True, "preview": json.dumps(result, default=str)[:max_chars]}
+
+
+def _shape(value: Any) -> str:
+    if isinstance(value, list):
+        return f"{len(value)} rows"
+    if isinstance(value, dict):
+        parts = [
+            f"{k}: {len(v)} items" if isinstance(v, list) else k
+            for k, v in value.items()
+            if k != "truncated"
+        ]
+        return ", ".join(parts)[:200]
+    return f"{len(str(value))} characters"
+
+
+def digest(function_name: str, content: str) -> str:
+    """One-line stand-in for an old tool result."""
+    try:
+        shape = _shape(json.loads(content))
+    except (TypeError, ValueError):
+        shape = _shape(content)
+    return (
+        f"[Earlier {function_name} result ({shape}) was compacted. "
+        f"Call {function_name} again if you need the details.]"
+    )
+
+
+def _is_user_turn(message: Any) -> bool:
+    return isinstance(message, dict) and message.get("role") == "user"
+
+
+class ContextCompactor(FrameProcessor):
+    """Caps, digests and summarizes the shared LLMContext. Place right after the LLM."""
+
+    def __init__(self, context: LLMContext, usage: CallUsage | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self._context = context
+        self._usage = usage
+        self._summary_task = None
+        self._passes: list[dict] = []
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, FunctionCallResultFrame) and frame.result:
+            frame.result = cap_result(frame.result)
+        elif isinstance(frame, LLMContextFrame) and direction == FrameDirection.UPSTREAM:
+            # A tool follow-up about to reach the LLM.
+            self._compact_and_record("tool_follow_up")
+        elif isinstance(frame, LLMFullResponseEndFrame):
+            # Prepare the context for the next user turn while the bot is speaking.
+            self._compact_and_record("turn")
+            if self._over_budget() and (self._summary_task is None or self._summary_task.done()):
+                self._summary_task = self.create_task(self._summarize(), "context_summary")
+
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self):
+        await super().cleanup()
+        if self._summary_task is not None:
+            await self.cancel_task(self._summary_task)
+
+    def _over_budget(self) -> bool:
+        return estimate_tokens(self._context.get_messages()) > CONTEXT_TOKEN_BUDGET
+
+    def _compact_and_record(self, kind: str) -> None:
+        before = estimate_tokens(self._context.get_messages())
+        self.compact()
+        after = estimate_tokens(self._context.get_messages())
+        if after < before:
+            self._record(kind, before, after)
+
+    def compact(self) -> None:
+        """Digest tool results older than the last CONTEXT_DIGEST_AFTER_TURNS user turns,
+        in one step once together they save CONTEXT_DIGEST_MIN_TOKENS."""
+        messages = self._context.get_messages()
+        keep = max(CONTEXT_DIGEST_AFTER_TURNS, 1)
+        user_turns = [i for i, m in enumerate(messages) if _is_user_turn(m)]
+        if len(user_turns) <= keep:
+            return
+        cutoff = user_turns[-keep]
+        names = _tool_names(messages[:cutoff])
+        digests = []
+        for message in messages[:cutoff]:
+            if not isinstance(message, dict) or message.get("role") != "tool":
+                continue
+            content = message.get("content")
+            if not isinstance(content, str) or content.startswith("[Earlier "):
+                continue
+            name = names.get(message.get("tool_call_id") or "", "tool")
+            compacted = digest(name, content)
+            if len(compacted) < len(content):
+                digests.append((message, compacted))
+        saved = sum(len(m["content"]) - len(c) for m, c in digests) // 4
+        if saved < CONTEXT_DIGEST_MIN_TOKENS:
+            return
+        for message, compacted in digests:
+            message["content"] = compacted
+
+    async def _summarize(self) -> None:
+        """Roll everything before the last CONTEXT_KEEP_TURNS user turns into the summary."""
+        messages = self._context.get_messages()
+        user_turns = [i for i, m in enumerate(messages) if _is_user_turn(m)]
+        if len(user_turns) <= CONTEXT_KEEP_TURNS:
+            return
+        # Cut at a user turn, so no tool call is separated from its result.
+        rolled = messages[1 : user_turns[-CONTEXT_KEEP_TURNS]]
+        if not rolled:
+            return
+        before = estimate_tokens(messages)
+        previous, first = "", rolled[0]
+        if _is_summary(first):
+            previous = first["content"].removeprefix(SUMMARY_PREFIX)
+        delta = "\n".join(_render(m) for m in rolled if not _is_summary(m))
+
+        try:
+            client = clients.get_anthropic()
+            response = await client.messages.create(
+                model=SUMMARY_MODEL,
+                max_tokens=1024,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": f"{ROLLING_SUMMARY_PROMPT}\n\nCurrent summary:\n"
+                        f"{previous or '(none yet)'}\n\n---\n\nNew conversation:\n{delta}",
+                    }
+                ],
+            )
+        except Exception as e:
+            logger.warning(f"Context summary failed, keeping the full context: {e}")
+            return
+        if self._usage is not None:
+            self._usage.record_anthropic("compaction", response.usage)
+        summary = response.content[0].text  # type: ignore[union-attr]
+
+        # The aggregators only append, so the rolled messages are still right after the
+        # system prompt, unless the context was replaced while we waited.
+        if any(a is not b for a, b in zip(messages[1 : len(rolled) + 1], rolled)):
+            logger.warning("Context changed during summarization; summary discarded")
+            return
+        # Right after the system prompt, whose cache entry this step leaves intact.
+        messages[1 : len(rolled) + 1] = [
+            {"role": "system", "content": SUMMARY_PREFIX + summary}
+        ]
+        self._record("summary", before, estimate_tokens(messages))
+        logger.info(f"Rolled {len(rolled)} messages into the context summary")
+
+    def _record(self, kind: str, before: int, after: int) -> None:
+        requests = self._usage.request_count("conversation") if self._usage else None
+        self._passes.append(
+            {"pass": kind, "tokens_before": before, "tokens_after": after, "request": requests}
+        )
+
+    def report(self) -> dict:
+        """Every compaction step ("turn" or "tool_follow_up" digests, "summary") with the
+        estimated prompt tokens and the conversation cache-read ratio before and after it
+        (over the requests since the previous step and until the next one), plus totals."""
+        steps = []
+        for i, p in enumerate(self._passes):
+            step = {k: v for k, v in p.items() if k != "request"}
+            if self._usage is not None:
+                previous = self._passes[i - 1]["request"] if i else 0
+                following = self._passes[i + 1]["request"] if i + 1 < len(self._passes) else None
+                step["cache_read_ratio_before"] = self._usage.cached_ratio(
+                    "conversation", previous, p["request"]
+                )
+                step["cache_read_ratio_after"] = self._usage.cached_ratio(
+                    "conversation", p["request"], following
+                )
+            steps.append(step)
+        return {
+            "steps": steps,
+            "summaries": sum(p["pass"] == "summary" for p in self._passes),
+            "tokens_saved": sum(p["tokens_before"] - p["tokens_after"] for p in self._passes),
+            "tokens_now": estimate_tokens(self._context.get_messages()),
+        }
+
+
+def _tool_names(messages: list) -> dict[str, str]:
+    """Function name by tool call id, for the tool calls in messages."""
+    names = {}
+    for message in messages:
+        if not isinstance(message, dict):
+            continue
+        for call in message.get("tool_calls") or []:
+            if call["type"] == "function":
+                names[call["id"]] = call["function"]["name"]
+    return names
+
+
+def _is_summary(message: Any) -> TypeGuard[dict[str, Any]]:
+    return (
+        isinstance(message, dict)
+        and message.get("role") == "system"
+        and isinstance(message.get("content"), str)
+        and message["content"].startswith(SUMMARY_PREFIX)
+    )
+
+
+def _render(message: Any) -> str:
+    if not isinstance(message, dict):
+        return ""
+    role = message.get("role", "")
+    if message.get("tool_calls"):
+        calls = ", ".join(
+            f"{c['function']['name']}({c['function']['arguments']})" for c in message["tool_calls"]
+        )
+        return f"Assistant called: {calls}"
+    content = message.get("content")
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    speaker = {"user": "Caller", "assistant": "Assistant", "tool": "Tool result"}.get(
+        role, "Note"
+    )
+    return f"{speaker}: {content}"
@@ -1,39 +1,104 @@
 import os
-from typing import Any
+from typing import Any, Callable, cast
+
+import httpx
 from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
 from loguru import logger
 from dotenv import load_dotenv
 
+import clients
+import latency
+
 load_dotenv(override=True)
 
 SUPABASE_URL = os.environ["SUPABASE_URL"]
 SUPABASE_KEY = os.environ["SUPABASE_API_KEY"]
 
+# Connection pool for PostgREST. db_async runs one worker thread per connection,
+# so concurrent calls reuse warm keep-alive connections instead of re-handshaking.
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "10"))
+DB_KEEPALIVE_EXPIRY = float(os.getenv("DB_KEEPALIVE_EXPIRY", "60"))
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+# Rows per request when a whole table is read; PostgREST cuts any single read off at
+# its max_rows (1000 on Supabase).
+DB_PAGE_SIZE = int(os.getenv("DB_PAGE_SIZE", "1000"))
+
+# Page size and per-value cap for execute_readonly_query (migration 006). The statement
+# timeout is set on the Postgres function itself.
+DB_QUERY_MAX_ROWS = int(os.getenv("DB_QUERY_MAX_ROWS", "50"))
+DB_QUERY_MAX_VALUE_CHARS = int(os.getenv("DB_QUERY_MAX_VALUE_CHARS", "500"))
+DB_QUERY_EXCLUDE_COLUMNS = [
+    c for c in os.getenv("DB_QUERY_EXCLUDE_COLUMNS", "transcript").split(",") if c
+]
+
 _client: Client | None = None
 
 
 def get_client() -> Client:
     global _client
     if _client is None:
-        _client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=DB_MAX_CONNECTIONS,
+                max_keepalive_connections=DB_MAX_CONNECTIONS,
+                keepalive_expiry=DB_KEEPALIVE_EXPIRY,
+            ),
+            timeout=DB_TIMEOUT,
+            follow_redirects=True,
+            http2=True,
+            event_hooks=clients.httpx_event_hooks("supabase"),
+        )
+        _client = create_client(
+            SUPABASE_URL, SUPABASE_KEY, SyncClientOptions(httpx_client=http_client)
+        )
     return _client
 
 
+# --- Write listeners ---
+
+WriteListener = Callable[[str, "str | None"], None]
+_write_listeners: list[WriteListener] = []
+
+
+def on_write(listener: WriteListener) -> WriteListener:
+    """Register listener(table, group_id) to run after every write through this module.
+
+    group_id is None when the write's group isn't known without another round trip.
+    Usable as a decorator.
+    """
+    _write_listeners.append(listener)
+    return listener
+
+
+def _notify_write(table: str, group_id: str | None) -> None:
+    for listener in _write_listeners:
+        try:
+            listener(table, group_id)
+        except Exception as e:
+            logger.error(f"Write listener failed for {table}: {e}")
+
+
 # --- Groups ---
 
+@latency.timed("db.create_group")
 def create_group(name: str) -> Any:
     client = get_client()
     result = client.table("groups").insert({"name": name}).execute()
     logger.info(f"Created group: {name}")
-    return result.data[0]
+    group = cast(dict[str, Any], result.data[0])
+    _notify_write("groups", group["id"])
+    return group
 
 
+@latency.timed("db.get_group")
 def get_group(group_id: str) -> Any:
     client = get_client()
     result = client.table("groups").select("*").eq("id", group_id).execute()
     return result.data[0] if result.data else None
 
 
+@latency.timed("db.list_groups")
 def list_groups() -> list[Any]:
     client = get_client()
     result = client.table("groups").select("*").order("created_at", desc=True).execute()
@@ -42,50 +107,120 @@ def list_groups() -> list[Any]:
 
 # --- Members ---
 
-def add_member(group_id: str, name: str, city: str | None = None, phone: str | None = None) -> Any:
-    client = get_client()
+def _member_row(
+    group_id: str,
+    name: str,
+    city: str | None = None,
+    phone: str | None = None,
+    id: str | None = None,
+) -> dict[str, Any]:
     data: dict[str, Any] = {"group_id": group_id, "name": name}
+    if id:
+        data["id"] = id
     if city:
         data["city"] = city
     if phone:
         data["phone"] = phone
-    result = client.table("members").insert(data).execute()
+    return data
+
+
+@latency.timed("db.add_member")
+def add_member(group_id: str, name: str, city: str | None = None, phone: str | None = None) -> Any:
+    client = get_client()
+    result = client.table("members").insert(_member_row(group_id, name, city, phone)).execute()
     logger.info(f"Added member: {name} to group {group_id}")
+    _notify_write("members", group_id)
     return result.data[0]
 
 
-def get_member_by_phone(phone: str) -> Any:
+@latency.timed("db.add_members")
+def add_members(group_id: str, members: list[dict[str, Any]]) -> list[Any]:
+    """Insert several members ({"name", "city"?, "phone"?, "id"?}) in one statement."""
+    if not members:
+        return []
+    client = get_client()
+    rows = [_member_row(group_id, **m) for m in members]
+    # Columns a row leaves out take their database default rather than null.
+    result = client.table("members").insert(rows, default_to_null=False).execute()
+    logger.info(f"Added {len(rows)} members to group {group_id}")
+    _notify_write("members", group_id)
+    return result.data
+
+
+@latency.timed("db.get_member_by_phone")
+def get_member_by_phone(*phones: str) -> Any:
+    """The member whose phone is stored as any of phones, with their group."""
     client = get_client()
-    result = client.table("members").select("*, groups(*)").eq("phone", phone).execute()
+    result = client.table("members").select("*, groups(*)").in_("phone", phones).limit(1).execute()
     return result.data[0] if result.data else None
 
 
+@latency.timed("db.list_members_with_phone")
+def list_members_with_phone() -> list[Any]:
+    """Every member that has a phone number, with their group, for phone_index.py. Read in
+    pages of DB_PAGE_SIZE by id, until an empty page, so no max_rows cut-off applies."""
+    client = get_client()
+    members: list[Any] = []
+    while True:
+        query = client.table("members").select("*, groups(*)").not_.is_("phone", "null")
+        if members:
+            query = query.gt("id", members[-1]["id"])
+        page = query.order("id").limit(DB_PAGE_SIZE).execute().data
+        if not page:
+            return members
+        members.extend(page)
+
+
+@latency.timed("db.list_members")
 def list_members(group_id: str) -> list[Any]:
     client = get_client()
     result = client.table("members").select("*").eq("group_id", group_id).execute()
     return result.data
 
 
+@latency.timed("db.update_member")
 def update_member(member_id: str, **kwargs: Any) -> Any:
     client = get_client()
     result = client.table("members").update(kwargs).eq("id", member_id).execute()
-    return result.data[0]
+    member = cast(dict[str, Any], result.data[0])
+    _notify_write("members", member.get("group_id"))
+    return member
 
 
 # --- Calls ---
 
+@latency.timed("db.start_call")
 def start_call(group_id: str) -> Any:
     client = get_client()
     result = client.table("calls").insert({"group_id": group_id}).execute()
     logger.info(f"Started call for group {group_id}")
+    _notify_write("calls", group_id)
+    return result.data[0]
+
+
+@latency.timed("db.set_call_group")
+def set_call_group(call_id: str, group_id: str) -> Any:
+    """Move a call to another group, when the caller's group changes mid-call."""
+    client = get_client()
+    result = client.table("calls").update({"group_id": group_id}).eq("id", call_id).execute()
+    logger.info(f"Moved call {call_id} to group {group_id}")
+    _notify_write("calls", group_id)
     return result.data[0]
 
 
-def end_call_record(call_id: str, summary: str, transcript: list | None = None) -> Any:
+@latency.timed("db.end_call_record")
+def end_call_record(
+    call_id: str,
+    summary: str,
+    transcript: list | None = None,
+    latency_breakdown: dict | None = None,
+) -> Any:
     client = get_client()
     data: dict[str, Any] = {"ended_at": "now()", "summary": summary}
     if transcript is not None:
         data["transcript"] = transcript
+    if latency_breakdown is not None:
+        data["latency"] = latency_breakdown
     result = (
         client.table("calls")
         .update(data)
@@ -93,9 +228,12 @@ def end_call_record(call_id: str, summary: str, transcript: list | None = None)
         .execute()
     )
     logger.info(f"Ended call {call_id}")
-    return result.data[0]
+    call = cast(dict[str, Any], result.data[0])
+    _notify_write("calls", call.get("group_id"))
+    return call
 
 
+@latency.timed("db.get_recent_calls")
 def get_recent_calls(group_id: str, limit: int = 5) -> list[Any]:
     client = get_client()
     result = (
@@ -111,7 +249,7 @@ def get_recent_calls(group_id: str, limit: int = 5) -> list[Any]:
 
 # --- Festivals ---
 
-def add_festival(
+def _festival_row(
     group_id: str,
     name: str,
     location: str | None = None,
@@ -120,9 +258,11 @@ def add_festival(
     ticket_price: float | None = None,
     on_sale_date: str | None = None,
     status: str = "considering",
-) -> Any:
-    client = get_client()
+    id: str | None = None,
+) -> dict[str, Any]:
     data = {"group_id": group_id, "name": name, "status": status}
+    if id:
+        data["id"] = id
     if location:
         data["location"] = location
     if dates_start:
@@ -133,25 +273,63 @@ def add_festival(
         data["ticket_price"] = str(ticket_price)
     if on_sale_date:
         data["on_sale_date"] = on_sale_date
+    return data
+
+
+@latency.timed("db.add_festival")
+def add_festival(
+    group_id: str,
+    name: str,
+    location: str | None = None,
+    dates_start: str | None = None,
+    dates_end: str | None = None,
+    ticket_price: float | None = None,
+    on_sale_date: str | None = None,
+    status: str = "considering",
+) -> Any:
+    client = get_client()
+    data = _festival_row(
+        group_id, name, location, dates_start, dates_end, ticket_price, on_sale_date, status
+    )
     result = client.table("festivals").insert(data).execute()
     logger.info(f"Added festival: {name}")
+    _notify_write("festivals", group_id)
     return result.data[0]
 
 
+@latency.timed("db.add_festivals")
+def add_festivals(group_id: str, festivals: list[dict[str, Any]]) -> list[Any]:
+    """Insert several festivals (add_festival's keyword arguments, plus an optional "id")
+    in one statement."""
+    if not festivals:
+        return []
+    client = get_client()
+    rows = [_festival_row(group_id, **f) for f in festivals]
+    result = client.table("festivals").insert(rows, default_to_null=False).execute()
+    logger.info(f"Added {len(rows)} festivals to group {group_id}")
+    _notify_write("festivals", group_id)
+    return result.data
+
+
+@latency.timed("db.list_festivals")
 def list_festivals(group_id: str) -> list[Any]:
     client = get_client()
     result = client.table("festivals").select("*, artists(*)").eq("group_id", group_id).execute()
     return result.data
 
 
+@latency.timed("db.update_festival")
 def update_festival(festival_id: str, **kwargs: Any) -> Any:
     client = get_client()
     result = client.table("festivals").update(kwargs).eq("id", festival_id).execute()
-    return result.data[0]
+    festival = cast(dict[str, Any], result.data[0])
+    _notify_write("festivals", festival.get("group_id"))
+    return festival
 
 
 # --- Artists ---
 
+@latency.timed("db.add_artist")
 def add_artist(festival_id: str, name: str, priority: str = "want_to_see") -> Any:
     client = get_client()
     result = (
@@ -160,18 +338,77 @@ def add_artist(festival_id: str, name: str, priority: str = "want_to_see") -> An
         .execute()
     )
     logger.info(f"Added artist: {name} to festival {festival_id}")
+    # Artists only reference their festival, so the group is unknown here.
+    _notify_write("artists", None)
     return result.data[0]
 
 
+@latency.timed("db.add_artists")
+def add_artists(festival_id: str, artists: list[dict[str, Any]]) -> list[Any]:
+    """Insert a lineup ({"name", "priority"?, "id"?}) for one festival in one statement."""
+    if not artists:
+        return []
+    client = get_client()
+    rows = [
+        {
+            **({"id": a["id"]} if a.get("id") else {}),
+            "festival_id": festival_id,
+            "name": a["name"],
+            "priority": a.get("priority") or "want_to_see",
+        }
+        for a in artists
+    ]
+    result = client.table("artists").insert(rows, default_to_null=False).execute()
+    logger.info(f"Added {len(rows)} artists to festival {festival_id}")
+    _notify_write("artists", None)
+    return result.data
+
+
+@latency.timed("db.list_artists")
 def list_artists(festival_id: str) -> list[Any]:
     client = get_client()
     result = client.table("artists").select("*").eq("festival_id", festival_id).execute()
     return result.data
 
 
-# --- Raw queries ---
+# --- Group snapshot ---
 
-def execute_readonly_query(query: str) -> Any:
+@latency.timed("db.get_group_snapshot")
+def get_group_snapshot(group_id: str, calls_limit: int = 3) -> Any:
+    """Group, members, festivals with artists and recent calls (no transcripts) in one RPC."""
     client = get_client()
-    result = client.rpc("execute_readonly_query", {"query": query}).execute()
+    result = client.rpc(
+        "get_group_snapshot", {"target_group_id": group_id, "calls_limit": calls_limit}
+    ).execute()
     return result.data
+
+
+# --- Raw queries ---
+
+@latency.timed("db.execute_readonly_query")
+def execute_readonly_query(
+    query: str,
+    max_rows: int = DB_QUERY_MAX_ROWS,
+    offset: int = 0,
+    max_value_chars: int = DB_QUERY_MAX_VALUE_CHARS,
+    exclude_columns: list[str] | None = None,
+) -> dict[str, Any]:
+    """One page of a read-only SELECT: {"rows", "has_more", "next_offset"}.
+
+    Columns in exclude_columns (default DB_QUERY_EXCLUDE_COLUMNS) are dropped and long
+    string values are cut to max_value_chars.
+    """
+    if exclude_columns is None:
+        exclude_columns = DB_QUERY_EXCLUDE_COLUMNS
+    client = get_client()
+    result = client.rpc(
+        "execute_readonly_query",
+        {
+            "query": query,
+            "max_rows": max_rows,
+            "row_offset": offset,
+            "max_value_chars": max_value_chars,
+            "exclude_columns": exclude_columns,
+        },
+    ).execute()
+    return cast(dict[str, Any], result.data)
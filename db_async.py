@@ -0,0 +1,84 @@
+"""Async variant of the db.py API for use from the bot's event loop.
+
+Every function here has the same signature as its db.py counterpart but runs it on
+a bounded thread pool, so a slow PostgREST round trip in one call never stalls audio
+or turn-taking in the other calls sharing the loop. The pool has one thread per
+pooled keep-alive connection in db.get_client().
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, ParamSpec, TypeVar
+
+import db
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+_executor = ThreadPoolExecutor(max_workers=db.DB_MAX_CONNECTIONS, thread_name_prefix="db")
+
+
+async def run(fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+    """Run a blocking db call on the db thread pool, like asyncio.to_thread but bounded."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+def _async(fn: Callable[P, R]) -> Callable[P, Awaitable[R]]:
+    @functools.wraps(fn)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return await run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def shutdown() -> None:
+    """Wait for in-flight db calls and stop the pool. Call once at worker shutdown."""
+    _executor.shutdown(wait=True)
+
+
+# --- Groups ---
+
+create_group = _async(db.create_group)
+get_group = _async(db.get_group)
+list_groups = _async(db.list_groups)
+
+# --- Members ---
+
+add_member = _async(db.add_member)
+add_members = _async(db.add_members)
+get_member_by_phone = _async(db.get_member_by_phone)
+list_members_with_phone = _async(db.list_members_with_phone)
+list_members = _async(db.list_members)
+update_member = _async(db.update_member)
+
+# --- Calls ---
+
+start_call = _async(db.start_call)
+set_call_group = _async(db.set_call_group)
+end_call_record = _async(db.end_call_record)
+get_recent_calls = _async(db.get_recent_calls)
+
+# --- Festivals ---
+
+add_festival = _async(db.add_festival)
+add_festivals = _async(db.add_festivals)
+list_festivals = _async(db.list_festivals)
+update_festival = _async(db.update_festival)
+
+# --- Artists ---
+
+add_artist = _async(db.add_artist)
+add_artists = _async(db.add_artists)
+list_artists = _async(db.list_artists)
+
+# --- Group snapshot ---
+
+get_group_snapshot = _async(db.get_group_snapshot)
+
+# --- Raw queries ---
+
+execute_readonly_query = _async(db.execute_readonly_query)
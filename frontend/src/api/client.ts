@@ -4,6 +4,28 @@ export async function apiFetch<T>(
   path: string,
   options?: RequestInit
 ): Promise<T> {
+  const res = await request(path, options);
+  if (res.status === 204) {
+    return undefined as T;
+  }
+  return res.json() as Promise<T>;
+}
+
+/** Every row of a paginated list endpoint, following X-Next-Cursor page by page. */
+export async function apiFetchAll<T>(path: string): Promise<T[]> {
+  const rows: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const sep = path.includes("?") ? "&" : "?";
+    const page = cursor ? `${path}${sep}cursor=${encodeURIComponent(cursor)}` : path;
+    const res = await request(page);
+    rows.push(...((await res.json()) as T[]));
+    cursor = res.headers.get("X-Next-Cursor");
+  } while (cursor);
+  return rows;
+}
+
+async function request(path: string, options?: RequestInit): Promise<Response> {
   const res = await fetch(`${BASE_URL}${path}`, {
     headers: { "Content-Type": "application/json" },
     ...options,
@@ -11,8 +33,5 @@ export async function apiFetch<T>(
   if (!res.ok) {
     throw new Error(`API error ${res.status}: ${await res.text()}`);
   }
-  if (res.status === 204) {
-    return undefined as T;
-  }
-  return res.json() as Promise<T>;
+  return res;
 }
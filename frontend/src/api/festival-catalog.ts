@@ -1,6 +1,6 @@
-import { apiFetch } from "./client";
+import { apiFetchAll } from "./client";
 import type { FestivalCatalogEntry } from "./types";
 
 export function listFestivalCatalog() {
-  return apiFetch<FestivalCatalogEntry[]>("/festival-catalog");
+  return apiFetchAll<FestivalCatalogEntry>("/festival-catalog?limit=500");
 }
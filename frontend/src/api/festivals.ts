@@ -5,7 +5,7 @@ export function listGroupFestivals(groupId: string) {
   return apiFetch<Festival[]>(`/groups/${groupId}/festivals`);
 }
 
-export function createFestival(data: {
+export type FestivalInput = {
   group_id: string;
   name: string;
   location?: string;
@@ -14,9 +14,18 @@ export function createFestival(data: {
   ticket_price?: number;
   on_sale_date?: string;
   status?: string;
-}) {
+};
+
+export function createFestival(data: FestivalInput) {
   return apiFetch<Festival>("/festivals", {
     method: "POST",
     body: JSON.stringify(data),
   });
 }
+
+export function createFestivals(data: FestivalInput[]) {
+  return apiFetch<Festival[]>("/festivals/bulk", {
+    method: "POST",
+    body: JSON.stringify(data),
+  });
+}
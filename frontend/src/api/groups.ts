@@ -1,5 +1,5 @@
 import { apiFetch } from "./client";
-import type { Group } from "./types";
+import type { Group, GroupOverview } from "./types";
 
 export function listGroups() {
   return apiFetch<Group[]>("/groups");
@@ -9,6 +9,10 @@ export function getGroup(id: string) {
   return apiFetch<Group>(`/groups/${id}`);
 }
 
+export function getGroupOverview(id: string) {
+  return apiFetch<GroupOverview>(`/groups/${id}/overview`);
+}
+
 export function createGroup(name: string) {
   return apiFetch<Group>("/groups", {
     method: "POST",
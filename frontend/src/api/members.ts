@@ -5,19 +5,28 @@ export function listGroupMembers(groupId: string) {
   return apiFetch<Member[]>(`/groups/${groupId}/members`);
 }
 
-export function createMember(data: {
+export type MemberInput = {
   group_id: string;
   name: string;
   phone?: string;
   city?: string;
   status?: string;
-}) {
+};
+
+export function createMember(data: MemberInput) {
   return apiFetch<Member>("/members", {
     method: "POST",
     body: JSON.stringify(data),
   });
 }
 
+export function createMembers(data: MemberInput[]) {
+  return apiFetch<Member[]>("/members/bulk", {
+    method: "POST",
+    body: JSON.stringify(data),
+  });
+}
+
 export function updateMember(
   id: string,
   data: { name?: string; city?: string; phone?: string; status?: string }
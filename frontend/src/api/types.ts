@@ -34,6 +34,21 @@ export interface Artist {
   priority: string | null;
 }
 
+export interface CallSummary {
+  id: string;
+  group_id: string | null;
+  started_at: string | null;
+  ended_at: string | null;
+  summary: string | null;
+}
+
+export interface GroupOverview {
+  group: Group;
+  members: Member[];
+  festivals: Festival[];
+  recent_calls: CallSummary[];
+}
+
 export interface FestivalCatalogEntry {
   id: string;
   name: string;
@@ -10,8 +10,9 @@ import { StepAddMembers } from "./step-add-members";
 import type { DraftMember } from "./step-add-members";
 import { StepSelectFestivals } from "./step-select-festivals";
 import { createGroup } from "@/api/groups";
-import { createMember } from "@/api/members";
-import { createFestival } from "@/api/festivals";
+import { createMembers } from "@/api/members";
+import { createFestivals } from "@/api/festivals";
+import type { FestivalInput } from "@/api/festivals";
 import { listFestivalCatalog } from "@/api/festival-catalog";
 
 interface Props {
@@ -45,26 +46,26 @@ export function CreateGroupWizard({ open, onClose, onCreated }: Props) {
     try {
       const group = await createGroup(groupName);
 
-      await Promise.all(
-        members.map((m) =>
-          createMember({
+      if (members.length > 0) {
+        await createMembers(
+          members.map((m) => ({
             group_id: group.id,
             name: m.name,
             phone: m.phone,
             ...(m.city ? { city: m.city } : {}),
-          })
-        )
-      );
+          }))
+        );
+      }
 
       if (selectedFestivalIds.length > 0) {
         const catalog = await listFestivalCatalog();
         const catalogMap = new Map(catalog.map((c) => [c.id, c]));
 
-        await Promise.all(
-          selectedFestivalIds.map((id) => {
-            const entry = catalogMap.get(id);
-            if (!entry) return Promise.resolve();
-            return createFestival({
+        const festivals = selectedFestivalIds.flatMap((id): FestivalInput[] => {
+          const entry = catalogMap.get(id);
+          if (!entry) return [];
+          return [
+            {
               group_id: group.id,
               name: entry.name,
               ...(entry.location ? { location: entry.location } : {}),
@@ -77,9 +78,12 @@ export function CreateGroupWizard({ open, onClose, onCreated }: Props) {
                 ? { on_sale_date: entry.on_sale_date }
                 : {}),
               status: "considering",
-            });
-          })
-        );
+            },
+          ];
+        });
+        if (festivals.length > 0) {
+          await createFestivals(festivals);
+        }
       }
 
       onCreated();
@@ -6,16 +6,16 @@ import { Separator } from "@/components/ui/separator";
 import { MemberList } from "@/components/members/member-list";
 import { MemberDialog } from "@/components/members/member-dialog";
 import { FestivalList } from "@/components/festivals/festival-list";
-import { getGroup } from "@/api/groups";
+import { getGroupOverview } from "@/api/groups";
 import { listGroupMembers, deleteMember } from "@/api/members";
-import { listGroupFestivals } from "@/api/festivals";
-import type { Group, Member, Festival } from "@/api/types";
+import type { Group, Member, Festival, CallSummary } from "@/api/types";
 
 export function GroupDetailPage() {
   const { id } = useParams<{ id: string }>();
   const [group, setGroup] = useState<Group | null>(null);
   const [members, setMembers] = useState<Member[]>([]);
   const [festivals, setFestivals] = useState<Festival[]>([]);
+  const [calls, setCalls] = useState<CallSummary[]>([]);
   const [loading, setLoading] = useState(true);
 
   // Member dialog state
@@ -29,11 +29,13 @@ export function GroupDetailPage() {
 
   useEffect(() => {
     if (!id) return;
-    Promise.all([getGroup(id), listGroupMembers(id), listGroupFestivals(id)])
-      .then(([g, m, f]) => {
-        setGroup(g);
-        setMembers(m);
-        setFestivals(f);
+    // One request for the whole page instead of one per section.
+    getGroupOverview(id)
+      .then((overview) => {
+        setGroup(overview.group);
+        setMembers(overview.members);
+        setFestivals(overview.festivals);
+        setCalls(overview.recent_calls);
       })
       .finally(() => setLoading(false));
   }, [id]);
@@ -98,6 +100,28 @@ export function GroupDetailPage() {
         <FestivalList festivals={festivals} />
       </section>
 
+      <Separator />
+
+      <section className="space-y-3">
+        <h2 className="text-lg font-semibold">Recent Calls</h2>
+        {calls.length === 0 ? (
+          <p className="text-muted-foreground">No calls yet.</p>
+        ) : (
+          <ul className="space-y-2">
+            {calls.map((c) => (
+              <li key={c.id} className="text-sm">
+                <p className="font-medium">
+                  {c.started_at ? new Date(c.started_at).toLocaleString() : "Unknown date"}
+                </p>
+                {c.summary && (
+                  <p className="text-muted-foreground whitespace-pre-line">{c.summary}</p>
+                )}
+              </li>
+            ))}
+          </ul>
+        )}
+      </section>
+
       <MemberDialog
         open={dialogOpen}
         onClose={() => setDialogOpen(false)}
@@ -0,0 +1,312 @@
+"""Durable local job queue for post-call work.
+
+Jobs are rows in a SQLite file until they succeed, so a summary that fails (LLM or
+database error) or a worker that dies mid-job is retried instead of lost. Worker tasks
+drain the queue with bounded concurrency and exponential backoff. A job is claimed with a lease; if its
+worker process dies, the lease expires and another worker picks it up.
+
+Handlers are registered by kind with @handler("kind") and receive the job's payload
+dict. Changes a handler makes to the payload before failing are saved, so a retry can
+skip steps that already succeeded. A job can be enqueued to run after a delay and
+updated (or made due at once) while it is still pending.
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+
+import metrics
+
+JOBS_DB_PATH = os.getenv(
+    "JOBS_DB_PATH", os.path.join(tempfile.gettempdir(), "festival-coordinator", "jobs.sqlite3")
+)
+JOBS_CONCURRENCY = int(os.getenv("JOBS_CONCURRENCY", "2"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "6"))
+JOBS_BACKOFF_BASE = float(os.getenv("JOBS_BACKOFF_BASE", "2"))
+JOBS_BACKOFF_MAX = float(os.getenv("JOBS_BACKOFF_MAX", "300"))
+JOBS_LEASE_SECS = float(os.getenv("JOBS_LEASE_SECS", "300"))
+JOBS_POLL_SECS = float(os.getenv("JOBS_POLL_SECS", "1"))
+# Every worker process shares the file; a write waits this long for another's lock.
+JOBS_BUSY_TIMEOUT_SECS = float(os.getenv("JOBS_BUSY_TIMEOUT_SECS", "30"))
+
+Handler = Callable[[dict], Awaitable[None]]
+_handlers: dict[str, Handler] = {}
+
+_SCHEMA = """
+create table if not exists jobs (
+  id integer primary key autoincrement,
+  kind text not null,
+  payload text not null,
+  status text not null default 'pending',
+  attempts integer not null default 0,
+  run_at real not null,
+  lease_until real,
+  created_at real not null,
+  last_error text
+);
+create index if not exists jobs_ready_idx on jobs (status, run_at);
+"""
+
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    """Register an async handler for jobs of the given kind. Usable as a decorator."""
+
+    def register(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+
+    return register
+
+
+class JobQueue:
+    def __init__(self, path: str = JOBS_DB_PATH, concurrency: int = JOBS_CONCURRENCY):
+        self.path = path
+        self.concurrency = concurrency
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(
+            path,
+            timeout=JOBS_BUSY_TIMEOUT_SECS,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute(f"pragma busy_timeout = {int(JOBS_BUSY_TIMEOUT_SECS * 1000)}")
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._workers: list[asyncio.Task] = []
+
+    # --- Storage (runs on a worker thread) ---
+
+    def _execute(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _insert(self, kind: str, payload: dict, delay: float = 0.0) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "insert into jobs (kind, payload, run_at, created_at) values (?, ?, ?, ?)",
+                (kind, json.dumps(payload, default=str), now + delay, now),
+            )
+            return cursor.lastrowid  # type: ignore[return-value]
+
+    def _update(self, job_id: int, changes: dict, run_now: bool) -> bool:
+        with self._lock:
+            self._conn.execute("begin immediate")
+            try:
+                row = self._conn.execute(
+                    "select payload from jobs where id = ? and status = 'pending'", (job_id,)
+                ).fetchone()
+                if row is not None:
+                    payload = {**json.loads(row[0]), **changes}
+                    self._conn.execute(
+                        "update jobs set payload = ?, run_at = min(run_at, ?) where id = ?",
+                        (
+                            json.dumps(payload, default=str),
+                            time.time() if run_now else float("inf"),
+                            job_id,
+                        ),
+                    )
+                self._conn.execute("commit")
+            except Exception:
+                self._conn.execute("rollback")
+                raise
+        return row is not None
+
+    def _claim(self) -> tuple[int, str, dict, int, float] | None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("begin immediate")
+            try:
+                row = self._conn.execute(
+                    "select id, kind, payload, attempts, created_at from jobs"
+                    " where (status = 'pending' and run_at <= ?)"
+                    " or (status = 'running' and lease_until < ?)"
+                    " order by run_at limit 1",
+                    (now, now),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "update jobs set status = 'running', attempts = attempts + 1,"
+                        " lease_until = ? where id = ?",
+                        (now + JOBS_LEASE_SECS, row[0]),
+                    )
+                self._conn.execute("commit")
+            except Exception:
+                self._conn.execute("rollback")
+                raise
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2]), row[3] + 1, row[4]
+
+    # --- Public API ---
+
+    async def enqueue(self, kind: str, payload: dict, delay: float = 0.0) -> int:
+        """Persist a job, due in delay seconds, and wake a worker. Returns the job id."""
+        if kind not in _handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        job_id = await asyncio.to_thread(self._insert, kind, payload, delay)
+        metrics.incr("jobs.enqueued")
+        self._wakeup.set()
+        logger.info(f"Enqueued {kind} job {job_id}" + (f", due in {delay:.0f}s" if delay else ""))
+        return job_id
+
+    async def update(self, job_id: int, changes: dict, run_now: bool = False) -> bool:
+        """Merge changes into a pending job's payload and, with run_now, make it due now.
+
+        Returns False if the job is no longer pending: it is running, done or failed.
+        """
+        updated = await asyncio.to_thread(self._update, job_id, changes, run_now)
+        if updated and run_now:
+            self._wakeup.set()
+        return updated
+
+    def start(self) -> None:
+        """Start the worker tasks on the running loop. Idempotent."""
+        if self._workers:
+            return
+        # In an empty context: a queue first used during a call must not attribute its
+        # jobs' timings to that call through latency.current_call.
+        self._workers = [
+            asyncio.create_task(
+                self._worker(i), name=f"jobs-worker-{i}", context=contextvars.Context()
+            )
+            for i in range(self.concurrency)
+        ]
+        self._wakeup.set()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop the workers, giving in-flight jobs up to timeout seconds to finish.
+
+        Jobs that don't finish keep their lease and are retried after it expires.
+        """
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        if workers:
+            await asyncio.wait(workers, timeout=timeout)
+
+    async def stats(self) -> dict[str, Any]:
+        """Queue depth by status plus job latency (enqueue to done) and retry counts."""
+        depth = dict(
+            await asyncio.to_thread(
+                self._execute, "select status, count(*) from jobs group by status"
+            )
+        )
+        completed = metrics.get("jobs.completed")
+        return {
+            "depth": depth.get("pending", 0),
+            "running": depth.get("running", 0),
+            "failed": depth.get("failed", 0),
+            "completed": completed,
+            "retries": metrics.get("jobs.retries"),
+            "avg_latency_ms": round(metrics.get("jobs.latency_ms") / completed, 1)
+            if completed
+            else None,
+            "avg_run_ms": round(metrics.get("jobs.run_ms") / completed, 1) if completed else None,
+        }
+
+    # --- Workers ---
+
+    async def _worker(self, index: int) -> None:
+        errors = 0
+        while True:
+            try:
+                job = await asyncio.to_thread(self._claim)
+                if job is not None:
+                    await self._run(*job)
+                errors = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # A storage error (e.g. the file locked past the busy timeout) must not
+                # end the worker. A job it interrupted keeps its lease and is retried
+                # once the lease expires.
+                errors += 1
+                delay = min(JOBS_BACKOFF_BASE**errors, JOBS_BACKOFF_MAX)
+                metrics.incr("jobs.worker_errors")
+                logger.exception(f"Job worker {index} failed, retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+                continue
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOBS_POLL_SECS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _run(self, job_id: int, kind: str, payload: dict, attempt: int, created_at: float):
+        start = time.time()
+        try:
+            await _handlers[kind](payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await asyncio.to_thread(self._fail, job_id, payload, attempt, repr(e))
+            return
+        finished = time.time()
+        await asyncio.to_thread(self._execute, "delete from jobs where id = ?", (job_id,))
+        metrics.incr("jobs.completed")
+        metrics.incr("jobs.latency_ms", (finished - created_at) * 1000)
+        metrics.incr("jobs.run_ms", (finished - start) * 1000)
+        logger.info(
+            f"Job {job_id} ({kind}) done in {(finished - start) * 1000:.0f}ms,"
+            f" {(finished - created_at) * 1000:.0f}ms after enqueue, attempt {attempt}"
+        )
+
+    def _fail(self, job_id: int, payload: dict, attempt: int, error: str) -> None:
+        if attempt >= JOBS_MAX_ATTEMPTS:
+            status, run_at = "failed", time.time()
+            metrics.incr("jobs.failed")
+            logger.error(f"Job {job_id} failed permanently after {attempt} attempts: {error}")
+        else:
+            delay = min(JOBS_BACKOFF_BASE**attempt, JOBS_BACKOFF_MAX)
+            status, run_at = "pending", time.time() + delay
+            metrics.incr("jobs.retries")
+            logger.warning(f"Job {job_id} attempt {attempt} failed, retrying in {delay:.0f}s: {error}")
+        self._execute(
+            "update jobs set status = ?, run_at = ?, lease_until = null, last_error = ?,"
+            " payload = ? where id = ?",
+            (status, run_at, error, json.dumps(payload, default=str), job_id),
+        )
+
+
+_queue: JobQueue | None = None
+
+
+def get_queue() -> JobQueue:
+    """The process-wide queue, with its workers started on the running loop."""
+    global _queue
+    if _queue is None:
+        _queue = JobQueue()
+    _queue.start()
+    return _queue
+
+
+async def enqueue(kind: str, payload: dict, delay: float = 0.0) -> int:
+    return await get_queue().enqueue(kind, payload, delay)
+
+
+async def update(job_id: int, changes: dict, run_now: bool = False) -> bool:
+    return await get_queue().update(job_id, changes, run_now)
+
+
+@asynccontextmanager
+async def lifespan(app: Any = None):
+    """FastAPI-style lifespan: drain leftover jobs from startup, stop workers on shutdown."""
+    get_queue()
+    try:
+        yield
+    finally:
+        if _queue is not None:
+            await _queue.stop()
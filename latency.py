@@ -0,0 +1,150 @@
+"""Timing for bot tools, database calls and LLM SQL generation.
+
+Functions wrapped with @timed("name") (or timed("name")(fn)) record their wall time:
+
+- into the current call's CallLatency, found through a contextvar. db_async copies the
+  context onto its worker threads, so database calls made for a call are attributed
+  to that call. The p50/p95 breakdown is saved with the call record at disconnect.
+- into a process-wide aggregate over the last LATENCY_WINDOW samples per operation,
+  logged with every call.
+- as an OpenTelemetry span and a "festival.operation.duration" histogram sample, when
+  ENABLE_TRACING is set.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterable, Iterator, Mapping, TypeVar
+
+LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "1000"))
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def tracing_enabled() -> bool:
+    """Whether ENABLE_TRACING is set. Read on use, not at import: this module is imported
+    before the entry points load .env."""
+    return os.getenv("ENABLE_TRACING", "").lower() in ("1", "true", "yes")
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    index = min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples: Mapping[str, Iterable[float]], errors: Mapping[str, int]) -> dict[str, dict]:
+    """count / p50 / p95 / max (ms) and error count per operation."""
+    report = {}
+    for name, values in sorted(samples.items()):
+        ordered = sorted(values)
+        if not ordered:
+            continue
+        report[name] = {
+            "count": len(ordered),
+            "p50_ms": round(_percentile(ordered, 0.5), 1),
+            "p95_ms": round(_percentile(ordered, 0.95), 1),
+            "max_ms": round(ordered[-1], 1),
+            "errors": errors.get(name, 0),
+        }
+    return report
+
+
+class CallLatency:
+    """Every timed operation during one call. Safe to record into from db threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: dict[str, list[float]] = defaultdict(list)
+        self._errors: dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, ms: float, error: bool = False) -> None:
+        with self._lock:
+            self._samples[name].append(ms)
+            if error:
+                self._errors[name] += 1
+
+    def report(self) -> dict[str, dict]:
+        with self._lock:
+            return summarize(self._samples, self._errors)
+
+
+current_call: ContextVar[CallLatency | None] = ContextVar("current_call", default=None)
+
+_lock = threading.Lock()
+_window: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+_errors: dict[str, int] = defaultdict(int)
+
+
+def process_report() -> dict[str, dict]:
+    """Latency of each operation over this process's recent samples, across all calls."""
+    with _lock:
+        return summarize({k: list(v) for k, v in _window.items()}, _errors)
+
+
+def record(name: str, ms: float, error: bool = False) -> None:
+    with _lock:
+        _window[name].append(ms)
+        if error:
+            _errors[name] += 1
+    call = current_call.get()
+    if call is not None:
+        call.record(name, ms, error)
+    if tracing_enabled():
+        _otel()[1].record(ms, {"operation": name, "error": error})
+
+
+@functools.cache
+def _otel():
+    from opentelemetry import metrics, trace
+
+    tracer = trace.get_tracer("festival-coordinator")
+    histogram = metrics.get_meter("festival-coordinator").create_histogram(
+        "festival.operation.duration", unit="ms", description="Tool, DB and LLM call latency"
+    )
+    return tracer, histogram
+
+
+@contextmanager
+def measure(name: str) -> Iterator[None]:
+    """Time the enclosed block as one sample of operation `name`."""
+    start = time.perf_counter()
+    error = False
+    try:
+        if tracing_enabled():
+            with _otel()[0].start_as_current_span(name):
+                yield
+        else:
+            yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        record(name, (time.perf_counter() - start) * 1000, error)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator that times every call of a sync or async function under `name`."""
+
+    def decorate(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with measure(name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with measure(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
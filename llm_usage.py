@@ -0,0 +1,142 @@
+"""Per-call accounting of cached vs uncached prompt tokens and LLM time-to-first-token.
+
+Both the conversation LLM and the query_database SQL generator mark their stable
+prefix (tools + system prompt with the schema) with Anthropic cache_control. This
+module records what each request actually read from cache, so the per-call report
+can compare TTFB for requests that hit the cache against those that didn't.
+"""
+
+from dataclasses import dataclass
+
+from pipecat.frames.frames import MetricsFrame
+from pipecat.metrics.metrics import LLMUsageMetricsData, TTFBMetricsData
+from pipecat.observers.base_observer import BaseObserver, FramePushed
+from pipecat.processors.frame_processor import FrameProcessor
+
+import metrics
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def cached_text_block(text: str) -> dict:
+    """A text content block marked as the end of a cacheable prompt prefix."""
+    return {"type": "text", "text": text, "cache_control": CACHE_CONTROL}
+
+
+@dataclass
+class _Request:
+    source: str
+    uncached_input_tokens: int
+    cache_read_input_tokens: int
+    cache_creation_input_tokens: int
+    ttfb: float | None
+
+
+def _mean_ms(values: list[float]) -> float | None:
+    return round(sum(values) / len(values) * 1000, 1) if values else None
+
+
+class CallUsage:
+    """Token usage and TTFB for every LLM request made during one call."""
+
+    def __init__(self):
+        self._requests: list[_Request] = []
+
+    def record(
+        self,
+        source: str,
+        uncached_input_tokens: int,
+        cache_read_input_tokens: int = 0,
+        cache_creation_input_tokens: int = 0,
+        ttfb: float | None = None,
+    ) -> None:
+        self._requests.append(
+            _Request(
+                source,
+                uncached_input_tokens,
+                cache_read_input_tokens,
+                cache_creation_input_tokens,
+                ttfb,
+            )
+        )
+        metrics.incr(f"llm.{source}.input_tokens_uncached", uncached_input_tokens)
+        metrics.incr(f"llm.{source}.input_tokens_cache_read", cache_read_input_tokens)
+        metrics.incr(f"llm.{source}.input_tokens_cache_write", cache_creation_input_tokens)
+
+    def record_anthropic(self, source: str, usage, ttfb: float | None = None) -> None:
+        """Record an anthropic SDK ``Usage`` object."""
+        self.record(
+            source,
+            usage.input_tokens,
+            getattr(usage, "cache_read_input_tokens", None) or 0,
+            getattr(usage, "cache_creation_input_tokens", None) or 0,
+            ttfb,
+        )
+
+    def request_count(self, source: str) -> int:
+        return sum(r.source == source for r in self._requests)
+
+    def cached_ratio(self, source: str, start: int = 0, end: int | None = None) -> float | None:
+        """Share of input tokens read from cache over source's requests start to end
+        (indexes among that source's requests), or None if there were none."""
+        requests = [r for r in self._requests if r.source == source][start:end]
+        total = sum(
+            r.uncached_input_tokens + r.cache_read_input_tokens + r.cache_creation_input_tokens
+            for r in requests
+        )
+        return round(sum(r.cache_read_input_tokens for r in requests) / total, 3) if total else None
+
+    def report(self) -> dict[str, dict]:
+        """Per-source token totals and mean TTFB split by cache hit vs miss."""
+        out: dict[str, dict] = {}
+        for source in sorted({r.source for r in self._requests}):
+            requests = [r for r in self._requests if r.source == source]
+            uncached = sum(r.uncached_input_tokens for r in requests)
+            read = sum(r.cache_read_input_tokens for r in requests)
+            written = sum(r.cache_creation_input_tokens for r in requests)
+            total = uncached + read + written
+            out[source] = {
+                "requests": len(requests),
+                "input_tokens_uncached": uncached,
+                "input_tokens_cache_read": read,
+                "input_tokens_cache_write": written,
+                "cached_ratio": round(read / total, 3) if total else 0.0,
+                "ttfb_ms_cache_hit": _mean_ms(
+                    [r.ttfb for r in requests if r.ttfb is not None and r.cache_read_input_tokens]
+                ),
+                "ttfb_ms_cache_miss": _mean_ms(
+                    [
+                        r.ttfb
+                        for r in requests
+                        if r.ttfb is not None and not r.cache_read_input_tokens
+                    ]
+                ),
+            }
+        return out
+
+
+class UsageObserver(BaseObserver):
+    """Pairs the conversation LLM's TTFB and usage metrics and records them per request."""
+
+    def __init__(self, llm: FrameProcessor, usage: CallUsage, **kwargs):
+        super().__init__(**kwargs)
+        self._llm = llm
+        self._usage = usage
+        self._ttfb: float | None = None
+
+    async def on_push_frame(self, data: FramePushed):
+        if data.source is not self._llm or not isinstance(data.frame, MetricsFrame):
+            return
+        for item in data.frame.data:
+            if isinstance(item, TTFBMetricsData):
+                self._ttfb = item.value
+            elif isinstance(item, LLMUsageMetricsData):
+                tokens = item.value
+                self._usage.record(
+                    "conversation",
+                    tokens.prompt_tokens,
+                    tokens.cache_read_input_tokens or 0,
+                    tokens.cache_creation_input_tokens or 0,
+                    self._ttfb,
+                )
+                self._ttfb = None
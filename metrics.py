@@ -0,0 +1,32 @@
+"""In-process counters for the bot worker.
+
+Counters are plain floats keyed by dotted name (e.g. "http.anthropic.requests") and
+are safe to update from the db thread pool. They are logged at the end of each call.
+"""
+
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters: dict[str, float] = defaultdict(float)
+
+
+def incr(name: str, value: float = 1.0) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def get(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0.0)
+
+
+def snapshot(prefix: str = "") -> dict[str, float]:
+    """Return a copy of all counters whose name starts with prefix."""
+    with _lock:
+        return {k: v for k, v in sorted(_counters.items()) if k.startswith(prefix)}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
@@ -0,0 +1,47 @@
+-- Migration: Add a Postgres function returning a whole group snapshot as one JSON document
+-- Used by the get_group_info tool so a live voice turn pays one RPC instead of three
+-- PostgREST round trips. Calls are returned without the heavy transcript column.
+
+create or replace function get_group_snapshot(target_group_id uuid, calls_limit int default 3)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'group', (select to_jsonb(g) from groups g where g.id = target_group_id),
+    'members', coalesce(
+      (select jsonb_agg(to_jsonb(m) order by m.name) from members m where m.group_id = target_group_id),
+      '[]'::jsonb
+    ),
+    'festivals', coalesce(
+      (
+        select jsonb_agg(
+          to_jsonb(f) || jsonb_build_object(
+            'artists',
+            coalesce(
+              (select jsonb_agg(to_jsonb(a) order by a.name) from artists a where a.festival_id = f.id),
+              '[]'::jsonb
+            )
+          )
+          order by f.dates_start nulls last, f.name
+        )
+        from festivals f
+        where f.group_id = target_group_id
+      ),
+      '[]'::jsonb
+    ),
+    'recent_calls', coalesce(
+      (
+        select jsonb_agg(to_jsonb(c) order by c.started_at desc)
+        from (
+          select id, group_id, started_at, ended_at, summary
+          from calls
+          where group_id = target_group_id
+          order by started_at desc
+          limit calls_limit
+        ) c
+      ),
+      '[]'::jsonb
+    )
+  );
+$$;
@@ -0,0 +1,6 @@
+-- Migration: Add latency breakdown column to calls table
+-- Stores per-call p50/p95 timings of each bot tool, database call and SQL generation
+
+alter table calls add column latency jsonb;
+
+comment on column calls.latency is 'Per-operation latency for the call as JSONB: {"tool.query_database": {count, p50_ms, p95_ms, max_ms, errors}, "db.start_call": {...}, ...}';
@@ -0,0 +1,76 @@
+-- Migration: Bound the result of execute_readonly_query and page through it
+-- A vague question ("show me all calls") used to serialize every matching row, every
+-- transcript included, into one JSON blob that went straight into the LLM context.
+-- The function now returns one page: at most max_rows rows starting at row_offset,
+-- with exclude_columns dropped and string values cut to max_value_chars, plus whether
+-- more rows are available and the offset of the next page.
+--
+-- statement_timeout is a function setting, which PostgREST applies to the transaction
+-- before calling the function. Change it with:
+--   alter function execute_readonly_query(text, int, int, int, text[]) set statement_timeout = '5s';
+
+drop function if exists execute_readonly_query(text);
+
+create or replace function execute_readonly_query(
+  query text,
+  max_rows int default 50,
+  row_offset int default 0,
+  max_value_chars int default 500,
+  exclude_columns text[] default array['transcript']
+)
+returns jsonb
+language plpgsql
+security definer
+set statement_timeout = '3s'
+as $$
+declare
+  page jsonb;
+  has_more boolean;
+begin
+  -- Only allow SELECT statements
+  if not (trim(lower(query)) like 'select%') then
+    raise exception 'Only SELECT queries are allowed';
+  end if;
+
+  -- One row past the page tells us whether there is a next page.
+  execute format(
+    'select coalesce(jsonb_agg(r order by n), ''[]''::jsonb)
+     from (
+       select row_number() over () as n, to_jsonb(t) - %L::text[] as r
+       from (%s) t
+       offset %s limit %s
+     ) s',
+    exclude_columns, query, row_offset, max_rows + 1
+  )
+  into page;
+
+  has_more := jsonb_array_length(page) > max_rows;
+  if has_more then
+    page := page - max_rows;
+  end if;
+
+  -- Cut long string values so one wide row can't blow up the page either.
+  select coalesce(jsonb_agg(
+    (
+      select coalesce(jsonb_object_agg(
+        kv.key,
+        case
+          when jsonb_typeof(kv.value) = 'string' and length(kv.value #>> '{}') > max_value_chars
+            then to_jsonb(left(kv.value #>> '{}', max_value_chars) || '…')
+          else kv.value
+        end
+      ), '{}'::jsonb)
+      from jsonb_each(elem.value) as kv
+    )
+    order by elem.ordinality
+  ), '[]'::jsonb)
+  into page
+  from jsonb_array_elements(page) with ordinality as elem;
+
+  return jsonb_build_object(
+    'rows', page,
+    'has_more', has_more,
+    'next_offset', case when has_more then row_offset + max_rows end
+  );
+end;
+$$;
@@ -0,0 +1,19 @@
+-- Migration: Indexes for keyset pagination on the REST list endpoints
+-- The list endpoints (backend/pagination.py) return one page at a time, ordered by a
+-- sort column plus id and continued from the last row's (value, id). Each index below
+-- matches one endpoint's ORDER BY, so a page is a range scan from the cursor instead
+-- of a sort of the whole table.
+
+-- GET /calls: newest first. started_at always gets a default; make that a guarantee,
+-- so the cursor filter can bound the scan without handling nulls.
+update calls set started_at = coalesce(ended_at, now()) where started_at is null;
+alter table calls alter column started_at set not null;
+create index if not exists calls_started_at_id_idx on calls (started_at desc, id desc);
+
+-- GET /members, GET /artists: by name.
+create index if not exists members_name_id_idx on members (name, id);
+create index if not exists artists_name_id_idx on artists (name, id);
+
+-- GET /festivals, GET /festival-catalog: by start date, undated last.
+create index if not exists festivals_dates_start_id_idx on festivals (dates_start, id);
+create index if not exists festival_catalog_dates_start_id_idx on festival_catalog (dates_start, id);
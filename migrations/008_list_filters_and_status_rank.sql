@@ -0,0 +1,77 @@
+-- Migration: Member status ranking in SQL, and indexes for the list filters and sorts
+-- The REST list endpoints push filter= and sort= down to PostgREST (backend/filters.py).
+-- Members sort active, pending, inactive by a generated status_rank column instead of
+-- being re-sorted in Python, and each index below serves one common filter or sort.
+
+alter table members add column if not exists status_rank smallint generated always as (
+  case status when 'active' then 0 when 'pending' then 1 when 'inactive' then 2 else 9 end
+) stored;
+
+-- GET /groups/{id}/members (default sort=status,name) and its filters.
+create index if not exists members_group_status_rank_name_idx
+  on members (group_id, status_rank, name);
+
+-- GET /groups/{id}/festivals (default sort=dates_start).
+create index if not exists festivals_group_dates_start_idx on festivals (group_id, dates_start);
+
+-- GET /artists?filter=festival_id:eq:..., and the artists(*) embed of group festivals.
+create index if not exists artists_festival_id_name_idx on artists (festival_id, name);
+
+-- GET /calls?filter=group_id:eq:..., newest first.
+create index if not exists calls_group_started_at_id_idx
+  on calls (group_id, started_at desc, id desc);
+
+-- GET /festival-catalog by price, on-sale date or name; dates_start is covered by
+-- migration 007. The same indexes serve range filters on those columns.
+create index if not exists festival_catalog_ticket_price_id_idx on festival_catalog (ticket_price, id);
+create index if not exists festival_catalog_on_sale_date_id_idx on festival_catalog (on_sale_date, id);
+create index if not exists festival_catalog_name_id_idx on festival_catalog (name, id);
+
+-- get_group_snapshot: members in the same order as GET /groups/{id}/members.
+create or replace function get_group_snapshot(target_group_id uuid, calls_limit int default 3)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'group', (select to_jsonb(g) from groups g where g.id = target_group_id),
+    'members', coalesce(
+      (
+        select jsonb_agg(to_jsonb(m) order by m.status_rank, m.name)
+        from members m
+        where m.group_id = target_group_id
+      ),
+      '[]'::jsonb
+    ),
+    'festivals', coalesce(
+      (
+        select jsonb_agg(
+          to_jsonb(f) || jsonb_build_object(
+            'artists',
+            coalesce(
+              (select jsonb_agg(to_jsonb(a) order by a.name) from artists a where a.festival_id = f.id),
+              '[]'::jsonb
+            )
+          )
+          order by f.dates_start nulls last, f.name
+        )
+        from festivals f
+        where f.group_id = target_group_id
+      ),
+      '[]'::jsonb
+    ),
+    'recent_calls', coalesce(
+      (
+        select jsonb_agg(to_jsonb(c) order by c.started_at desc)
+        from (
+          select id, group_id, started_at, ended_at, summary
+          from calls
+          where group_id = target_group_id
+          order by started_at desc
+          limit calls_limit
+        ) c
+      ),
+      '[]'::jsonb
+    )
+  );
+$$;
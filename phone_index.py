@@ -0,0 +1,187 @@
+"""In-process index from caller phone number to member (with their group).
+
+Every inbound call starts with a caller lookup. Matching the raw string in PostgREST
+costs a round trip and misses whenever Twilio formats a number differently from how
+it was typed into the dashboard ("(415) 555-1234" vs "+14155551234"). Instead, every
+member with a phone is loaded once into a dict keyed by the normalized E.164 number,
+so a lookup is a dict access.
+
+The index is marked stale, and reloaded in the background by the next lookup, when:
+
+- a member is created or updated through db.py (db.on_write),
+- the backend's /members endpoints change a member (POST /phone-index/invalidate on
+  the bot, which supervisor.py fans out to every worker; the request must carry
+  PHONE_INDEX_SECRET in the X-Phone-Index-Secret header),
+- it is older than PHONE_INDEX_TTL seconds, which bounds staleness for edits made
+  anywhere else (e.g. the Supabase SQL editor).
+
+While a stale index reloads, lookups are served from it; a number it doesn't have is
+then looked up directly, in case its member was added since. Only the first lookup
+before any load has to wait for one.
+"""
+
+import asyncio
+import hmac
+import os
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any
+
+from loguru import logger
+
+import db
+import db_async
+import metrics
+
+PHONE_INDEX_TTL = float(os.getenv("PHONE_INDEX_TTL", "300"))
+# Country calling code assumed for numbers written without one (1 = US/Canada).
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "1")
+
+# Carries PHONE_INDEX_SECRET on POST /phone-index/invalidate.
+SECRET_HEADER = "X-Phone-Index-Secret"
+
+_EXTENSION = re.compile(r"(?i)\s*(?:ext\.?|x|#)\s*\d+\s*$")
+_NON_DIGITS = re.compile(r"\D")
+
+_lock = threading.Lock()
+_by_phone: dict[str, dict] = {}
+# When _by_phone was loaded; None while it is stale or was never loaded.
+_loaded_at: float | None = None
+_loaded = False
+_generation = 0
+_reloading: asyncio.Task | None = None
+
+
+def normalize(phone: str | None) -> str | None:
+    """E.164 form of a phone number ("+14155551234"), or None if it can't be one."""
+    if not phone:
+        return None
+    phone = _EXTENSION.sub("", phone.strip())
+    digits = _NON_DIGITS.sub("", phone)
+    if phone.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif PHONE_DEFAULT_COUNTRY_CODE == "1":
+        # North American numbers: 10 digits, or 11 with the leading 1.
+        if len(digits) == 10:
+            digits = "1" + digits
+        elif not (len(digits) == 11 and digits.startswith("1")):
+            return None
+    else:
+        # National format: drop the trunk prefix and add the country code.
+        digits = PHONE_DEFAULT_COUNTRY_CODE + digits.removeprefix("0")
+    if not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        return None
+    return "+" + digits
+
+
+def invalidate() -> None:
+    """Mark the index stale; the next lookup reloads it."""
+    global _loaded_at, _generation
+    with _lock:
+        _loaded_at = None
+        _generation += 1
+    metrics.incr("phone_index.invalidations")
+
+
+def secret_matches(value: str | None) -> bool:
+    """Whether value is PHONE_INDEX_SECRET. Always False while no secret is set, so the
+    invalidate route stays closed until one is configured. Read on use, not at import:
+    this module is imported before the entry points load .env."""
+    secret = os.getenv("PHONE_INDEX_SECRET", "")
+    return bool(secret) and hmac.compare_digest((value or "").encode(), secret.encode())
+
+
+def _fresh() -> bool:
+    return _loaded_at is not None and time.monotonic() - _loaded_at < PHONE_INDEX_TTL
+
+
+def _load() -> int:
+    global _by_phone, _loaded_at, _loaded
+    with _lock:
+        generation = _generation
+    index: dict[str, dict] = {}
+    for member in db.list_members_with_phone():
+        key = normalize(member["phone"])
+        if key is None:
+            logger.warning(f"Member {member['id']} has an unusable phone: {member['phone']!r}")
+        elif key in index:
+            logger.warning(f"Members {index[key]['id']} and {member['id']} share phone {key}")
+        else:
+            index[key] = member
+    with _lock:
+        _by_phone = index
+        _loaded = True
+        # A write that landed while loading may be missing from the result.
+        if generation == _generation:
+            _loaded_at = time.monotonic()
+    metrics.incr("phone_index.reloads")
+    return len(index)
+
+
+def _log_reload_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Phone index reload failed: {task.exception()}")
+
+
+def _reload() -> asyncio.Task:
+    """The in-flight reload, started if there is none."""
+    global _reloading
+    if _reloading is None or _reloading.done():
+        _reloading = asyncio.create_task(db_async.run(_load))
+        _reloading.add_done_callback(_log_reload_error)
+    return _reloading
+
+
+async def refresh() -> int:
+    """Reload the index, sharing one in-flight reload between concurrent callers."""
+    return await asyncio.shield(_reload())
+
+
+async def lookup(phone: str) -> dict[str, Any] | None:
+    """The member (with their group under "groups") who owns this number, or None."""
+    key = normalize(phone)
+    if key is None:
+        return None
+    if not _fresh():
+        if _loaded:
+            _reload()
+        else:
+            try:
+                await refresh()
+            except Exception as e:
+                logger.warning(f"Phone index load failed, looking up {phone} directly: {e}")
+                return await db_async.get_member_by_phone(key, phone)
+    member = _by_phone.get(key)
+    if member is None and not _fresh():
+        metrics.incr("phone_index.stale_misses")
+        return await db_async.get_member_by_phone(key, phone)
+    metrics.incr("phone_index.hits" if member else "phone_index.misses")
+    return dict(member) if member else None
+
+
+async def warm() -> None:
+    try:
+        count = await refresh()
+        logger.info(f"Phone index loaded {count} members")
+    except Exception as e:
+        logger.warning(f"Could not pre-load the phone index: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: Any = None):
+    """FastAPI-style lifespan that loads the index in the background at worker start."""
+    task = asyncio.create_task(warm())
+    try:
+        yield
+    finally:
+        task.cancel()
+
+
+@db.on_write
+def _on_db_write(table: str, group_id: str | None) -> None:
+    if table == "members":
+        invalidate()
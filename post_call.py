@@ -0,0 +1,77 @@
+"""Post-call work, run from the durable job queue after the caller hangs up.
+
+A call's finish_call job is enqueued when the call starts, due POST_CALL_ORPHAN_SECS
+later, and made due at once on a clean hang-up with everything the bot gathered. If
+the worker dies mid-call, the job still runs at the deadline and saves what the
+transcript file holds.
+"""
+
+import asyncio
+import os
+
+from loguru import logger
+
+import db_async
+import jobs
+from call_summary import new_token_count, summarize_transcript
+from transcript import read_transcript
+
+# How long after a call starts its record is finished even if the bot never hung up.
+POST_CALL_ORPHAN_SECS = float(os.getenv("POST_CALL_ORPHAN_SECS", "7200"))
+
+
+async def register_call(transcript_path: str) -> int:
+    """Enqueue the finish_call job for a call that is starting. Returns the job id."""
+    return await jobs.enqueue(
+        "finish_call", {"transcript_path": transcript_path}, delay=POST_CALL_ORPHAN_SECS
+    )
+
+
+async def set_call_id(job_id: int, call_id: str) -> None:
+    """Record the call's database id on its finish_call job once it has one."""
+    if not await jobs.update(job_id, {"call_id": call_id}):
+        logger.warning(f"finish_call job {job_id} already ran; call {call_id} won't be finished")
+
+
+async def finish(job_id: int | None, payload: dict) -> None:
+    """Hand the finished call to its job and run it now. Enqueues a new job if there was
+    none or it already ran at its deadline (a call longer than POST_CALL_ORPHAN_SECS)."""
+    if job_id is None or not await jobs.update(job_id, payload, run_now=True):
+        await jobs.enqueue("finish_call", payload)
+
+
+@jobs.handler("finish_call")
+async def finish_call(payload: dict) -> None:
+    """Finish the call's summary and save it, the transcript file and the call's latency
+    breakdown to its call record.
+
+    The bot hands over the rolling summary it kept during the call and how many
+    transcript turns it covers, so only the turns after those are summarized here.
+    The summary is stored in the payload before the DB write, so a retry after a
+    database failure doesn't pay for the LLM call again. After a crash there is no
+    rolling summary and the transcript may be cut short or missing, so whatever turns
+    made it to disk are summarized.
+    """
+    call_id = payload.get("call_id")
+    if not call_id:
+        logger.info("finish_call: the call never got a call record, nothing to save")
+        return
+    path = payload.get("transcript_path")
+    transcript = await asyncio.to_thread(read_transcript, path) if path else []
+    tokens = payload.setdefault("summary_tokens", new_token_count())
+    if "summary" not in payload:
+        remaining = transcript[payload.get("summarized_turns", 0) :]
+        payload["summary"] = await summarize_transcript(
+            remaining, payload.get("summary_so_far"), tokens
+        )
+        logger.info(
+            f"Summarized call {call_id}: {len(remaining)} turns after hang-up, "
+            f"{payload.get('summarized_turns', 0)} during the call; summary tokens {tokens}"
+        )
+    await db_async.end_call_record(
+        call_id,
+        payload["summary"],
+        transcript=transcript,
+        latency_breakdown=payload.get("latency"),
+    )
+    logger.info(f"Saved call summary for call {call_id}")
@@ -0,0 +1,161 @@
+"""Two-tier cache for the query_database tool.
+
+Tier 1 maps (schema hash, normalized question) to the SQL the generator produced, so a
+repeated question skips the Haiku round trip. Tier 2 maps (SQL, page offset) to the page
+returned by execute_readonly_query, with LRU/TTL eviction. Every result whose SQL names
+a written table is dropped, whichever group the write was for, after a write through
+db.py in this process and after one through the REST backend (it POSTs the tables to
+/query-cache/invalidate). Writes made anywhere else, e.g. in the Supabase SQL editor or
+by another bot worker, reach a cached result at most QUERY_CACHE_RESULT_TTL seconds
+later. Hits, misses and the latency each hit saved are recorded in metrics.py under
+"query_cache.<tier>.*".
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+import db
+import metrics
+
+SQL_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SQL_SIZE", "256"))
+SQL_CACHE_TTL = float(os.getenv("QUERY_CACHE_SQL_TTL", "86400"))
+RESULT_CACHE_SIZE = int(os.getenv("QUERY_CACHE_RESULT_SIZE", "256"))
+RESULT_CACHE_TTL = float(os.getenv("QUERY_CACHE_RESULT_TTL", "60"))
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    question = _PUNCTUATION.sub(" ", question.lower())
+    return _WHITESPACE.sub(" ", question).strip()
+
+
+def schema_hash(schema_sql: str) -> str:
+    return hashlib.sha256(schema_sql.encode()).hexdigest()[:16]
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry TTL.
+
+    Each entry remembers how long it took to produce, so a hit can report the latency
+    it saved.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                metrics.incr(f"query_cache.{self.name}.misses")
+                return None
+            self._entries.move_to_end(key)
+        metrics.incr(f"query_cache.{self.name}.hits")
+        metrics.incr(f"query_cache.{self.name}.saved_ms", entry[1] * 1000)
+        return entry[2]
+
+    def put(self, key: Hashable, value: Any, cost: float = 0.0) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, cost, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate) -> int:
+        """Drop every entry whose key matches predicate; returns how many were dropped."""
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            metrics.incr(f"query_cache.{self.name}.invalidations", len(stale))
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_sql_cache = LRUCache("sql", SQL_CACHE_SIZE, SQL_CACHE_TTL)
+_result_cache = LRUCache("result", RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+
+
+# --- Tier 1: question -> SQL ---
+
+
+def get_sql(schema_digest: str, question: str) -> str | None:
+    return _sql_cache.get((schema_digest, normalize_question(question)))
+
+
+def put_sql(schema_digest: str, question: str, sql: str, cost: float) -> None:
+    _sql_cache.put((schema_digest, normalize_question(question)), sql, cost)
+
+
+def forget_sql(schema_digest: str, question: str) -> None:
+    """Drop generated SQL that failed to run so the next ask regenerates it."""
+    key = (schema_digest, normalize_question(question))
+    _sql_cache.invalidate(lambda k: k == key)
+
+
+# --- Tier 2: (SQL, offset) -> page ---
+
+
+def get_result(sql: str, offset: int = 0) -> Any | None:
+    return _result_cache.get((sql, offset))
+
+
+def put_result(sql: str, result: Any, cost: float, offset: int = 0) -> None:
+    _result_cache.put((sql, offset), result, cost)
+
+
+def invalidate_table(table: str) -> int:
+    """Drop cached results whose SQL mentions table.
+
+    Generated SQL can read any group's rows, so the group of a write doesn't narrow what
+    is stale. Matching the name anywhere in the SQL errs toward dropping too much.
+    """
+    mentions = re.compile(rf"\b{re.escape(table)}\b", re.IGNORECASE)
+    return _result_cache.invalidate(lambda key: mentions.search(key[0]) is not None)
+
+
+def clear() -> None:
+    _sql_cache.clear()
+    _result_cache.clear()
+
+
+def stats() -> dict[str, dict[str, float]]:
+    """Hits, misses, hit rate and total saved latency per tier."""
+    out = {}
+    for tier in ("sql", "result"):
+        hits = metrics.get(f"query_cache.{tier}.hits")
+        misses = metrics.get(f"query_cache.{tier}.misses")
+        out[tier] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "saved_ms": round(metrics.get(f"query_cache.{tier}.saved_ms"), 1),
+        }
+    return out
+
+
+@db.on_write
+def _on_db_write(table: str, group_id: str | None) -> None:
+    invalidate_table(table)
@@ -3,6 +3,7 @@
 create table groups (
   id uuid primary key default gen_random_uuid(),
   name text,
+  description text,
   created_at timestamptz default now()
 );
 
@@ -11,20 +12,30 @@ create table members (
   group_id uuid references groups(id) on delete cascade,
   name text not null,
   city text,
-  phone text
+  phone text,
+  status text not null default 'active', -- active, inactive or pending
+  status_rank smallint generated always as (
+    case status when 'active' then 0 when 'pending' then 1 when 'inactive' then 2 else 9 end
+  ) stored
 );
 
 create unique index members_phone_idx on members (phone) where phone is not null;
+create index members_name_id_idx on members (name, id);
+create index members_group_status_rank_name_idx on members (group_id, status_rank, name);
 
 create table calls (
   id uuid primary key default gen_random_uuid(),
   group_id uuid references groups(id) on delete cascade,
-  started_at timestamptz default now(),
+  started_at timestamptz not null default now(),
   ended_at timestamptz,
   summary text,
-  transcript jsonb
+  transcript jsonb,
+  latency jsonb
 );
 
+create index calls_started_at_id_idx on calls (started_at desc, id desc);
+create index calls_group_started_at_id_idx on calls (group_id, started_at desc, id desc);
+
 create table festivals (
   id uuid primary key default gen_random_uuid(),
   group_id uuid references groups(id) on delete cascade,
@@ -37,6 +48,9 @@ create table festivals (
   status text default 'considering'
 );
 
+create index festivals_dates_start_id_idx on festivals (dates_start, id);
+create index festivals_group_dates_start_idx on festivals (group_id, dates_start);
+
 create table artists (
   id uuid primary key default gen_random_uuid(),
   festival_id uuid references festivals(id) on delete cascade,
@@ -44,6 +58,9 @@ create table artists (
   priority text default 'want_to_see'
 );
 
+create index artists_name_id_idx on artists (name, id);
+create index artists_festival_id_name_idx on artists (festival_id, name);
+
 create table festival_catalog (
   id uuid primary key default gen_random_uuid(),
   name text not null,
@@ -53,3 +70,8 @@ create table festival_catalog (
   ticket_price numeric,
   on_sale_date date
 );
+
+create index festival_catalog_dates_start_id_idx on festival_catalog (dates_start, id);
+create index festival_catalog_ticket_price_id_idx on festival_catalog (ticket_price, id);
+create index festival_catalog_on_sale_date_id_idx on festival_catalog (on_sale_date, id);
+create index festival_catalog_name_id_idx on festival_catalog (name, id);
@@ -0,0 +1,418 @@
+"""Multi-process front end for the voice bot.
+
+`python bot.py` runs every call in one process, so STT, VAD, smart-turn inference and
+LLM streaming for all calls share one core and one GIL. The supervisor starts N
+`bot.py` worker processes on local ports, waits for each to preload its models, and
+sits in front of them on the public port:
+
+- Twilio websockets (/ws) are proxied to the least-loaded worker for their lifetime.
+- Daily sessions (GET / and POST /start) are forwarded to the least-loaded worker,
+  which joins the room itself.
+- A worker takes at most SUPERVISOR_WORKER_CAPACITY calls. Beyond that a new call waits
+  up to SUPERVISOR_QUEUE_TIMEOUT seconds for a free slot, then is rejected (websocket
+  close 1013 / HTTP 503) rather than degrading every call on an overloaded worker.
+- GET /supervisor/stats reports active calls and CPU per worker, the admission queue
+  and reject counts. Workers that exit are restarted.
+- POST /phone-index/invalidate and /query-cache/invalidate (sent by the backend after
+  it writes) are fanned out to every worker, since each keeps its own phone index and
+  query cache. They must carry PHONE_INDEX_SECRET in the X-Phone-Index-Secret header.
+
+    uv run python supervisor.py -t twilio -x <your-ngrok-host> --workers 4
+"""
+
+import argparse
+import asyncio
+import hmac
+import os
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+import aiohttp
+import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response
+from loguru import logger
+
+load_dotenv(override=True)
+
+SUPERVISOR_WORKERS = int(os.getenv("SUPERVISOR_WORKERS", str(os.cpu_count() or 1)))
+SUPERVISOR_WORKER_CAPACITY = int(os.getenv("SUPERVISOR_WORKER_CAPACITY", "4"))
+SUPERVISOR_QUEUE_TIMEOUT = float(os.getenv("SUPERVISOR_QUEUE_TIMEOUT", "5"))
+SUPERVISOR_BASE_PORT = int(os.getenv("SUPERVISOR_BASE_PORT", "7870"))
+SUPERVISOR_POLL_SECS = float(os.getenv("SUPERVISOR_POLL_SECS", "1"))
+SUPERVISOR_STARTUP_TIMEOUT = float(os.getenv("SUPERVISOR_STARTUP_TIMEOUT", "120"))
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+# Headers that describe a single hop and must not be copied onto a forwarded request.
+_HOP_HEADERS = {"host", "content-length", "connection", "transfer-encoding"}
+
+_PHONE_INDEX_SECRET_HEADER = "X-Phone-Index-Secret"
+
+
+def _cpu_seconds(pid: int) -> float | None:
+    """User + system CPU time of a process, from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    # utime and stime are fields 14 and 15 of /proc/<pid>/stat (1-based, after comm).
+    return (int(fields[11]) + int(fields[12])) / _CLK_TCK
+
+
+@dataclass
+class Worker:
+    index: int
+    port: int
+    process: subprocess.Popen | None = None
+    ready: bool = False
+    reported_calls: int = 0
+    # Calls routed since the last poll that the worker may not be reporting yet.
+    pending_calls: int = 0
+    proxied_calls: int = 0
+    total_calls: int = 0
+    restarts: int = 0
+    cpu_percent: float | None = None
+    _cpu_sample: tuple[float, float] | None = field(default=None, repr=False)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def active_calls(self) -> int:
+        return max(self.reported_calls + self.pending_calls, self.proxied_calls)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def sample_cpu(self) -> None:
+        if self.process is None:
+            return
+        cpu = _cpu_seconds(self.process.pid)
+        now = time.monotonic()
+        if cpu is not None and self._cpu_sample is not None:
+            prev_cpu, prev_time = self._cpu_sample
+            self.cpu_percent = round(100 * (cpu - prev_cpu) / max(now - prev_time, 1e-6), 1)
+        self._cpu_sample = (cpu, now) if cpu is not None else None
+
+
+class Supervisor:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.capacity = args.capacity
+        self.workers = [Worker(i, args.base_port + i) for i in range(args.workers)]
+        self.queued = 0
+        self.rejected = 0
+        self._changed = asyncio.Condition()
+        self._session: aiohttp.ClientSession | None = None
+        self._monitor: asyncio.Task | None = None
+
+    # --- Worker processes ---
+
+    def _spawn(self, worker: Worker) -> None:
+        cmd = [
+            sys.executable,
+            "bot.py",
+            "-t",
+            self.args.transport,
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(worker.port),
+        ]
+        if self.args.proxy:
+            cmd += ["-x", self.args.proxy]
+        worker.process = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)))
+        worker.ready = False
+        worker.reported_calls = worker.pending_calls = worker.proxied_calls = 0
+        worker._cpu_sample = None
+        logger.info(f"Started worker {worker.index} (pid {worker.process.pid}) on :{worker.port}")
+
+    async def _poll(self, worker: Worker) -> None:
+        assert self._session is not None
+        try:
+            async with self._session.get(
+                f"{worker.url}/worker/load", timeout=aiohttp.ClientTimeout(total=2)
+            ) as resp:
+                data = await resp.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return
+        if not worker.ready:
+            logger.info(f"Worker {worker.index} is ready")
+        worker.ready = True
+        worker.reported_calls = data["active_calls"]
+        worker.pending_calls = 0
+
+    async def _monitor_workers(self) -> None:
+        while True:
+            for worker in self.workers:
+                if worker.process is not None and not worker.alive:
+                    code = worker.process.returncode
+                    logger.error(f"Worker {worker.index} exited with {code}, restarting")
+                    worker.restarts += 1
+                    self._spawn(worker)
+            await asyncio.gather(*(self._poll(w) for w in self.workers if w.alive))
+            for worker in self.workers:
+                worker.sample_cpu()
+            async with self._changed:
+                self._changed.notify_all()
+            await asyncio.sleep(SUPERVISOR_POLL_SECS)
+
+    async def start(self) -> None:
+        self._session = aiohttp.ClientSession()
+        for worker in self.workers:
+            self._spawn(worker)
+        self._monitor = asyncio.create_task(self._monitor_workers())
+        deadline = time.monotonic() + SUPERVISOR_STARTUP_TIMEOUT
+        while not all(w.ready for w in self.workers) and time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+        ready = sum(w.ready for w in self.workers)
+        logger.info(f"{ready}/{len(self.workers)} workers ready, capacity {self.capacity} each")
+
+    async def stop(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+        for worker in self.workers:
+            if worker.alive:
+                worker.process.terminate()  # type: ignore[union-attr]
+        for worker in self.workers:
+            if worker.process is not None:
+                try:
+                    await asyncio.to_thread(worker.process.wait, 10)
+                except subprocess.TimeoutExpired:
+                    worker.process.kill()
+        if self._session is not None:
+            await self._session.close()
+
+    # --- Admission control ---
+
+    def _least_loaded(self) -> Worker | None:
+        candidates = [
+            w for w in self.workers if w.ready and w.alive and w.active_calls < self.capacity
+        ]
+        return min(candidates, key=lambda w: w.active_calls, default=None)
+
+    async def acquire(self) -> Worker | None:
+        """Pick a worker with a free slot, waiting up to the queue timeout. None if full."""
+        worker = self._least_loaded()
+        if worker is None and SUPERVISOR_QUEUE_TIMEOUT > 0:
+            self.queued += 1
+            try:
+                async with self._changed:
+                    await asyncio.wait_for(
+                        self._changed.wait_for(lambda: self._least_loaded() is not None),
+                        timeout=SUPERVISOR_QUEUE_TIMEOUT,
+                    )
+                worker = self._least_loaded()
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self.queued -= 1
+        if worker is None:
+            self.rejected += 1
+            logger.warning(f"All {len(self.workers)} workers at capacity, rejecting call")
+            return None
+        worker.pending_calls += 1
+        worker.total_calls += 1
+        return worker
+
+    async def release(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "capacity_per_worker": self.capacity,
+            "active_calls": sum(w.active_calls for w in self.workers),
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "workers": [
+                {
+                    "index": w.index,
+                    "port": w.port,
+                    "pid": w.process.pid if w.process else None,
+                    "ready": w.ready and w.alive,
+                    "active_calls": w.active_calls,
+                    "total_calls": w.total_calls,
+                    "cpu_percent": w.cpu_percent,
+                    "restarts": w.restarts,
+                }
+                for w in self.workers
+            ],
+        }
+
+    # --- Forwarding ---
+
+    async def forward_http(self, worker: Worker, request: Request) -> Response:
+        return await self.send(worker, request, await request.body())
+
+    async def send(self, worker: Worker, request: Request, body: bytes) -> Response:
+        """Send request to worker with an already-read body, which may go to several."""
+        assert self._session is not None
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _HOP_HEADERS}
+        async with self._session.request(
+            request.method,
+            f"{worker.url}{request.url.path}",
+            params=request.query_params,
+            headers=headers,
+            data=body,
+            allow_redirects=False,
+        ) as resp:
+            body = await resp.read()
+            out_headers = {
+                k: v for k, v in resp.headers.items() if k.lower() not in _HOP_HEADERS
+            }
+            return Response(content=body, status_code=resp.status, headers=out_headers)
+
+    async def proxy_websocket(self, worker: Worker, websocket: WebSocket) -> None:
+        assert self._session is not None
+        worker.proxied_calls += 1
+        try:
+            async with self._session.ws_connect(f"ws://127.0.0.1:{worker.port}/ws") as upstream:
+
+                async def client_to_worker():
+                    while True:
+                        message = await websocket.receive()
+                        if message["type"] == "websocket.disconnect":
+                            break
+                        if message.get("text") is not None:
+                            await upstream.send_str(message["text"])
+                        elif message.get("bytes") is not None:
+                            await upstream.send_bytes(message["bytes"])
+
+                async def worker_to_client():
+                    async for message in upstream:
+                        if message.type == aiohttp.WSMsgType.TEXT:
+                            await websocket.send_text(message.data)
+                        elif message.type == aiohttp.WSMsgType.BINARY:
+                            await websocket.send_bytes(message.data)
+                        else:
+                            break
+
+                pumps = [
+                    asyncio.create_task(client_to_worker()),
+                    asyncio.create_task(worker_to_client()),
+                ]
+                done, pending = await asyncio.wait(pumps, return_when=asyncio.FIRST_COMPLETED)
+                for task in pending:
+                    task.cancel()
+                for task in done:
+                    error = task.exception()
+                    if error is not None and not isinstance(error, WebSocketDisconnect):
+                        logger.warning(f"Websocket proxy to worker {worker.index}: {error}")
+        except aiohttp.ClientError as e:
+            logger.error(f"Could not connect to worker {worker.index}: {e}")
+        finally:
+            worker.proxied_calls -= 1
+            try:
+                await websocket.close()
+            except RuntimeError:
+                pass
+            await self.release()
+
+
+def create_app(supervisor: Supervisor) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await supervisor.start()
+        try:
+            yield
+        finally:
+            await supervisor.stop()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/supervisor/stats")
+    async def stats():
+        return supervisor.stats()
+
+    @app.websocket("/ws")
+    async def websocket_endpoint(websocket: WebSocket):
+        worker = await supervisor.acquire()
+        await websocket.accept()
+        if worker is None:
+            await websocket.close(code=1013)  # Try Again Later
+            return
+        await supervisor.proxy_websocket(worker, websocket)
+
+    async def forward_to_any(request: Request) -> Response:
+        """Stateless routes (TwiML webhook, status): any ready worker can answer."""
+        worker = min(
+            (w for w in supervisor.workers if w.ready and w.alive),
+            key=lambda w: w.active_calls,
+            default=None,
+        )
+        if worker is None:
+            return JSONResponse({"error": "No workers ready"}, status_code=503)
+        return await supervisor.forward_http(worker, request)
+
+    async def forward_new_session(request: Request) -> Response:
+        """Routes that start a call on the worker that handles them (Daily)."""
+        worker = await supervisor.acquire()
+        if worker is None:
+            return JSONResponse({"error": "All workers are at capacity"}, status_code=503)
+        try:
+            return await supervisor.forward_http(worker, request)
+        finally:
+            await supervisor.release()
+
+    async def fan_out_invalidation(request: Request):
+        secret = os.getenv("PHONE_INDEX_SECRET", "")
+        given = request.headers.get(_PHONE_INDEX_SECRET_HEADER, "")
+        if not secret or not hmac.compare_digest(given.encode(), secret.encode()):
+            return JSONResponse({"error": "Forbidden"}, status_code=403)
+        body = await request.body()
+        workers = [w for w in supervisor.workers if w.ready and w.alive]
+        results = await asyncio.gather(
+            *(supervisor.send(w, request, body) for w in workers), return_exceptions=True
+        )
+        failed = [
+            w.port
+            for w, r in zip(workers, results)
+            if isinstance(r, BaseException) or r.status_code != 200
+        ]
+        for port in failed:
+            logger.warning(f"Could not forward {request.url.path} to worker :{port}")
+        return {"workers": len(workers) - len(failed), "failed": failed}
+
+    for path in ("/phone-index/invalidate", "/query-cache/invalidate"):
+        app.add_api_route(path, fan_out_invalidation, methods=["POST"])
+
+    if supervisor.args.transport == "daily":
+        app.add_api_route("/", forward_new_session, methods=["GET"])
+        app.add_api_route("/start", forward_new_session, methods=["POST"])
+    else:
+        app.add_api_route("/", forward_to_any, methods=["GET", "POST"])
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run several bot.py workers behind one port")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=7860)
+    parser.add_argument(
+        "-t",
+        "--transport",
+        default="twilio",
+        choices=["twilio", "telnyx", "plivo", "exotel", "daily"],
+        help="WebRTC is not supported: its offer/ICE exchange needs sticky sessions",
+    )
+    parser.add_argument("-x", "--proxy", help="Public proxy host name (telephony webhooks)")
+    parser.add_argument("--workers", type=int, default=SUPERVISOR_WORKERS)
+    parser.add_argument("--capacity", type=int, default=SUPERVISOR_WORKER_CAPACITY)
+    parser.add_argument("--base-port", type=int, default=SUPERVISOR_BASE_PORT)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(Supervisor(args)), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
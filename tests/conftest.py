@@ -0,0 +1,47 @@
+"""Shared test setup.
+
+db.py and bot-side modules read their credentials at import; the tests never reach
+those services, so placeholders are enough. QueryRecorder stands in for a PostgREST
+query builder and records what the code under test asked for, and fake_db points db.py
+at an in-memory PostgREST (benchmarks/fake_postgrest.py).
+"""
+
+import os
+
+import pytest
+
+for _name, _value in {
+    "SUPABASE_URL": "http://localhost:1",
+    "SUPABASE_API_KEY": "test",
+    "ANTHROPIC_API_KEY": "test",
+    "CARTESIA_API_KEY": "test",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+
+class QueryRecorder:
+    """Chainable like a postgrest request builder; calls holds (method, *args)."""
+
+    def __init__(self):
+        self.calls: list[tuple] = []
+
+    def __getattr__(self, method: str):
+        def record(*args, **kwargs):
+            self.calls.append((method, *args, *kwargs.items()))
+            return self
+
+        return record
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """A FakePostgrest with empty groups, members, festivals and artists tables, which
+    db.py talks to for the test."""
+    import db
+    from benchmarks.fake_postgrest import FakePostgrest
+
+    tables: dict[str, list[dict]] = {"groups": [], "members": [], "festivals": [], "artists": []}
+    with FakePostgrest(delay=0, tables=tables) as fake:
+        monkeypatch.setattr(db, "SUPABASE_URL", fake.url)
+        monkeypatch.setattr(db, "_client", None)
+        yield fake
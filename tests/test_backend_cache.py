@@ -0,0 +1,107 @@
+import asyncio
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import backend.main as backend_main
+from backend.cache import ResponseCache, cache, cached_response
+from backend.filters import cache_variant
+from backend.models import Festival
+
+
+def test_second_get_is_a_hit():
+    loads = []
+
+    async def load(response):
+        loads.append(1)
+        return {"n": len(loads)}
+
+    async def run():
+        responses = ResponseCache(ttl=60)
+        first = await responses.get("route", "g1", (), load)
+        second = await responses.get("route", "g1", (), load)
+        return responses, first, second
+
+    responses, first, second = asyncio.run(run())
+    assert second is first
+    assert loads == [1]
+    assert responses.stats()["route"]["hits"] == 1
+
+
+def test_invalidated_during_load_is_not_stored():
+    async def run():
+        responses = ResponseCache(ttl=60)
+
+        async def load(response):
+            # A write lands while the read is in flight.
+            responses.invalidate("route", "g1")
+            return {"old": True}
+
+        entry = await responses.get("route", "g1", (), load)
+        return responses, entry
+
+    responses, entry = asyncio.run(run())
+    assert entry.body == b'{"old":true}'
+    assert responses.stats()["route"]["entries"] == 0
+
+
+def test_matching_if_none_match_is_304():
+    app = FastAPI()
+    loads = []
+
+    @app.get("/items")
+    async def items(request: Request):
+        async def load(response):
+            loads.append(1)
+            response.headers["X-Next-Cursor"] = "abc"
+            return [1, 2]
+
+        return await cached_response(request, "test-items", None, (), load)
+
+    client = TestClient(app)
+    first = client.get("/items")
+    assert first.json() == [1, 2]
+    assert first.headers["X-Next-Cursor"] == "abc"
+    etag = first.headers["ETag"]
+
+    again = client.get("/items", headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["X-Next-Cursor"] == "abc"
+    assert client.get("/items", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert loads == [1]
+    cache.invalidate("test-items")
+
+
+def test_variant_is_parsed():
+    sorts = {"name": "name", "status": "status"}
+    filters = ("name", "ticket_price", "status")
+    assert cache_variant(
+        Festival, "status,-name", ["ticket_price:lte:300", "status:in:a,b"], sorts, filters
+    ) == cache_variant(
+        Festival, "status, -name", ["status:in:a,b", "ticket_price:lte:300.0"], sorts, filters
+    )
+    assert cache_variant(Festival, "name", None, sorts, filters) != cache_variant(
+        Festival, "-name", None, sorts, filters
+    )
+
+
+def test_bot_invalidation_needs_the_secret(monkeypatch):
+    monkeypatch.setattr(backend_main, "PHONE_INDEX_SECRET", "s3cret")
+    group_id = str(uuid.uuid4())
+
+    async def load(response):
+        return []
+
+    asyncio.run(cache.get("group-members", group_id, (), load))
+    client = TestClient(backend_main.app)
+    body = {"table": "members", "parent_ids": [group_id]}
+
+    forbidden = client.post("/cache/invalidate", json=body, headers={"X-Phone-Index-Secret": "x"})
+    assert forbidden.status_code == 403
+    assert cache.stats()["group-members"]["entries"] == 1
+
+    ok = client.post("/cache/invalidate", json=body, headers={"X-Phone-Index-Secret": "s3cret"})
+    assert ok.status_code == 200
+    assert cache.stats()["group-members"]["entries"] == 0
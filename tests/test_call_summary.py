@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+import call_summary
+import db_async
+import post_call
+from call_summary import RollingSummarizer
+from transcript import TranscriptWriter
+
+
+@pytest.fixture
+def summaries(monkeypatch):
+    """Replaces the Haiku call: each summary lists the turns folded into it so far."""
+    calls: list[tuple[list[str], str | None]] = []
+
+    async def summarize(turns, previous=None, tokens=None):
+        calls.append(([t["content"] for t in turns], previous))
+        if tokens is not None:
+            tokens["requests"] += 1
+        return ",".join(filter(None, [previous, *(t["content"] for t in turns)]))
+
+    monkeypatch.setattr(call_summary, "summarize_transcript", summarize)
+    monkeypatch.setattr(post_call, "summarize_transcript", summarize)
+    return calls
+
+
+def _turn(i: int) -> dict:
+    return {"role": "user" if i % 2 else "assistant", "content": f"t{i}"}
+
+
+async def _settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_rolling_summary_covers_whole_batches(summaries):
+    async def run():
+        summarizer = RollingSummarizer(every_turns=2)
+        for i in range(5):
+            summarizer.append(_turn(i))
+            await _settle()
+        return await summarizer.close()
+
+    handoff = asyncio.run(run())
+    assert summaries == [(["t0", "t1"], None), (["t2", "t3"], "t0,t1")]
+    assert handoff["summary_so_far"] == "t0,t1,t2,t3"
+    assert handoff["summarized_turns"] == 4
+    assert handoff["summary_tokens"]["requests"] == 2
+
+
+def test_failed_update_keeps_its_turns_for_the_next(summaries, monkeypatch):
+    async def fail_once(turns, previous=None, tokens=None):
+        monkeypatch.undo()
+        raise RuntimeError("overloaded")
+
+    async def run():
+        summarizer = RollingSummarizer(every_turns=2)
+        monkeypatch.setattr(call_summary, "summarize_transcript", fail_once)
+        summarizer.append(_turn(0))
+        summarizer.append(_turn(1))
+        await _settle()
+        monkeypatch.setattr(call_summary, "summarize_transcript", summaries_fn)
+        summarizer.append(_turn(2))
+        await _settle()
+        return await summarizer.close()
+
+    summaries_fn = post_call.summarize_transcript
+    handoff = asyncio.run(run())
+    assert handoff["summarized_turns"] == 3
+    assert summaries == [(["t0", "t1", "t2"], None)]
+
+
+def test_finish_call_summarizes_only_turns_after_the_handoff(summaries, monkeypatch, tmp_path):
+    saved = []
+
+    async def end_call_record(call_id, summary, transcript=None, latency_breakdown=None):
+        saved.append((call_id, summary, transcript))
+
+    monkeypatch.setattr(db_async, "end_call_record", end_call_record)
+
+    async def run():
+        transcript = TranscriptWriter(directory=str(tmp_path))
+        summarizer = RollingSummarizer(every_turns=2)
+        for i in range(5):
+            turn = _turn(i)
+            transcript.append(turn)
+            summarizer.append(turn)
+            await _settle()
+        payload = {
+            "call_id": "c1",
+            "transcript_path": await transcript.close(),
+            **await summarizer.close(),
+        }
+        await post_call.finish_call(payload)
+        return payload
+
+    payload = asyncio.run(run())
+    assert summaries[-1] == (["t4"], "t0,t1,t2,t3")
+    assert saved == [("c1", "t0,t1,t2,t3,t4", [_turn(i) for i in range(5)])]
+    # Kept in the payload, so a retry after a failed save skips the LLM call.
+    assert payload["summary"] == "t0,t1,t2,t3,t4"
+    assert payload["summary_tokens"]["requests"] == 3
@@ -0,0 +1,61 @@
+import pytest
+
+import db
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """(table, group id) of every write db.py announces to its listeners."""
+    notified: list[tuple[str, str | None]] = []
+    monkeypatch.setattr(db, "_write_listeners", [lambda *write: notified.append(write)])
+    return notified
+
+
+def test_add_members_is_one_insert(fake_db, writes):
+    added = db.add_members(
+        "g1", [{"name": "Sam", "city": "Austin", "id": "m1"}, {"name": "Kim", "phone": "+1415"}]
+    )
+    assert fake_db.requests == 1
+    assert [m["name"] for m in added] == ["Sam", "Kim"]
+    assert added[0]["id"] == "m1" and added[1]["id"]
+    # Columns a row leaves out are left to their database default, not sent as null.
+    assert fake_db.tables["members"][0] == {
+        "id": "m1", "group_id": "g1", "name": "Sam", "city": "Austin"
+    }
+    assert "city" not in fake_db.tables["members"][1]
+    assert writes == [("members", "g1")]
+
+
+def test_add_festivals_is_one_insert(fake_db, writes):
+    added = db.add_festivals(
+        "g1",
+        [
+            {"name": "Coachella", "dates_start": "2026-04-10", "ticket_price": 0},
+            {"name": "Lollapalooza", "status": "committed"},
+        ],
+    )
+    assert fake_db.requests == 1
+    first, second = fake_db.tables["festivals"]
+    assert first["ticket_price"] == "0" and first["status"] == "considering"
+    assert "location" not in first
+    assert second["status"] == "committed" and "dates_start" not in second
+    assert [f["id"] for f in added] == [first["id"], second["id"]]
+    assert writes == [("festivals", "g1")]
+
+
+def test_add_artists_is_one_insert(fake_db, writes):
+    db.add_artists("f1", [{"name": "A", "id": "a1"}, {"name": "B", "priority": "must_see"}])
+    assert fake_db.requests == 1
+    assert [(a["festival_id"], a["name"], a["priority"]) for a in fake_db.tables["artists"]] == [
+        ("f1", "A", "want_to_see"),
+        ("f1", "B", "must_see"),
+    ]
+    assert fake_db.tables["artists"][0]["id"] == "a1"
+    assert writes == [("artists", None)]
+
+
+@pytest.mark.parametrize("add", [db.add_members, db.add_festivals, db.add_artists])
+def test_nothing_to_add_makes_no_request(fake_db, writes, add):
+    assert add("parent", []) == []
+    assert fake_db.requests == 0
+    assert writes == []
@@ -0,0 +1,71 @@
+import pytest
+from conftest import QueryRecorder
+from fastapi import HTTPException
+
+from backend.filters import apply_filters, keyset, order_by
+from backend.models import Festival, Member
+from backend.pagination import Keyset
+
+FESTIVAL_FILTERS = ("name", "dates_start", "ticket_price", "status")
+
+
+def test_each_filter_becomes_a_condition():
+    query = apply_filters(
+        QueryRecorder(),
+        Festival,
+        ["ticket_price:lte:300", "dates_start:gte:2026-06-01", "status:in:committed,considering"],
+        FESTIVAL_FILTERS,
+    )
+    assert query.calls == [
+        ("filter", "ticket_price", "lte", "300.0"),
+        ("filter", "dates_start", "gte", "2026-06-01"),
+        ("in_", "status", ["committed", "considering"]),
+    ]
+
+
+def test_value_may_contain_colons():
+    query = apply_filters(QueryRecorder(), Member, ["name:eq:a:b"], ("name",))
+    assert query.calls == [("filter", "name", "eq", "a:b")]
+
+
+def test_no_filters():
+    assert apply_filters(QueryRecorder(), Member, None, ("name",)).calls == []
+
+
+@pytest.mark.parametrize(
+    "spec, detail",
+    [
+        ("group_id:eq:x", "Unknown filter field"),
+        ("name:like:x", "Invalid filter"),
+        ("name", "Invalid filter"),
+        ("ticket_price:lt:cheap", "Invalid value for ticket_price"),
+        ("dates_start:eq:June", "Invalid value for dates_start"),
+    ],
+)
+def test_bad_filters_are_400(spec, detail):
+    with pytest.raises(HTTPException) as e:
+        apply_filters(QueryRecorder(), Festival, [spec], FESTIVAL_FILTERS)
+    assert e.value.status_code == 400
+    assert detail in e.value.detail
+
+
+def test_order_by_maps_fields_to_columns():
+    query = order_by(QueryRecorder(), "status,-name", {"status": "status_rank", "name": "name"})
+    assert query.calls == [
+        ("order", "status_rank", ("desc", False)),
+        ("order", "name", ("desc", True)),
+    ]
+
+
+def test_keyset_takes_direction_from_the_sort():
+    sorts = {"dates_start": Keyset("dates_start", nullable=True)}
+    assert keyset("-dates_start", sorts) == Keyset("dates_start", desc=True, nullable=True)
+    assert keyset("dates_start", sorts) == Keyset("dates_start", nullable=True)
+
+
+@pytest.mark.parametrize("sort", ["price", "name,dates_start"])
+def test_keyset_rejects_unknown_or_several_fields(sort):
+    sorts = {"name": Keyset("name"), "dates_start": Keyset("dates_start")}
+    with pytest.raises(HTTPException) as e:
+        keyset(sort, sorts)
+    assert e.value.status_code == 400
@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+
+import jobs
+from jobs import JobQueue
+
+
+@pytest.fixture
+def ran(monkeypatch):
+    """Payloads the "test" handler was called with. It fails while the payload's "fail"
+    count is positive, counting it down on each attempt."""
+    calls: list[dict] = []
+
+    async def run(payload):
+        calls.append(dict(payload))
+        if payload.get("fail", 0) > 0:
+            payload["fail"] -= 1
+            raise RuntimeError("handler failed")
+
+    monkeypatch.setitem(jobs._handlers, "test", run)
+    return calls
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch, ran):
+    """A JobQueue in its own file, with short backoff and polling."""
+    monkeypatch.setattr(jobs, "JOBS_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(jobs, "JOBS_POLL_SECS", 0.01)
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), concurrency=1)
+
+
+def _status(queue: JobQueue, job_id: int) -> tuple:
+    return queue._execute("select status, attempts from jobs where id = ?", (job_id,))[0]
+
+
+def test_claim_takes_a_due_job_once(queue):
+    job_id = queue._insert("test", {"n": 1})
+    claimed = queue._claim()
+    assert claimed is not None
+    assert claimed[:4] == (job_id, "test", {"n": 1}, 1)
+    assert queue._claim() is None
+    assert _status(queue, job_id) == ("running", 1)
+
+
+def test_delayed_job_is_not_due(queue):
+    queue._insert("test", {}, delay=60)
+    assert queue._claim() is None
+
+
+def test_expired_lease_is_claimed_again(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_LEASE_SECS", -1)
+    job_id = queue._insert("test", {})
+    queue._claim()
+    again = queue._claim()
+    assert again is not None and again[0] == job_id and again[3] == 2
+
+
+def test_failed_attempt_backs_off_and_keeps_payload_changes(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_BACKOFF_BASE", 60)
+    job_id = queue._insert("test", {"step": 0})
+    queue._claim()
+    queue._fail(job_id, {"step": 1}, attempt=1, error="boom")
+    status, run_at, last_error, payload = queue._execute(
+        "select status, run_at, last_error, payload from jobs where id = ?", (job_id,)
+    )[0]
+    assert (status, last_error, payload) == ("pending", "boom", '{"step": 1}')
+    assert run_at > time.time() + 50
+    assert queue._claim() is None
+
+
+def test_last_attempt_fails_permanently(queue):
+    job_id = queue._insert("test", {})
+    queue._claim()
+    queue._fail(job_id, {}, attempt=jobs.JOBS_MAX_ATTEMPTS, error="boom")
+    assert _status(queue, job_id)[0] == "failed"
+    assert queue._claim() is None
+
+
+def test_update_changes_only_pending_jobs(queue):
+    job_id = queue._insert("test", {"a": 1}, delay=60)
+    assert queue._update(job_id, {"b": 2}, run_now=True)
+    claimed = queue._claim()
+    assert claimed is not None and claimed[2] == {"a": 1, "b": 2}
+    assert not queue._update(job_id, {"c": 3}, run_now=False)
+
+
+def test_worker_retries_until_the_handler_succeeds(queue, ran):
+    async def run():
+        queue.start()
+        job_id = await queue.enqueue("test", {"fail": 2})
+        for _ in range(200):
+            if not queue._execute("select 1 from jobs where id = ?", (job_id,)):
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(run())
+    assert ran == [{"fail": 2}, {"fail": 1}, {"fail": 0}]
+    assert queue._execute("select count(*) from jobs") == [(0,)]
+
+
+def test_worker_survives_a_storage_error(queue, ran, monkeypatch):
+    claim = queue._claim
+    calls = []
+
+    def flaky_claim():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        return claim()
+
+    monkeypatch.setattr(queue, "_claim", flaky_claim)
+
+    async def run():
+        queue.start()
+        await queue.enqueue("test", {"n": 1})
+        for _ in range(200):
+            if ran:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(run())
+    assert ran == [{"n": 1}]
+    assert len(calls) > 1
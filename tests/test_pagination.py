@@ -0,0 +1,74 @@
+import pytest
+from conftest import QueryRecorder
+from fastapi import HTTPException
+
+from backend.pagination import Keyset, _after, _decode, _encode
+
+NAME = Keyset("name")
+NEWEST = Keyset("started_at", desc=True)
+DATES = Keyset("dates_start", nullable=True)
+
+
+def test_cursor_round_trip():
+    cursor = _encode({"id": "abc", "name": "Zoë, \"the\" (one)"}, NAME)
+    assert _decode(cursor, NAME) == ('Zoë, "the" (one)', "abc")
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm90IGpzb24", "WzEsMiwzXQ", ""])
+def test_malformed_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as e:
+        _decode(cursor, NAME)
+    assert e.value.status_code == 400
+
+
+def test_cursor_from_another_sort_is_400():
+    cursor = _encode({"id": "abc", "name": "x"}, NAME)
+    with pytest.raises(HTTPException) as e:
+        _decode(cursor, Keyset("name", desc=True))
+    assert e.value.status_code == 400
+    assert "another sort" in e.value.detail
+
+
+def test_after_ascending():
+    query = _after(QueryRecorder(), NAME, _encode({"id": "i1", "name": "Bo"}, NAME))
+    assert query.calls == [
+        ("filter", "name", "gte", "Bo"),
+        ("or_", 'name.gt."Bo",and(name.eq."Bo",id.gt."i1")'),
+    ]
+
+
+def test_after_descending():
+    cursor = _encode({"id": "i1", "started_at": "2026-01-01T00:00:00"}, NEWEST)
+    query = _after(QueryRecorder(), NEWEST, cursor)
+    assert query.calls == [
+        ("filter", "started_at", "lte", "2026-01-01T00:00:00"),
+        (
+            "or_",
+            'started_at.lt."2026-01-01T00:00:00",'
+            'and(started_at.eq."2026-01-01T00:00:00",id.lt."i1")',
+        ),
+    ]
+
+
+def test_after_nullable_column_continues_into_nulls():
+    cursor = _encode({"id": "i1", "dates_start": "2026-05-01"}, DATES)
+    query = _after(QueryRecorder(), DATES, cursor)
+    assert query.calls == [
+        (
+            "or_",
+            'dates_start.gt."2026-05-01",'
+            'and(dates_start.eq."2026-05-01",id.gt."i1"),dates_start.is.null',
+        ),
+    ]
+
+
+def test_after_a_null_stays_among_the_nulls():
+    cursor = _encode({"id": "i1", "dates_start": None}, DATES)
+    query = _after(QueryRecorder(), DATES, cursor)
+    assert query.calls == [("is_", "dates_start", "null"), ("filter", "id", "gt", "i1")]
+
+
+def test_after_quotes_reserved_characters():
+    cursor = _encode({"id": "i1", "name": 'a,b) "c"'}, NAME)
+    (_, (_, condition)) = _after(QueryRecorder(), NAME, cursor).calls
+    assert condition.startswith('name.gt."a,b) \\"c\\"",')
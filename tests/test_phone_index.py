@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+import db
+import phone_index
+
+
+@pytest.fixture
+def index(fake_db, monkeypatch):
+    """phone_index with no index loaded, reading members from fake_db three at a time."""
+    monkeypatch.setattr(db, "DB_PAGE_SIZE", 3)
+    monkeypatch.setattr(phone_index, "_by_phone", {})
+    monkeypatch.setattr(phone_index, "_loaded_at", None)
+    monkeypatch.setattr(phone_index, "_loaded", False)
+    monkeypatch.setattr(phone_index, "_reloading", None)
+    members = fake_db.tables["members"]
+    for i in range(8):
+        phone = f"+1415555000{i}"
+        members.append({"id": f"m{i}", "group_id": "g1", "name": f"M{i}", "phone": phone})
+    members.append({"id": "m8", "group_id": "g1", "name": "No phone", "phone": None})
+    return fake_db
+
+
+@pytest.mark.parametrize(
+    "raw, e164",
+    [
+        ("+1 (415) 555-1234", "+14155551234"),
+        ("(415) 555-1234", "+14155551234"),
+        ("1-415-555-1234", "+14155551234"),
+        ("415.555.1234 ext. 12", "+14155551234"),
+        ("0044 20 7946 0958", "+442079460958"),
+        ("+44 20 7946 0958", "+442079460958"),
+        ("555-1234", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_normalize(raw, e164):
+    assert phone_index.normalize(raw) == e164
+
+
+def test_normalize_national_numbers_with_another_country_code(monkeypatch):
+    monkeypatch.setattr(phone_index, "PHONE_DEFAULT_COUNTRY_CODE", "44")
+    assert phone_index.normalize("020 7946 0958") == "+442079460958"
+
+
+def test_lookup_loads_every_page_then_answers_from_the_index(index):
+    async def run():
+        first = await phone_index.lookup("(415) 555-0007")
+        requests = index.requests
+        second = await phone_index.lookup("415-555-0001")
+        return first, second, index.requests - requests
+
+    first, second, requests = asyncio.run(run())
+    assert first is not None and first["id"] == "m7"
+    assert second is not None and second["id"] == "m1"
+    assert requests == 0
+    assert len(phone_index._by_phone) == 8
+
+
+def test_stale_index_serves_while_it_reloads_and_misses_go_to_the_database(
+    index, monkeypatch
+):
+    reloads = []
+
+    async def run():
+        await phone_index.lookup("+14155550000")
+        index.tables["members"].append(
+            {"id": "m9", "group_id": "g1", "name": "New", "phone": "+14155550009"}
+        )
+        phone_index.invalidate()
+        # Hold the background reload back, as if it were still running.
+        with monkeypatch.context() as m:
+            m.setattr(phone_index, "_reload", lambda: reloads.append(1))
+            requests = index.requests
+            known = await phone_index.lookup("+14155550001")
+            assert index.requests == requests
+            added = await phone_index.lookup("(415) 555-0009")
+            assert index.requests == requests + 1
+        await phone_index.refresh()
+        return known, added
+
+    known, added = asyncio.run(run())
+    assert reloads == [1, 1]
+    assert known is not None and known["id"] == "m1"
+    assert added is not None and added["id"] == "m9"
+    assert phone_index._fresh()
+    assert "+14155550009" in phone_index._by_phone
+
+
+def test_unknown_number_is_none(index):
+    assert asyncio.run(phone_index.lookup("+14155559999")) is None
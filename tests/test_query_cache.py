@@ -0,0 +1,71 @@
+import pytest
+
+import db
+import query_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    query_cache.clear()
+    yield
+    query_cache.clear()
+
+
+def test_sql_is_keyed_by_schema_and_normalized_question():
+    query_cache.put_sql("s1", "Which festivals is Jake's crew considering?", "select 1", 0.5)
+    assert query_cache.get_sql("s1", "which festivals is jake's crew   considering") == "select 1"
+    assert query_cache.get_sql("s2", "Which festivals is Jake's crew considering?") is None
+
+
+def test_forget_sql_drops_only_that_question():
+    query_cache.put_sql("s1", "members?", "select 1", 0)
+    query_cache.put_sql("s1", "festivals?", "select 2", 0)
+    query_cache.forget_sql("s1", "Members")
+    assert query_cache.get_sql("s1", "members?") is None
+    assert query_cache.get_sql("s1", "festivals?") == "select 2"
+
+
+def test_each_page_is_cached_separately():
+    sql = "select name from members order by id"
+    query_cache.put_result(sql, {"rows": ["first"]}, 0.1)
+    query_cache.put_result(sql, {"rows": ["second"]}, 0.1, offset=50)
+    assert query_cache.get_result(sql) == {"rows": ["first"]}
+    assert query_cache.get_result(sql, 50) == {"rows": ["second"]}
+    assert query_cache.get_result(sql, 100) is None
+
+
+def test_invalidate_table_matches_whole_names_in_any_case():
+    query_cache.put_result("SELECT * FROM Members ORDER BY id", "members", 0)
+    query_cache.put_result("select * from members order by id", "members page 2", 0, offset=50)
+    query_cache.put_result("select * from festival_catalog order by id", "catalog", 0)
+    query_cache.put_result("select * from festivals join artists on festival_id = id", 1, 0)
+
+    assert query_cache.invalidate_table("members") == 2
+    assert query_cache.invalidate_table("festival") == 0
+    assert query_cache.invalidate_table("artists") == 1
+    assert query_cache.get_result("select * from festival_catalog order by id") == "catalog"
+
+
+def test_a_db_write_drops_results_reading_its_table():
+    query_cache.put_result("select * from members order by id", "members", 0)
+    query_cache.put_result("select * from calls order by id", "calls", 0)
+    db._notify_write("members", "g1")
+    assert query_cache.get_result("select * from members order by id") is None
+    assert query_cache.get_result("select * from calls order by id") == "calls"
+
+
+def test_least_recently_used_entry_is_dropped_first():
+    cache = query_cache.LRUCache("test", max_size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_expired_entry_is_a_miss():
+    cache = query_cache.LRUCache("test", max_size=2, ttl=-1)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -0,0 +1,30 @@
+import pytest
+
+from tools import _orders_rows
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "select name from members order by name, id",
+        "SELECT name FROM members\nORDER\tBY id DESC LIMIT 5",
+        "select m.name, (select count(*) from artists) from members m order by m.id",
+    ],
+)
+def test_top_level_order_by(sql):
+    assert _orders_rows(sql)
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "select name from members",
+        "select * from (select name from members order by name) t",
+        "select name, row_number() over (order by id) from members",
+        "select name from members where note = 'order by id'",
+        'select "order by" from members',
+        "select name from members_order byzantine",
+    ],
+)
+def test_no_top_level_order_by(sql):
+    assert not _orders_rows(sql)
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+import write_buffer
+from write_buffer import WriteBuffer
+
+
+@pytest.fixture
+def inserts(monkeypatch):
+    """Records every bulk insert as (table, parent id, row names); a parent id of "bad"
+    fails."""
+    calls: list[tuple[str, str, list[str]]] = []
+
+    def fake(table):
+        async def insert(parent_id, rows):
+            await asyncio.sleep(0)
+            if parent_id == "bad":
+                raise RuntimeError("insert failed")
+            calls.append((table, parent_id, [r["name"] for r in rows]))
+            return rows
+
+        return insert
+
+    for table in ("members", "festivals", "artists"):
+        monkeypatch.setitem(write_buffer._BULK_INSERTS, table, fake(table))
+    return calls
+
+
+def test_writes_in_order_merging_consecutive_rows(inserts):
+    async def run():
+        writes = WriteBuffer(delay=0)
+        festival = writes.add_festival("g1", "Coachella")
+        writes.add_artist(festival["id"], "A")
+        writes.add_artist(festival["id"], "B")
+        writes.add_member("g1", "Sam")
+        writes.add_member("g1", "Kim")
+        writes.add_festival("g1", "Lollapalooza")
+        await writes.flush()
+        await writes.close()
+        return festival, writes
+
+    festival, writes = asyncio.run(run())
+    assert inserts == [
+        ("festivals", "g1", ["Coachella"]),
+        ("artists", festival["id"], ["A", "B"]),
+        ("members", "g1", ["Sam", "Kim"]),
+        ("festivals", "g1", ["Lollapalooza"]),
+    ]
+    assert writes.stats() == {"written": 6, "pending": 0, "failed": 0}
+
+
+def test_rows_get_ids_before_they_are_written(inserts):
+    async def run():
+        writes = WriteBuffer(delay=10)
+        member = writes.add_member("g1", "Sam", "Austin")
+        assert inserts == [] and writes.pending == 1
+        await writes.close()
+        return member
+
+    member = asyncio.run(run())
+    assert member["id"] and member["name"] == "Sam" and member["city"] == "Austin"
+
+
+def test_flush_skips_the_batching_delay(inserts):
+    async def run():
+        writes = WriteBuffer(delay=10)
+        writes.add_member("g1", "Sam")
+        await asyncio.wait_for(writes.flush(), timeout=1)
+        written = list(inserts)
+        await writes.close()
+        return written
+
+    assert asyncio.run(run()) == [("members", "g1", ["Sam"])]
+
+
+def test_rows_saved_within_the_delay_share_one_insert(inserts):
+    async def run():
+        writes = WriteBuffer(delay=0.05)
+        writes.add_member("g1", "Sam")
+        await asyncio.sleep(0.01)
+        writes.add_member("g1", "Kim")
+        await asyncio.sleep(0.1)
+        await writes.close()
+
+    asyncio.run(run())
+    assert inserts == [("members", "g1", ["Sam", "Kim"])]
+
+
+def test_failed_batch_is_reported_once_and_later_rows_still_written(inserts):
+    async def run():
+        writes = WriteBuffer(delay=0)
+        writes.add_member("bad", "Sam")
+        writes.add_member("g1", "Kim")
+        await writes.flush()
+        first, second = writes.take_failures(), writes.take_failures()
+        await writes.close()
+        return writes, first, second
+
+    writes, first, second = asyncio.run(run())
+    assert first == [{"table": "members", "names": ["Sam"], "error": "insert failed"}]
+    assert second == []
+    assert inserts == [("members", "g1", ["Kim"])]
+    assert writes.stats() == {"written": 1, "pending": 0, "failed": 1}
+
+
+def test_flush_with_nothing_queued_returns_at_once(inserts):
+    async def run():
+        await asyncio.wait_for(WriteBuffer().flush(), timeout=0.1)
+
+    asyncio.run(run())
+
+
+def test_written_batches_invalidate_the_backend_cache(inserts, monkeypatch):
+    notified = []
+
+    async def notify(table, parent_id):
+        notified.append((table, parent_id))
+
+    monkeypatch.setattr(write_buffer, "_notify_backend", notify)
+
+    async def run():
+        writes = WriteBuffer(delay=0)
+        writes.add_member("g1", "Sam")
+        writes.add_member("bad", "Kim")
+        writes.add_festival("g1", "Coachella")
+        await writes.flush()
+        await writes.close()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert notified == [("members", "g1"), ("festivals", "g1")]
@@ -1,15 +1,53 @@
+import asyncio
+import functools
 import os
+import re
+import time
 from pathlib import Path
+from typing import TypedDict
 
 import aiohttp
-import anthropic
 from pipecat.frames.frames import EndTaskFrame
 from pipecat.processors.frame_processor import FrameDirection
 from pipecat.adapters.schemas.tools_schema import ToolsSchema
 from pipecat.services.llm_service import FunctionCallParams
 from loguru import logger
 
-import db
+import clients
+import context_compaction
+import db_async
+import latency
+import llm_usage
+import phone_index
+import post_call
+import query_cache
+from write_buffer import WriteBuffer
+
+
+@functools.cache
+def schema_sql() -> str:
+    """The database schema given to the LLM, read from schema.sql on first use."""
+    return (Path(__file__).parent / "schema.sql").read_text()
+
+
+# String literals and quoted identifiers, blanked before looking for ORDER BY.
+_QUOTED = re.compile(r"'(?:[^']|'')*'|\"[^\"]*\"")
+
+
+def _orders_rows(sql: str) -> bool:
+    """Whether sql has a top-level ORDER BY (not one in a subquery or window). The rows
+    of a query without one come back in no fixed order, so paging it by offset (migration
+    006) could repeat or skip rows between pages."""
+    depth = 0
+    top = []
+    for char in _QUOTED.sub("''", sql):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0:
+            top.append(char)
+    return re.search(r"\border\s+by\b", "".join(top), re.IGNORECASE) is not None
 
 
 async def get_call_info(call_sid: str) -> dict:
@@ -33,66 +71,109 @@ async def get_call_info(call_sid: str) -> dict:
     try:
         auth = aiohttp.BasicAuth(account_sid, auth_token)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, auth=auth) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Twilio API error ({response.status}): {error_text}")
-                    return {}
+        session = clients.get_http_session()
+        async with session.get(url, auth=auth) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(f"Twilio API error ({response.status}): {error_text}")
+                return {}
 
-                data = await response.json()
+            data = await response.json()
 
-                call_info = {
-                    "from_number": data.get("from"),
-                    "to_number": data.get("to"),
-                }
+            call_info = {
+                "from_number": data.get("from"),
+                "to_number": data.get("to"),
+            }
 
-                return call_info
+            return call_info
 
     except Exception as e:
         logger.error(f"Error fetching call info from Twilio: {e}")
         return {}
 
-SUMMARY_PROMPT = """Summarize this voice conversation between a festival planning assistant (Sophie) and the user. Focus on:
-
-- Who is in the group and where they're based
-- Which festivals or artists were discussed
-- Any decisions made (committed, passed, considering)
-- Ticket timing, budget, or logistics discussed
-- Open questions or next steps
-
-Keep it concise (3-8 bullet points). This summary will be used to bring Sophie up to speed on the next call."""
-
-
-async def summarize_transcript(messages: list) -> str:
-    """Call Anthropic to summarize the conversation transcript."""
-    # Build a readable transcript from the context messages
-    transcript_lines = []
-    for msg in messages:
-        role = msg.get("role", "unknown")
-        content = msg.get("content", "")
-        if role == "system":
-            continue
-        speaker = "Sophie" if role == "assistant" else "User"
-        if content:
-            transcript_lines.append(f"{speaker}: {content}")
-
-    transcript = "\n".join(transcript_lines)
-    if not transcript.strip():
-        return "No conversation content to summarize."
-
-    client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-    response = await client.messages.create(
-        model="claude-haiku-4-5-20251001",
-        max_tokens=512,
-        messages=[
-            {
-                "role": "user",
-                "content": f"{SUMMARY_PROMPT}\n\n---\n\nTranscript:\n{transcript}",
-            }
+
+class MemberInput(TypedDict):
+    name: str
+    city: str
+
+
+class ArtistInput(TypedDict):
+    name: str
+    priority: str
+
+
+def _group_info(group_id: str, snapshot: dict) -> dict:
+    return {
+        "group_id": group_id,
+        "members": snapshot["members"],
+        "festivals": snapshot["festivals"],
+        "recent_call_summaries": [
+            {"date": c["started_at"], "summary": c["summary"]}
+            for c in snapshot["recent_calls"]
+            if c.get("summary")
         ],
+    }
+
+
+async def _ensure_call(session_state: dict) -> None:
+    """Give the session one call record, for its current group.
+
+    Creates the record once a group is known, and moves it if the group changes later
+    (a known caller who then creates a new group), so no record is left behind.
+    """
+    async with session_state.setdefault("call_lock", asyncio.Lock()):
+        group_id = session_state.get("group_id")
+        if not group_id:
+            return
+        if not session_state.get("call_id"):
+            call = await db_async.start_call(group_id)
+            session_state["call_id"] = call["id"]
+            if session_state.get("finish_job") is not None:
+                await post_call.set_call_id(session_state["finish_job"], call["id"])
+        elif session_state.get("call_group_id") != group_id:
+            await db_async.set_call_group(session_state["call_id"], group_id)
+        session_state["call_group_id"] = group_id
+
+
+async def _load_caller_context(session_state: dict, from_number: str) -> None:
+    member = await phone_index.lookup(from_number)
+    session_state["caller"] = member
+    group_id = member.get("group_id") if member else None
+    if not group_id or session_state.get("group_id") not in (None, group_id):
+        return
+    session_state["group_id"] = group_id
+    _, snapshot = await asyncio.gather(
+        _ensure_call(session_state),
+        db_async.get_group_snapshot(group_id, calls_limit=3),
     )
-    return response.content[0].text  # type: ignore[union-attr]
+    if session_state.get("group_id") == group_id:
+        session_state["group_info"] = _group_info(group_id, snapshot)
+
+
+def prefetch_caller_context(session_state: dict) -> None:
+    """Start loading a known caller's member, group, festivals and recent calls.
+
+    Called when the client connects, so lookup_caller and get_group_info answer from
+    session_state instead of making their own round trips in the middle of a turn.
+    """
+    from_number = session_state.get("from_number")
+    if from_number and "prefetch" not in session_state:
+        session_state["prefetch"] = asyncio.create_task(
+            _load_caller_context(session_state, from_number)
+        )
+
+
+async def _await_prefetch(session_state: dict) -> bool:
+    """Wait for an in-flight prefetch; returns whether it completed successfully."""
+    task = session_state.get("prefetch")
+    if task is None:
+        return False
+    try:
+        await task
+        return True
+    except Exception as e:
+        logger.warning(f"Caller context prefetch failed: {e}")
+        return False
 
 
 def create_tools(session_state: dict, llm=None) -> ToolsSchema:
@@ -100,9 +181,20 @@ def create_tools(session_state: dict, llm=None) -> ToolsSchema:
 
     If llm is provided, registers each direct function with the LLM service.
     """
+    # The save_* tools queue their rows here and return the client-generated ids at once.
+    writes: WriteBuffer = session_state.setdefault("writes", WriteBuffer())
+
+    async def _saved(params: FunctionCallParams, result: dict) -> None:
+        """Return a save_* result, with any earlier writes that failed in the meantime."""
+        session_state.pop("group_info", None)
+        failures = writes.take_failures()
+        if failures:
+            result["failed_writes"] = failures
+        await params.result_callback(result)
 
     async def end_call(params: FunctionCallParams):
         """End the call. Use when the conversation has clearly concluded—goodbye, thanks, that's all, etc."""
+        await writes.flush()
         await params.llm.push_frame(EndTaskFrame(), FrameDirection.UPSTREAM)
         await params.result_callback({"status": "ending"})
 
@@ -112,12 +204,11 @@ def create_tools(session_state: dict, llm=None) -> ToolsSchema:
         Args:
             name: The group name, e.g. "Jake's crew" or "Austin squad".
         """
-        group = db.create_group(name)
+        group = await db_async.create_group(name)
         session_state["group_id"] = group["id"]
-        # Start a call record for this session
-        call = db.start_call(group["id"])
-        session_state["call_id"] = call["id"]
-        logger.info(f"Session group: {group['id']}, call: {call['id']}")
+        session_state.pop("group_info", None)
+        await _ensure_call(session_state)
+        logger.info(f"Session group: {group['id']}, call: {session_state['call_id']}")
         await params.result_callback({"group_id": group["id"], "group_name": name})
 
     async def save_member(params: FunctionCallParams, name: str, city: str = ""):
@@ -131,8 +222,26 @@ def create_tools(session_state: dict, llm=None) -> ToolsSchema:
         if not group_id:
             await params.result_callback({"error": "No active group. Create a group first with save_group."})
             return
-        member = db.add_member(group_id, name, city or None)
-        await params.result_callback({"member_id": member["id"], "name": name, "city": city})
+        member = writes.add_member(group_id, name, city or None)
+        await _saved(params, {"member_id": member["id"], "name": name, "city": city})
+
+    async def save_members(params: FunctionCallParams, members: list[MemberInput]):
+        """Save several friends/members to the current group at once. Use this instead of
+        repeated save_member calls when the caller names more than one person.
+
+        Args:
+            members: The people to save, each with a "name" and a "city" ("" if unknown).
+        """
+        group_id = session_state.get("group_id")
+        if not group_id:
+            await params.result_callback({"error": "No active group. Create a group first with save_group."})
+            return
+        rows = [writes.add_member(group_id, m["name"], m.get("city") or None) for m in members]
+        await _saved(params, {
+            "members": [
+                {"member_id": r["id"], "name": r["name"], "city": r.get("city")} for r in rows
+            ]
+        })
 
     async def save_festival(
         params: FunctionCallParams,
@@ -159,7 +268,7 @@ def create_tools(session_state: dict, llm=None) -> ToolsSchema:
         if not group_id:
             await params.result_callback({"error": "No active group. Create a group first with save_group."})
             return
-        festival = db.add_festival(
+        festival = writes.add_festival(
             group_id,
             name,
             location=location or None,
@@ -169,7 +278,7 @@ def create_tools(session_state: dict, llm=None) -> ToolsSchema:
             on_sale_date=on_sale_date or None,
             status=status,
         )
-        await params.result_callback({"festival_id": festival["id"], "name": name, "status": status})
+        await _saved(params, {"festival_id": festival["id"], "name": name, "status": status})
 
     async def save_artist(
         params: FunctionCallParams,
@@ -184,8 +293,29 @@ def create_tools(session_state: dict, llm=None) -> ToolsSchema:
             name: Artist name, e.g. "Kendrick Lamar".
             priority: One of "must_see", "want_to_see", or "nice_to_have".
         """
-        artist = db.add_artist(festival_id, name, priority)
-        await params.result_callback({"artist_id": artist["id"], "name": name, "priority": priority})
+        artist = writes.add_artist(festival_id, name, priority)
+        await _saved(params, {"artist_id": artist["id"], "name": name, "priority": priority})
+
+    async def save_artists(
+        params: FunctionCallParams, festival_id: str, artists: list[ArtistInput]
+    ):
+        """Save several artists performing at a festival at once, e.g. the acts the caller
+        lists from a lineup. Use this instead of repeated save_artist calls.
+
+        Args:
+            festival_id: The UUID of the festival.
+            artists: Each with a "name" and a "priority": one of "must_see", "want_to_see",
+                or "nice_to_have".
+        """
+        rows = [
+            writes.add_artist(festival_id, a["name"], a.get("priority") or "want_to_see")
+            for a in artists
+        ]
+        await _saved(params, {
+            "artists": [
+                {"artist_id": r["id"], "name": r["name"], "priority": r["priority"]} for r in rows
+            ]
+        })
 
     async def get_group_info(params: FunctionCallParams):
         """Retrieve all saved info for the current group — members, festivals, artists, and recent call summaries."""
@@ -193,53 +323,130 @@ def create_tools(session_state: dict, llm=None) -> ToolsSchema:
         if not group_id:
             await params.result_callback({"error": "No active group."})
             return
-        members = db.list_members(group_id)
-        festivals = db.list_festivals(group_id)
-        recent_calls = db.get_recent_calls(group_id, limit=3)
-        await params.result_callback({
-            "group_id": group_id,
-            "members": members,
-            "festivals": festivals,
-            "recent_call_summaries": [
-                {"date": c["started_at"], "summary": c["summary"]}
-                for c in recent_calls
-                if c.get("summary")
-            ],
-        })
-
-    _schema_sql = (Path(__file__).parent / "schema.sql").read_text()
-
-    async def query_database(params: FunctionCallParams, question: str):
-        """Query the database using natural language. Use this to look up any information about
-        groups, members, festivals, artists, or past calls.
+        await _await_prefetch(session_state)
+        await writes.flush()
+        group_info = session_state.get("group_info")
+        if group_info is None or group_info["group_id"] != group_id:
+            snapshot = await db_async.get_group_snapshot(group_id, calls_limit=3)
+            group_info = _group_info(group_id, snapshot)
+            session_state["group_info"] = group_info
+        failures = writes.take_failures()
+        if failures:
+            group_info = {**group_info, "failed_writes": failures}
+        await params.result_callback(group_info)
+
+    _schema_sql = schema_sql()
+    _schema_digest = query_cache.schema_hash(_schema_sql)
+
+    # The schema goes in the system prompt, marked cacheable, so only the question varies
+    # between SQL generations.
+    _sql_system = [
+        {
+            "type": "text",
+            "text": "You are a SQL query generator. Given a Postgres schema and a question, "
+            "return ONLY a single SELECT query. No explanation, no markdown fences. "
+            "Results are paged, so always end with an ORDER BY whose last column is unique "
+            "(e.g. the table's id). Select only the columns "
+            "the question needs, and never calls.transcript unless it is asked for.",
+        },
+        llm_usage.cached_text_block(f"Schema:\n{_schema_sql}"),
+    ]
 
-        Args:
-            question: A natural-language question, e.g. "which festivals is Jake's crew considering?"
-        """
-        client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-        response = await client.messages.create(
+    @latency.timed("llm.generate_sql")
+    async def _generate_sql(question: str) -> str:
+        client = clients.get_anthropic()
+        # Streamed only to time the first token; the query is used once it is complete.
+        start = time.perf_counter()
+        ttfb = None
+        async with client.messages.stream(
             model="claude-haiku-4-5-20251001",
             max_tokens=512,
-            system="You are a SQL query generator. Given a Postgres schema and a question, "
-            "return ONLY a single SELECT query. No explanation, no markdown fences.",
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"Schema:\n{_schema_sql}\n\nQuestion: {question}",
-                }
-            ],
-        )
+            system=_sql_system,  # type: ignore[arg-type]
+            messages=[{"role": "user", "content": f"Question: {question}"}],
+        ) as stream:
+            async for _ in stream.text_stream:
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+            response = await stream.get_final_message()
+        usage = session_state.get("usage")
+        if usage is not None:
+            usage.record_anthropic("sql", response.usage, ttfb)
         sql = response.content[0].text.strip()  # type: ignore[union-attr]
 
         # Strip markdown code fences if the model wraps the query
         if sql.startswith("```"):
             sql = sql.split("\n", 1)[1].rsplit("```", 1)[0].strip()
+        return sql
 
-        try:
-            result = db.execute_readonly_query(sql)
-            await params.result_callback({"query": sql, "result": result})
-        except Exception as e:
-            await params.result_callback({"error": str(e), "query": sql})
+    async def query_database(params: FunctionCallParams, question: str, cursor: str = ""):
+        """Query the database using natural language. Use this to look up any information about
+        groups, members, festivals, artists, or past calls. Results come one page at a time: if
+        "more_available" is true, call again with the same question and next_cursor for more.
+
+        Args:
+            question: A natural-language question, e.g. "which festivals is Jake's crew considering?"
+            cursor: The next_cursor of a previous result, to get its next page.
+        """
+        cursors = session_state.setdefault("query_cursors", {})
+        if cursor:
+            if cursor not in cursors:
+                await params.result_callback(
+                    {"error": f"Unknown cursor {cursor}. Ask the question again without one."}
+                )
+                return
+            # The question the cursor's SQL was generated for, which the LLM may have
+            # rephrased since.
+            question, sql, offset = cursors[cursor]
+        else:
+            offset = 0
+            sql = query_cache.get_sql(_schema_digest, question)
+            if sql is None:
+                start = time.perf_counter()
+                sql = await _generate_sql(question)
+                query_cache.put_sql(_schema_digest, question, sql, time.perf_counter() - start)
+
+        await writes.flush()
+        page = query_cache.get_result(sql, offset)
+        if page is None:
+            try:
+                start = time.perf_counter()
+                page = await db_async.execute_readonly_query(sql, offset=offset)
+                query_cache.put_result(sql, page, time.perf_counter() - start, offset)
+            except Exception as e:
+                query_cache.forget_sql(_schema_digest, question)
+                await params.result_callback({"error": str(e), "query": sql})
+                return
+
+        # Deliver only the rows that fit under the compactor's cap, so the cursor picks up
+        # right after the last row the LLM actually saw.
+        rows = page["rows"]
+        delivered = len(rows)
+        ordered = _orders_rows(sql)
+        while True:
+            more = page["has_more"] or delivered < len(rows)
+            result = {"query": sql, "result": rows[:delivered]}
+            if more and not ordered:
+                # No cursor: the next page of an unordered query could overlap this one.
+                # Asking again generates new SQL.
+                result["note"] = (
+                    f"Showing the first {delivered} rows only; this query has no ORDER BY, "
+                    "so it can't be paged. Ask a narrower question for the rest."
+                )
+            elif more:
+                result["more_available"] = True
+                result["next_cursor"] = f"q{len(cursors) + 1}"
+                result["note"] = (
+                    f"Showing rows {offset + 1}-{offset + delivered}. Summarize these "
+                    "and offer to go on rather than fetching every page."
+                )
+            if delivered <= 1 or context_compaction.fits(result):
+                break
+            delivered -= 1
+        if "next_cursor" in result:
+            cursors[result["next_cursor"]] = (question, sql, offset + delivered)
+        elif more:
+            query_cache.forget_sql(_schema_digest, question)
+        await params.result_callback(result)
 
     async def lookup_caller(params: FunctionCallParams):
         """Look up who is calling based on their phone number. Call this at the start of the conversation to identify the caller and load their group context."""
@@ -250,14 +457,16 @@ def create_tools(session_state: dict, llm=None) -> ToolsSchema:
             )
             return
 
-        member = db.get_member_by_phone(from_number)
+        if await _await_prefetch(session_state):
+            member = session_state.get("caller")
+        else:
+            member = await phone_index.lookup(from_number)
         if member:
             group_info = member.get("groups")
             group_id = member.get("group_id")
             if group_id:
                 session_state["group_id"] = group_id
-                call = db.start_call(group_id)
-                session_state["call_id"] = call["id"]
+                await _ensure_call(session_state)
             await params.result_callback({
                 "known": True,
                 "member_id": member["id"],
@@ -277,13 +486,17 @@ def create_tools(session_state: dict, llm=None) -> ToolsSchema:
         end_call,
         save_group,
         save_member,
+        save_members,
         save_festival,
         save_artist,
+        save_artists,
         get_group_info,
         query_database,
         lookup_caller,
     ]
 
+    all_tools = [latency.timed(f"tool.{fn.__name__}")(fn) for fn in all_tools]
+
     # Register each direct function with the LLM so pipecat can execute them
     if llm is not None:
         for fn in all_tools:
@@ -0,0 +1,113 @@
+"""Streaming, crash-safe per-call transcript files.
+
+Turns are appended to a JSONL file (optionally gzip-compressed) by a background task
+that batches whatever has queued up and writes it off the event loop, flushing after
+every batch. A worker that crashes mid-call leaves a readable file with every turn up
+to the last flush, and the bot never holds the whole conversation in memory. The
+finished file is what the post-call job reads to summarize and persist the call.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import IO
+
+from loguru import logger
+
+TRANSCRIPT_DIR = os.getenv(
+    "TRANSCRIPT_DIR", os.path.join(tempfile.gettempdir(), "festival-coordinator")
+)
+TRANSCRIPT_COMPRESS = os.getenv("TRANSCRIPT_COMPRESS", "").lower() in ("1", "true", "yes")
+TRANSCRIPT_FSYNC = os.getenv("TRANSCRIPT_FSYNC", "").lower() in ("1", "true", "yes")
+
+
+class TranscriptWriter:
+    def __init__(
+        self,
+        directory: str = TRANSCRIPT_DIR,
+        compress: bool = TRANSCRIPT_COMPRESS,
+        fsync: bool = TRANSCRIPT_FSYNC,
+    ):
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.path = os.path.join(directory, f"transcript_{ts}.jsonl" + (".gz" if compress else ""))
+        self.turns = 0
+        self._compress = compress
+        self._fsync = fsync
+        # The file on disk, and what entries are written through (a GzipFile around it
+        # when compressing).
+        self._raw: IO[bytes] | None = None
+        self._file: IO[bytes] | gzip.GzipFile | None = None
+        self._queue: asyncio.Queue[dict | None] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    def append(self, entry: dict) -> None:
+        """Queue a turn for writing. Never blocks the caller."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self._queue.put_nowait(entry)
+        self.turns += 1
+
+    async def close(self) -> str | None:
+        """Write any queued turns and close the file. Returns its path, or None if empty."""
+        if self._task is None:
+            return None
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+        logger.info(f"Saved transcript ({self.turns} turns) to {self.path}")
+        return self.path
+
+    async def _run(self) -> None:
+        closing = False
+        while not closing:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if batch[-1] is None:
+                closing = True
+                batch.pop()
+            try:
+                await asyncio.to_thread(self._write, batch, closing)
+            except Exception as e:
+                logger.error(f"Failed to write transcript to {self.path}: {e}")
+
+    def _write(self, batch: list[dict | None], closing: bool) -> None:
+        if self._raw is None or self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._raw = open(self.path, "ab")
+            self._file = gzip.GzipFile(fileobj=self._raw, mode="ab") if self._compress else self._raw
+        raw, file = self._raw, self._file
+        data = b"".join(json.dumps(entry, default=str).encode() + b"\n" for entry in batch)
+        file.write(data)
+        # GzipFile.flush() emits a sync-flush block, so the file stays readable up to here.
+        file.flush()
+        if self._fsync:
+            os.fsync(raw.fileno())
+        if closing:
+            # Closing a GzipFile writes its trailer but leaves the file it wraps open.
+            file.close()
+            raw.close()
+            self._raw = self._file = None
+
+
+def read_transcript(path: str) -> list[dict]:
+    """Load a transcript file, skipping a trailing partial line left by a crash. A file
+    that was never created (no turns before the crash) reads as empty."""
+    opener = gzip.open if path.endswith(".gz") else open
+    turns = []
+    if not os.path.exists(path):
+        return turns
+    try:
+        with opener(path, "rt") as f:  # type: ignore[operator]
+            for line in f:
+                try:
+                    turns.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+    except EOFError:
+        # A gzip stream cut off by a crash still yields every sync-flushed turn above.
+        pass
+    return turns
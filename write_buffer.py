@@ -0,0 +1,165 @@
+"""Per-call write-behind buffer for the save_* tools.
+
+A saved member, festival or artist only needs to reach the database eventually, but
+the LLM's next token used to wait on the insert. The tools now give each row a
+client-generated UUID (every table has a uuid primary key), queue it here and return
+at once. A background task writes the queue in order, with consecutive rows for the
+same table and parent merged into one bulk insert, so a festival is always written
+before the artists saved for it.
+
+- flush() waits until everything queued so far is written. Tools that read (get_group_info,
+  query_database) flush first, so they see the call's own writes; end_call and
+  disconnect flush too.
+- A failed batch is logged, counted in metrics.py and kept in failures; the tools hand
+  it to the LLM with their next result (take_failures()), so it can tell the caller.
+- A written batch is posted to the backend's /cache/invalidate (BACKEND_URL, with
+  PHONE_INDEX_SECRET), so the dashboard's cached group pages show it. Unset, they show
+  it once BACKEND_CACHE_TTL expires.
+"""
+
+import asyncio
+import os
+import uuid
+from typing import Any
+
+from loguru import logger
+
+import clients
+import db_async
+import metrics
+import phone_index
+
+# How long a write waits for other writes to batch with. flush() skips the wait.
+WRITE_BUFFER_DELAY = float(os.getenv("WRITE_BUFFER_DELAY", "0.05"))
+
+_BULK_INSERTS = {
+    "members": db_async.add_members,
+    "festivals": db_async.add_festivals,
+    "artists": db_async.add_artists,
+}
+
+
+_notifying: set[asyncio.Task] = set()
+
+
+async def _notify_backend(table: str, parent_id: str) -> None:
+    # Read on use: this module is imported before the entry points load .env.
+    backend_url = os.getenv("BACKEND_URL")
+    if not backend_url:
+        return
+    try:
+        async with clients.get_http_session().post(
+            f"{backend_url.rstrip('/')}/cache/invalidate",
+            json={"table": table, "parent_ids": [parent_id]},
+            headers={phone_index.SECRET_HEADER: os.getenv("PHONE_INDEX_SECRET", "")},
+        ) as response:
+            response.raise_for_status()
+    except Exception as e:
+        logger.warning(f"Could not invalidate the backend cache for {table}: {e}")
+
+
+class WriteBuffer:
+    def __init__(self, delay: float = WRITE_BUFFER_DELAY):
+        self._delay = delay
+        # (table, parent id, row) in the order the tools saved them
+        self._pending: list[tuple[str, str, dict[str, Any]]] = []
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._flush_requested = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.failures: list[dict[str, Any]] = []
+        self.written = 0
+        self.failed = 0
+
+    # --- Queueing ---
+
+    def add_member(self, group_id: str, name: str, city: str | None = None) -> dict[str, Any]:
+        return self._enqueue("members", group_id, {"name": name, "city": city})
+
+    def add_festival(self, group_id: str, name: str, **fields: Any) -> dict[str, Any]:
+        return self._enqueue("festivals", group_id, {"name": name, **fields})
+
+    def add_artist(
+        self, festival_id: str, name: str, priority: str = "want_to_see"
+    ) -> dict[str, Any]:
+        return self._enqueue("artists", festival_id, {"name": name, "priority": priority})
+
+    def _enqueue(self, table: str, parent_id: str, row: dict[str, Any]) -> dict[str, Any]:
+        row = {"id": str(uuid.uuid4()), **row}
+        self._pending.append((table, parent_id, row))
+        self._idle.clear()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self._wake.set()
+        return row
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    # --- Writing ---
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if self._delay:
+                try:
+                    await asyncio.wait_for(self._flush_requested.wait(), self._delay)
+                except asyncio.TimeoutError:
+                    pass
+            while self._pending:
+                await self._write(self._take_batch())
+            self._idle.set()
+
+    def _take_batch(self) -> tuple[str, str, list[dict[str, Any]]]:
+        table, parent_id, _ = self._pending[0]
+        size = 1
+        while size < len(self._pending) and self._pending[size][:2] == (table, parent_id):
+            size += 1
+        batch = [row for _, _, row in self._pending[:size]]
+        del self._pending[:size]
+        return table, parent_id, batch
+
+    async def _write(self, batch: tuple[str, str, list[dict[str, Any]]]) -> None:
+        table, parent_id, rows = batch
+        try:
+            await _BULK_INSERTS[table](parent_id, rows)
+            self.written += len(rows)
+            metrics.incr("write_buffer.rows_written", len(rows))
+            task = asyncio.create_task(_notify_backend(table, parent_id))
+            _notifying.add(task)
+            task.add_done_callback(_notifying.discard)
+        except Exception as e:
+            logger.error(f"Write-behind insert of {len(rows)} {table} failed: {e}")
+            metrics.incr("write_buffer.rows_failed", len(rows))
+            self.failed += len(rows)
+            self.failures.append(
+                {"table": table, "names": [r["name"] for r in rows], "error": str(e)}
+            )
+
+    async def flush(self) -> None:
+        """Wait until every write queued so far has been attempted."""
+        if self._idle.is_set():
+            return
+        self._flush_requested.set()
+        try:
+            await self._idle.wait()
+        finally:
+            self._flush_requested.clear()
+
+    async def close(self) -> None:
+        """Flush, then stop the background task. Call once at disconnect."""
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def take_failures(self) -> list[dict[str, Any]]:
+        """Failures not yet reported to the LLM."""
+        failures, self.failures = self.failures, []
+        return failures
+
+    def stats(self) -> dict[str, int]:
+        return {"written": self.written, "pending": self.pending, "failed": self.failed}